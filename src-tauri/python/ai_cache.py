@@ -0,0 +1,174 @@
+"""
+On-disk cache for AI transcription and summarization results
+Entries are keyed by SHA-256 of the input plus model name and prompt version
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Optional
+
+from database import DB_DIR
+
+
+DEFAULT_CACHE_DIR = os.path.join(DB_DIR, "ai_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+EVICT_TO = 0.9  # Eviction frees down to this share of max_bytes, so a full cache isn't walked on every set
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of raw bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 hex digest of a text (UTF-8 encoded)"""
+    return hash_bytes(text.encode("utf-8"))
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file, read in chunks so long recordings stay out of memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AICache:
+    """Content-addressed JSON cache with size-bounded LRU eviction"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Directory holding cache entries
+            max_bytes: Total size above which least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Running total of entry sizes, so a set only walks the directory when over
+        # budget (None until first needed; entries written by other processes are
+        # counted at the next eviction)
+        self._total: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash: str, model: str, prompt_version: str) -> str:
+        """Build cache key from input hash, model name and prompt version"""
+        return hash_text(f"{content_hash}:{model}:{prompt_version}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value or None; a hit marks the entry as recently used"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        try:
+            os.utime(path, None)  # mtime doubles as last-access time for LRU
+        except OSError:
+            pass
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value and evict old entries if over budget"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        size = os.path.getsize(tmp_path)
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(entry_size for _, entry_size, _ in self._entries())
+            self._total += size - _file_size(path)
+            os.replace(tmp_path, path)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        """Remove an entry if present"""
+        path = self._path(key)
+        with self._lock:
+            size = _file_size(path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            if self._total is not None:
+                self._total -= size
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._total = 0
+
+    def size_bytes(self) -> int:
+        """Total size of all cache entries"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        """List (path, size, mtime) for every entry"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Delete least recently used entries until total size is EVICT_TO of max_bytes (caller holds the lock)"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        entries.sort(key=lambda entry: entry[2])
+        for path, size, _ in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total = total
+
+
+def _file_size(path: str) -> int:
+    """Size of a file, 0 if it doesn't exist"""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+_default_cache: Optional[AICache] = None
+
+
+def get_default_cache() -> AICache:
+    """Shared cache instance used by the transcription and summarization services"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AICache()
+    return _default_cache
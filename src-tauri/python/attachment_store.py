@@ -0,0 +1,155 @@
+"""
+File-backed, content-addressed store for roadshow attachments
+Bytes are written to db/attachments/<sha[:2]>/<sha>; the attachment table
+only keeps references (roadshow, hash, mime type, size)
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from sqlmodel import Session
+
+from database import DB_DIR, Attachment
+
+
+ATTACHMENTS_DIR = os.path.join(DB_DIR, "attachments")
+CHUNK_SIZE = 1024 * 1024
+MAX_ATTACHMENT_BYTES = 25 * 1024 * 1024
+
+_DATA_URL = re.compile(r"^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?:;[^,]*)?;base64,(?P<data>.*)$", re.DOTALL)
+
+
+class AttachmentTooLarge(ValueError):
+    pass
+
+
+class AttachmentStore:
+    """Content-addressed files; identical uploads share one file"""
+
+    def __init__(self, root: str = ATTACHMENTS_DIR, max_bytes: int = MAX_ATTACHMENT_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash)
+
+    def exists(self, content_hash: str) -> bool:
+        return os.path.exists(self.path(content_hash))
+
+    def save_stream(self, stream: BinaryIO) -> Tuple[str, int]:
+        """
+        Copy a file-like object into the store, hashing while writing
+
+        Returns:
+            (content_hash, size_bytes)
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.root, f".upload.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise AttachmentTooLarge(f"Attachment exceeds {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            content_hash = digest.hexdigest()
+            target = self.path(content_hash)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+            return content_hash, size
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save_bytes(self, data: bytes) -> Tuple[str, int]:
+        content_hash = hashlib.sha256(data).hexdigest()
+        target = self.path(content_hash)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        return content_hash, len(data)
+
+    def delete_if_unreferenced(self, session: Session, content_hash: str):
+        """Remove a file once no attachment row points at it"""
+        still_used = session.query(Attachment.id).filter(Attachment.content_hash == content_hash).first()
+        if not still_used:
+            try:
+                os.remove(self.path(content_hash))
+            except FileNotFoundError:
+                pass
+
+
+def attachment_ref(attachment: Attachment) -> Dict:
+    """JSON reference returned instead of the file body"""
+    return {
+        "id": attachment.id,
+        "roadshow_id": attachment.roadshow_id,
+        "content_hash": attachment.content_hash,
+        "mime_type": attachment.mime_type,
+        "size_bytes": attachment.size_bytes,
+        "filename": attachment.filename,
+        "created_at": attachment.created_at,
+        "url": f"/attachments/{attachment.id}",
+    }
+
+
+def decode_data_url(data_url: str) -> Optional[Tuple[str, bytes]]:
+    """(mime_type, bytes) of a base64 data URL, or None if it isn't one"""
+    match = _DATA_URL.match(data_url.strip())
+    if not match:
+        return None
+    try:
+        data = base64.b64decode(match.group("data"), validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    return match.group("mime") or "application/octet-stream", data
+
+
+def import_flight_images(session: Session, store: "AttachmentStore", roadshow_id: int, flight_images: Optional[str]) -> List[Attachment]:
+    """
+    Turn a legacy flight_images JSON array into attachments (caller commits)
+
+    Accepts both ["data:..."] and [{"dataUrl": "data:...", "timestamp": ...}] entries.
+    """
+    if not flight_images:
+        return []
+    try:
+        entries = json.loads(flight_images)
+    except json.JSONDecodeError:
+        return []
+
+    attachments = []
+    for index, entry in enumerate(entries if isinstance(entries, list) else []):
+        data_url = entry.get("dataUrl") if isinstance(entry, dict) else entry
+        decoded = decode_data_url(data_url) if isinstance(data_url, str) else None
+        if not decoded:
+            continue
+        mime_type, data = decoded
+        content_hash, size = store.save_bytes(data)
+        attachment = Attachment(
+            roadshow_id=roadshow_id,
+            content_hash=content_hash,
+            mime_type=mime_type,
+            size_bytes=size,
+            filename=f"flight_{index + 1}"
+        )
+        session.add(attachment)
+        attachments.append(attachment)
+    return attachments
+
+
+# Shared store used by the backend
+attachment_store = AttachmentStore()
@@ -0,0 +1,251 @@
+"""
+In-memory autocomplete index for the type-ahead entity pickers
+Names of LPs, GPs, people, funds and distributors are folded (lowercase, no
+accents) into word tokens kept in one sorted array, so a prefix lookup is a
+bisect instead of an ilike '%q%' scan per table. Aliases are derived from the
+rows, as there are no alias columns: the initials of an organization's
+significant words ("Grupo Financiero Banorte" -> "fb") and the parts of a
+person's email address.
+
+The index is built in a background thread at startup and kept current from
+the change feed: inserts, updates and deletes are applied as they commit, and
+an "invalidate" (a bulk write, e.g. a dedup merge) reloads that entity type on
+its next lookup. Writes from other processes aren't seen until a restart.
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import select
+
+from change_feed import change_feed
+from database import LP, GP, Person, Fund, Distributor, get_session
+from dedup import STOPWORDS, fold
+
+
+# entity -> (model, name column, detail columns (first one set is shown), alias source)
+ENTITIES = {
+    "lp": (LP, "name", ["type_of_group", "location"], "initials"),
+    "gp": (GP, "name", ["flagship_strategy", "location"], "initials"),
+    "person": (Person, "name", ["position", "email"], "email"),
+    "fund": (Fund, "fund_name", ["asset_class", "geography"], "initials"),
+    "distributor": (Distributor, "name", ["headquarter"], "initials"),
+}
+
+# Match kinds, best first
+EXACT, PREFIX, WORD_PREFIX, ALIAS, INFIX = range(5)
+MATCH_KINDS = ["exact", "prefix", "word_prefix", "alias", "infix"]
+
+# Queries at least this long also match inside words ("norte" -> "Banorte")
+MIN_INFIX_LENGTH = 3
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def words(text: Optional[str]) -> List[str]:
+    """Folded word tokens of text"""
+    return _WORD.findall(fold(text or ""))
+
+
+@dataclass
+class Entry:
+    entity: str
+    id: int
+    values: Dict[str, Optional[str]]  # The indexed columns, for applying partial updates
+    label: str = ""
+    folded: str = ""  # Words of the label joined by single spaces
+    tokens: Set[Tuple[str, bool]] = field(default_factory=set)  # (token, is alias)
+
+    def refresh(self):
+        _, name_column, _, alias_source = ENTITIES[self.entity]
+        self.label = self.values.get(name_column) or ""
+        name_words = words(self.label)
+        self.folded = " ".join(name_words)
+        self.tokens = {(word, False) for word in name_words}
+        if alias_source == "initials":
+            significant = [word for word in name_words if word not in STOPWORDS]
+            if len(significant) > 1:
+                self.tokens.add(("".join(word[0] for word in significant), True))
+        elif alias_source == "email":
+            self.tokens.update((word, True) for word in words(self.values.get("email")))
+        # An alias that is also a name word ranks as the name word
+        self.tokens -= {(token, True) for token, is_alias in self.tokens if not is_alias}
+
+    @property
+    def detail(self) -> Optional[str]:
+        _, _, detail_columns, _ = ENTITIES[self.entity]
+        return next((self.values[column] for column in detail_columns if self.values.get(column)), None)
+
+
+class AutocompleteIndex:
+    """Sorted (token, entity, id, is alias) array plus the entries it points at"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # One loader at a time (startup thread or a lookup)
+        self._tokens: List[Tuple[str, str, int, bool]] = []
+        self._entries: Dict[Tuple[str, int], Entry] = {}
+        self._stale: Set[str] = set(ENTITIES)  # Entity types that need a (re)load
+        change_feed.subscribe(self.apply)
+
+    # Maintenance
+    def _add(self, entry: Entry):
+        self._entries[(entry.entity, entry.id)] = entry
+        for token, is_alias in entry.tokens:
+            insort(self._tokens, (token, entry.entity, entry.id, is_alias))
+
+    def _remove(self, entity: str, entry_id: int) -> Optional[Entry]:
+        entry = self._entries.pop((entity, entry_id), None)
+        if entry is not None:
+            for token, is_alias in entry.tokens:
+                position = bisect_left(self._tokens, (token, entity, entry_id, is_alias))
+                if position < len(self._tokens) and self._tokens[position] == (token, entity, entry_id, is_alias):
+                    del self._tokens[position]
+        return entry
+
+    def _apply_change(self, change: dict):
+        entity, op = change["entity"], change["op"]
+        if entity not in ENTITIES or entity in self._stale:
+            return  # Not indexed, or reloaded from the database anyway
+        if op == "invalidate":
+            self._stale.add(entity)
+            return
+        if op == "delete":
+            self._remove(entity, change["id"])
+            return
+        values = {column: value for column, value in change.get("values", {}).items() if column in _columns(entity)}
+        if not values and op != "insert":
+            return  # Nothing shown in the picker changed
+        previous = self._remove(entity, change["id"])
+        entry = Entry(entity, change["id"], {**(previous.values if previous else {}), **values})
+        entry.refresh()
+        self._add(entry)
+
+    def apply(self, changes: List[dict]):
+        """Change feed listener: keep the index in step with committed writes"""
+        with self._lock:
+            for change in changes:
+                self._apply_change(change)
+
+    def load(self, entities: Optional[Iterable[str]] = None):
+        """Load the stale entity types (of entities, default all) from the database"""
+        with self._build_lock:
+            with self._lock:
+                pending = [entity for entity in (entities or ENTITIES) if entity in self._stale]
+            if not pending:
+                return
+            # Changes committed while loading are replayed from the feed afterwards
+            since = change_feed.last_seq
+            loaded = {}
+            with get_session() as session:
+                for entity in pending:
+                    model = ENTITIES[entity][0]
+                    columns = _columns(entity)
+                    rows = session.exec(select(model.id, *(getattr(model, column) for column in columns))).all()
+                    loaded[entity] = [(row[0], dict(zip(columns, row[1:]))) for row in rows]
+
+            with self._lock:
+                for entity, rows in loaded.items():
+                    self._tokens = [token for token in self._tokens if token[1] != entity]
+                    for key in [key for key in self._entries if key[0] == entity]:
+                        del self._entries[key]
+                    for entry_id, values in rows:
+                        entry = Entry(entity, entry_id, values)
+                        entry.refresh()
+                        self._entries[(entity, entry_id)] = entry
+                        self._tokens.extend((token, entity, entry_id, is_alias) for token, is_alias in entry.tokens)
+                    self._stale.discard(entity)
+                self._tokens.sort()
+                for change in change_feed.after(since):
+                    self._apply_change(change)
+            print(f"Autocomplete index: loaded {', '.join(f'{len(rows)} {entity}' for entity, rows in loaded.items())}")
+
+    # Lookup
+    def _prefix_matches(self, token: str, entities: Set[str]) -> Dict[Tuple[str, int], bool]:
+        """(entity, id) -> whether a name word (not only an alias) starts with token"""
+        matches: Dict[Tuple[str, int], bool] = {}
+        position = bisect_left(self._tokens, (token,))
+        while position < len(self._tokens) and self._tokens[position][0].startswith(token):
+            _, entity, entry_id, is_alias = self._tokens[position]
+            if entity in entities:
+                key = (entity, entry_id)
+                matches[key] = matches.get(key, False) or not is_alias
+            position += 1
+        return matches
+
+    def search(self, q: str, entities: Optional[Iterable[str]] = None, limit: int = 10) -> List[dict]:
+        """
+        Ranked matches for a type-ahead query
+
+        Every word of q has to start a word (or alias) of the name. Ranked by
+        match kind (exact name, name prefix, word prefixes, alias, then infix
+        for queries of MIN_INFIX_LENGTH+ characters), then shorter names first.
+
+        Args:
+            q: What the user has typed so far
+            entities: Entity types to search (default all)
+            limit: Maximum number of matches
+
+        Returns:
+            [{entity, id, label, detail, match}]
+        """
+        entities = set(entities or ENTITIES) & set(ENTITIES)
+        query_words = words(q)
+        if not query_words or not entities or limit < 1:
+            return []
+        if self._stale & entities:
+            self.load(self._stale & entities)
+        query = " ".join(query_words)
+
+        with self._lock:
+            ranked: Dict[Tuple[str, int], int] = {}
+            candidates: Optional[Dict[Tuple[str, int], bool]] = None
+            # Longest (most selective) word first keeps the intersection small
+            for word in sorted(set(query_words), key=len, reverse=True):
+                matches = self._prefix_matches(word, entities)
+                if candidates is None:
+                    candidates = matches
+                else:
+                    candidates = {key: by_name and matches[key] for key, by_name in candidates.items() if key in matches}
+                if not candidates:
+                    break
+            for key, by_name in (candidates or {}).items():
+                folded = self._entries[key].folded
+                if folded == query:
+                    ranked[key] = EXACT
+                elif folded.startswith(query):
+                    ranked[key] = PREFIX
+                else:
+                    ranked[key] = WORD_PREFIX if by_name else ALIAS
+
+            if len(query) >= MIN_INFIX_LENGTH and len(ranked) < limit:
+                for key, entry in self._entries.items():
+                    if key[0] in entities and key not in ranked and query in entry.folded:
+                        ranked[key] = INFIX
+
+            best = sorted(ranked, key=lambda key: (ranked[key], len(self._entries[key].folded), self._entries[key].folded, key))
+            return [
+                {
+                    "entity": key[0],
+                    "id": key[1],
+                    "label": self._entries[key].label,
+                    "detail": self._entries[key].detail,
+                    "match": MATCH_KINDS[ranked[key]],
+                }
+                for key in best[:limit]
+            ]
+
+    def ids(self, q: str, entity: str, limit: int = 10) -> List[int]:
+        """Ranked ids of one entity type"""
+        return [match["id"] for match in self.search(q, [entity], limit)]
+
+
+def _columns(entity: str) -> List[str]:
+    _, name_column, detail_columns, alias_source = ENTITIES[entity]
+    return [name_column, *detail_columns, *(["email"] if alias_source == "email" and "email" not in detail_columns else [])]
+
+
+autocomplete_index = AutocompleteIndex()
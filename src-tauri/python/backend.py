@@ -3,21 +3,49 @@ FastAPI backend for CRM application
 Provides REST API endpoints for Tauri frontend
 """
 
-from fastapi import FastAPI, HTTPException
+import time
+
+IMPORT_STARTED = time.perf_counter()  # Taken before the FastAPI/SQLAlchemy imports (see /ready)
+
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, FileResponse, Response, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from typing import List, Optional
+from sqlalchemy import select
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+import asyncio
+import json
 import os
+import threading
 
 from database import (
     LP, GP, Person, Note, Todo, Distributor, Fund, Roadshow,
     GPLPLink, GPPersonLink, LPPersonLink, DistributorPersonLink,
     NoteLPLink, NoteGPLink, NoteFundLink, NoteRoadshowLink,
-    FundLPInterest, RoadshowLPStatus,
-    get_session, create_db_and_tables
+    FundLPInterest, RoadshowLPStatus, ProcessingJob, Attachment,
+    engine, get_session, create_db_and_tables
 )
+from job_queue import job_queue, JOB_TYPES, FINISHED_STATUSES
+from attachment_store import attachment_store, attachment_ref, import_flight_images, AttachmentTooLarge
+from migrate_flight_images import migrate_flight_images
+from migrate_row_versions import migrate_row_versions
+from note_images import sync_note_images, images_for_notes, backfill_note_images
+from facet_index import backfill_facet_values
+from row_updates import update_row, VersionConflict
+from image_service import image_service, IMAGES_DIR, RENDITION_SIZES
+import dedup
+import query_engine
+import json_patch
+import batch
+import funnel_updates
+import funnel_analytics
+from autocomplete import autocomplete_index, ENTITIES as AUTOCOMPLETE_ENTITIES
+from response_cache import response_cache
+from change_feed import change_feed
+from instrumentation import InstrumentationMiddleware, instrument_engine, metrics
 
 app = FastAPI(title="CRM Backend API")
 
@@ -28,17 +56,88 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Query-Count"],
 )
 
-# Mount static files directory for notion images
-IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "notion_images")
+# Per-route latency and per-request query counts (see /metrics)
+app.add_middleware(InstrumentationMiddleware)
+instrument_engine(engine)
+
+# Mount static files directory for notion images (originals; see /renditions for resized copies)
 if os.path.exists(IMAGES_DIR):
     app.mount("/images", StaticFiles(directory=IMAGES_DIR), name="images")
 
+
+def get_note_index():
+    """Shared semantic note index; semantic_search (numpy) is imported on first use"""
+    from semantic_search import note_index
+    return note_index
+
+
+# Set once the startup event has finished; /ready reports it
+startup_state = {"ready": False, "import_seconds": None, "startup_seconds": None}
+
+
+def update_or_raise(session, model, row_id: int, values: dict, label: str):
+    """
+    Partial update in one UPDATE ... RETURNING (see row_updates.py); caller commits
+
+    A "version" in values is the version the client edited: 409 with the
+    stored record if it has moved on since, 404 if the row doesn't exist.
+    """
+    expected_version = values.pop("version", None)
+    try:
+        record = update_row(session, model, row_id, values, expected_version)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail={
+            "message": f"{label} was changed elsewhere (now version {e.current.version})",
+            "current": jsonable_encoder(e.current)
+        })
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    return record
+
+
+def search_by_name(model, entity: str, q: str, limit: int = 10) -> list:
+    """Records for the best autocomplete matches of one entity type, best first"""
+    ids = autocomplete_index.ids(q, entity, limit)
+    if not ids:
+        return []
+    with get_session() as session:
+        records = {record.id: record for record in session.query(model).filter(model.id.in_(ids))}
+        return [records[record_id] for record_id in ids if record_id in records]
+
+
 # Startup event
 @app.on_event("startup")
 async def startup():
+    imported = time.perf_counter()
     create_db_and_tables()
+    migrate_row_versions()
+    migrate_flight_images()
+    create_db_and_tables()  # No-op unless indexes were skipped for columns the migrations just added
+    # Repairs missing FacetValue rows (old databases, unhooked writers); view filters depend on it, so not threaded
+    backfill_facet_values()
+    # Hashing existing note images can take a while; don't block startup on it
+    threading.Thread(target=backfill_note_images, name="note-image-backfill", daemon=True).start()
+    job_queue.start()
+    # Importing numpy and loading the vectors also happens off the startup path
+    threading.Thread(target=lambda: get_note_index().start(), name="note-index-start", daemon=True).start()
+    # Type-ahead lookups before it's built load what they need themselves
+    threading.Thread(target=autocomplete_index.load, name="autocomplete-index", daemon=True).start()
+
+    startup_state.update(
+        ready=True,
+        import_seconds=round(imported - IMPORT_STARTED, 3),
+        startup_seconds=round(time.perf_counter() - IMPORT_STARTED, 3)
+    )
+    print(f"Backend ready in {startup_state['startup_seconds']:.2f}s (imports {startup_state['import_seconds']:.2f}s)")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    job_queue.stop()
+    get_note_index().stop()
 
 
 # Health check
@@ -47,13 +146,48 @@ async def health_check():
     return {"status": "ok", "timestamp": datetime.now().isoformat()}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """503 until startup has finished and the database answers; launchers poll this"""
+    if not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Starting up")
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e}")
+    return {
+        "status": "ready",
+        "import_seconds": startup_state["import_seconds"],
+        "startup_seconds": startup_state["startup_seconds"]
+    }
+
+
+# Metrics
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request latency, SQL query and response cache metrics in Prometheus text format"""
+    return PlainTextResponse(
+        metrics.render_prometheus() + response_cache.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/metrics/slow-queries")
+async def get_slow_queries():
+    """Recent slow SQL queries with their query plans, newest first"""
+    return list(reversed(metrics.slow_queries))
+
+
 # LP endpoints
 @app.get("/lps", response_model=List[LP])
 async def get_lps():
     """Get all LPs"""
-    with get_session() as session:
-        lps = session.query(LP).all()
-        return lps
+    def load():
+        with get_session() as session:
+            return session.query(LP).all()
+
+    return await response_cache.get_or_compute("lps", (), ("lp",), load)
 
 
 @app.post("/lps", response_model=LP)
@@ -70,18 +204,8 @@ async def create_lp(lp: LP):
 async def update_lp(lp_id: int, lp_update: LP):
     """Update LP"""
     with get_session() as session:
-        lp = session.get(LP, lp_id)
-        if not lp:
-            raise HTTPException(status_code=404, detail="LP not found")
-
-        # Update fields
-        for key, value in lp_update.dict(exclude_unset=True).items():
-            if key != "id":  # Don't update the ID
-                setattr(lp, key, value)
-
-        session.add(lp)
+        lp = update_or_raise(session, LP, lp_id, lp_update.dict(exclude_unset=True), "LP")
         session.commit()
-        session.refresh(lp)
         return lp
 
 
@@ -99,21 +223,19 @@ async def delete_lp(lp_id: int):
 
 @app.get("/lps/search", response_model=List[LP])
 async def search_lps(q: str = ""):
-    """Search LPs by name"""
-    with get_session() as session:
-        if not q or len(q.strip()) == 0:
-            return []
-        query = session.query(LP).filter(LP.name.ilike(f"%{q}%")).limit(10)
-        return query.all()
+    """Search LPs by name (ranked, see /autocomplete)"""
+    return search_by_name(LP, "lp", q)
 
 
 # GP endpoints
 @app.get("/gps", response_model=List[GP])
 async def get_gps():
     """Get all GPs"""
-    with get_session() as session:
-        gps = session.query(GP).all()
-        return gps
+    def load():
+        with get_session() as session:
+            return session.query(GP).all()
+
+    return await response_cache.get_or_compute("gps", (), ("gp",), load)
 
 
 @app.post("/gps", response_model=GP)
@@ -130,18 +252,8 @@ async def create_gp(gp: GP):
 async def update_gp(gp_id: int, gp_update: GP):
     """Update GP"""
     with get_session() as session:
-        gp = session.get(GP, gp_id)
-        if not gp:
-            raise HTTPException(status_code=404, detail="GP not found")
-
-        # Update fields
-        for key, value in gp_update.dict(exclude_unset=True).items():
-            if key != "id":  # Don't update the ID
-                setattr(gp, key, value)
-
-        session.add(gp)
+        gp = update_or_raise(session, GP, gp_id, gp_update.dict(exclude_unset=True), "GP")
         session.commit()
-        session.refresh(gp)
         return gp
 
 @app.delete("/gps/{gp_id}")
@@ -158,12 +270,8 @@ async def delete_gp(gp_id: int):
 
 @app.get("/gps/search", response_model=List[GP])
 async def search_gps(q: str = ""):
-    """Search GPs by name"""
-    with get_session() as session:
-        if not q or len(q.strip()) == 0:
-            return []
-        query = session.query(GP).filter(GP.name.ilike(f"%{q}%")).limit(10)
-        return query.all()
+    """Search GPs by name (ranked, see /autocomplete)"""
+    return search_by_name(GP, "gp", q)
 
 
 # Distributor endpoints
@@ -189,18 +297,8 @@ async def create_distributor(distributor: Distributor):
 async def update_distributor(distributor_id: int, distributor_update: Distributor):
     """Update distributor"""
     with get_session() as session:
-        distributor = session.get(Distributor, distributor_id)
-        if not distributor:
-            raise HTTPException(status_code=404, detail="Distributor not found")
-
-        # Update fields
-        for key, value in distributor_update.dict(exclude_unset=True).items():
-            if key != "id":  # Don't update the ID
-                setattr(distributor, key, value)
-
-        session.add(distributor)
+        distributor = update_or_raise(session, Distributor, distributor_id, distributor_update.dict(exclude_unset=True), "Distributor")
         session.commit()
-        session.refresh(distributor)
         return distributor
 
 
@@ -208,9 +306,11 @@ async def update_distributor(distributor_id: int, distributor_update: Distributo
 @app.get("/funds", response_model=List[Fund])
 async def get_funds():
     """Get all funds"""
-    with get_session() as session:
-        funds = session.query(Fund).order_by(Fund.fund_name).all()
-        return funds
+    def load():
+        with get_session() as session:
+            return session.query(Fund).order_by(Fund.fund_name).all()
+
+    return await response_cache.get_or_compute("funds", (), ("fund",), load)
 
 
 @app.post("/funds", response_model=Fund)
@@ -239,12 +339,8 @@ async def create_fund(fund: Fund):
 
 @app.get("/funds/search", response_model=List[Fund])
 async def search_funds(q: str = ""):
-    """Search funds by name"""
-    with get_session() as session:
-        if not q or len(q.strip()) == 0:
-            return []
-        query = session.query(Fund).filter(Fund.fund_name.ilike(f"%{q}%")).limit(10)
-        return query.all()
+    """Search funds by name (ranked, see /autocomplete)"""
+    return search_by_name(Fund, "fund", q)
 
 
 @app.get("/funds/{fund_id}/notes")
@@ -265,28 +361,22 @@ async def get_fund_notes(fund_id: int):
 @app.put("/funds/{fund_id}")
 async def update_fund(fund_id: int, fund_update: Fund):
     """Update fund"""
-    with get_session() as session:
-        fund = session.get(Fund, fund_id)
-        if not fund:
-            raise HTTPException(status_code=404, detail="Fund not found")
-
-        # Update fields
-        for key, value in fund_update.dict(exclude_unset=True).items():
-            if key != 'id' and hasattr(fund, key):
-                # Convert date strings and empty strings to proper datetime objects or None
-                if key in ['launch', 'final_close', 'roadshow_date']:
-                    if value == '' or value is None:
-                        value = None
-                    elif isinstance(value, str):
-                        try:
-                            from datetime import datetime
-                            value = datetime.fromisoformat(value)
-                        except (ValueError, AttributeError):
-                            value = None
-                setattr(fund, key, value)
+    update_dict = fund_update.dict(exclude_unset=True)
+    for key in ['launch', 'final_close', 'roadshow_date']:
+        # Convert date strings and empty strings to proper datetime objects or None
+        if key in update_dict:
+            value = update_dict[key]
+            if value == '' or value is None:
+                update_dict[key] = None
+            elif isinstance(value, str):
+                try:
+                    update_dict[key] = datetime.fromisoformat(value)
+                except (ValueError, AttributeError):
+                    update_dict[key] = None
 
+    with get_session() as session:
+        fund = update_or_raise(session, Fund, fund_id, update_dict, "Fund")
         session.commit()
-        session.refresh(fund)
         return fund
 
 
@@ -294,9 +384,11 @@ async def update_fund(fund_id: int, fund_update: Fund):
 @app.get("/people", response_model=List[Person])
 async def get_people():
     """Get all people"""
-    with get_session() as session:
-        people = session.query(Person).all()
-        return people
+    def load():
+        with get_session() as session:
+            return session.query(Person).all()
+
+    return await response_cache.get_or_compute("people", (), ("person",), load)
 
 
 @app.post("/people", response_model=Person)
@@ -313,29 +405,15 @@ async def create_person(person: Person):
 async def update_person(person_id: int, person_update: Person):
     """Update person"""
     with get_session() as session:
-        person = session.get(Person, person_id)
-        if not person:
-            raise HTTPException(status_code=404, detail="Person not found")
-
-        # Update fields
-        for key, value in person_update.dict(exclude_unset=True).items():
-            if key != "id":  # Don't update the ID
-                setattr(person, key, value)
-
-        session.add(person)
+        person = update_or_raise(session, Person, person_id, person_update.dict(exclude_unset=True), "Person")
         session.commit()
-        session.refresh(person)
         return person
 
 
 @app.get("/people/search", response_model=List[Person])
 async def search_people(q: str = ""):
-    """Search people by name"""
-    with get_session() as session:
-        if not q or len(q.strip()) == 0:
-            return []
-        query = session.query(Person).filter(Person.name.ilike(f"%{q}%")).limit(10)
-        return query.all()
+    """Search people by name (ranked, see /autocomplete)"""
+    return search_by_name(Person, "person", q)
 
 
 # Note endpoints
@@ -347,6 +425,69 @@ async def get_notes():
         return notes
 
 
+@app.get("/notes/images")
+async def get_images_for_notes(ids: str):
+    """Get images for many notes at once (ids is a comma-separated list), keyed by note id"""
+    try:
+        note_ids = [int(note_id) for note_id in ids.split(",") if note_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+
+    with get_session() as session:
+        return images_for_notes(session, note_ids)
+
+
+@app.get("/autocomplete")
+async def autocomplete_search(q: str = "", types: Optional[List[str]] = Query(None), limit: int = 10):
+    """
+    Type-ahead matches across LPs, GPs, people, funds and distributors, from
+    the in-memory index (see autocomplete.py)
+
+    Args:
+        q: What the user has typed so far
+        types: Entity types to search (repeat the parameter; default all)
+        limit: Maximum number of matches (1-50)
+
+    Returns:
+        [{entity, id, label, detail, match}], best first; match is exact,
+        prefix, word_prefix, alias or infix
+    """
+    unknown = set(types or ()) - set(AUTOCOMPLETE_ENTITIES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+    return autocomplete_index.search(q, types, max(1, min(limit, 50)))
+
+
+@app.get("/notes/semantic-search")
+async def semantic_search_notes(q: str = "", k: int = 10):
+    """Find notes by meaning (top-k cosine similarity over note embeddings)"""
+    if not q.strip():
+        return []
+
+    # May wait on Ollama to embed the query; keep the event loop free for other requests
+    matches = await asyncio.to_thread(get_note_index().search, q, max(1, min(k, 100)))
+    if not matches:
+        return []
+
+    with get_session() as session:
+        notes = {
+            note.id: note
+            for note in session.query(Note).filter(Note.id.in_([note_id for note_id, _ in matches])).all()
+        }
+
+    return [
+        {
+            "note_id": note_id,
+            "score": score,
+            "name": notes[note_id].name,
+            "date": notes[note_id].date.isoformat() if notes[note_id].date else None,
+            "summary": notes[note_id].summary,
+        }
+        for note_id, score in matches
+        if note_id in notes
+    ]
+
+
 @app.get("/notes/{note_id}", response_model=Note)
 async def get_note(note_id: int):
     """Get specific note"""
@@ -443,36 +584,109 @@ async def create_note(note: Note):
                 note.date = None
 
         session.add(note)
+        session.flush()
+        sync_note_images(session, note)
         session.commit()
         session.refresh(note)
+        get_note_index().schedule([note.id])
         return note
 
 
 @app.put("/notes/{note_id}", response_model=Note)
 async def update_note(note_id: int, note_update: Note):
     """Update existing note"""
+    update_dict = note_update.dict(exclude_unset=True)
+
+    # Convert string date to datetime if needed
+    if 'date' in update_dict and isinstance(update_dict['date'], str):
+        try:
+            update_dict['date'] = datetime.fromisoformat(update_dict['date'])
+        except (ValueError, AttributeError):
+            update_dict['date'] = None
+
     with get_session() as session:
-        note = session.get(Note, note_id)
-        if not note:
-            raise HTTPException(status_code=404, detail="Note not found")
+        note = update_or_raise(session, Note, note_id, update_dict, "Note")
+
+        if {'content_json', 'raw_notes', 'image_paths'} & update_dict.keys():
+            # Image indexing needs the ORM object; only content edits pay for the extra read
+            note = session.get(Note, note_id)
+            sync_note_images(session, note)
+            session.commit()
+            session.refresh(note)
+        else:
+            session.commit()
+        get_note_index().schedule([note.id])
+        return note
 
-        # Update fields
-        update_dict = note_update.dict(exclude_unset=True)
 
-        # Convert string date to datetime if needed
-        if 'date' in update_dict and isinstance(update_dict['date'], str):
-            try:
-                update_dict['date'] = datetime.fromisoformat(update_dict['date'])
-            except (ValueError, AttributeError):
-                update_dict['date'] = None
+class NotePatch(BaseModel):
+    ops: List[Dict[str, Any]]  # JSON Patch operations plus "splice" (see json_patch.py)
+    version: Optional[int] = None  # Version the ops were made against
 
-        for key, value in update_dict.items():
-            setattr(note, key, value)
 
-        session.add(note)
+# Columns a patch may not touch; content_json paths descend into the block tree
+NOTE_PATCH_PROTECTED = {"id", "version", "notion_id", "image_paths"}
+NOTE_JSON_FIELDS = {"content_json"}
+
+
+@app.patch("/notes/{note_id}")
+async def patch_note(note_id: int, patch: NotePatch):
+    """
+    Apply edit operations to a note server-side (autosave of long notes)
+
+    Only the columns the ops touch are read and only the ones that changed
+    are written, so typing into a long note sends and stores a few bytes
+    instead of the whole body. Returns the new version, not the note.
+    """
+    try:
+        fields = json_patch.touched_fields(patch.ops)
+    except json_patch.PatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    table = Note.__table__
+    unknown = {field for field in fields if field not in table.c or field in NOTE_PATCH_PROTECTED}
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot patch: {', '.join(sorted(unknown))}")
+
+    with get_session() as session:
+        row = session.execute(
+            select(table.c.version, *[table.c[field] for field in fields]).where(table.c.id == note_id)
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Note not found")
+        values = dict(row._mapping)
+        version = values.pop("version")
+
+        # Offsets in the ops are relative to the client's copy, so it must be current
+        if patch.version is not None and patch.version != version:
+            raise HTTPException(status_code=409, detail={
+                "message": f"Note was changed elsewhere (now version {version})",
+                "current": jsonable_encoder(session.get(Note, note_id))
+            })
+        try:
+            changes = json_patch.apply_field_patch(values, patch.ops, NOTE_JSON_FIELDS)
+        except json_patch.PatchTestFailed as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except json_patch.PatchError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not changes:
+            return {"id": note_id, "version": version, "changed": []}
+
+        if isinstance(changes.get("date"), str):
+            try:
+                changes["date"] = datetime.fromisoformat(changes["date"])
+            except ValueError:
+                raise HTTPException(status_code=400, detail="date must be an ISO date")
+
+        # Conditional on the version just read, so a concurrent save can't slip in between
+        note = update_or_raise(session, Note, note_id, {**changes, "version": version}, "Note")
+        # Plain-text raw_notes (the editor's autosave) has no image blocks to index
+        block_texts = [values.get("raw_notes"), changes.get("raw_notes")] if "raw_notes" in changes else []
+        if "content_json" in changes or any(text and text.lstrip().startswith("[") for text in block_texts):
+            note = session.get(Note, note_id)
+            sync_note_images(session, note)
         session.commit()
-        session.refresh(note)
-        return note
+        get_note_index().schedule([note_id])
+        return {"id": note_id, "version": note.version, "changed": sorted(changes)}
 
 
 @app.post("/notes/{note_id}/relationships")
@@ -541,19 +755,139 @@ async def create_todo(todo: Todo):
 async def update_todo(todo_id: int, todo_update: Todo):
     """Update todo (e.g., mark as completed)"""
     with get_session() as session:
-        todo = session.get(Todo, todo_id)
-        if not todo:
-            raise HTTPException(status_code=404, detail="Todo not found")
-
-        for key, value in todo_update.dict(exclude_unset=True).items():
-            setattr(todo, key, value)
-
-        session.add(todo)
+        todo = update_or_raise(session, Todo, todo_id, todo_update.dict(exclude_unset=True), "Todo")
         session.commit()
-        session.refresh(todo)
         return todo
 
 
+# Processing job endpoints (transcription / summarization)
+class JobRequest(BaseModel):
+    job_type: str = "process"  # transcribe, summarize, process
+
+
+@app.post("/notes/{note_id}/jobs", response_model=ProcessingJob)
+async def enqueue_note_job(note_id: int, request: JobRequest):
+    """Queue a transcription/summarization job for a note"""
+    if request.job_type not in JOB_TYPES:
+        raise HTTPException(status_code=400, detail=f"job_type must be one of {', '.join(JOB_TYPES)}")
+
+    with get_session() as session:
+        if not session.get(Note, note_id):
+            raise HTTPException(status_code=404, detail="Note not found")
+
+    return job_queue.enqueue(note_id, request.job_type)
+
+
+@app.get("/notes/{note_id}/jobs", response_model=List[ProcessingJob])
+async def get_note_jobs(note_id: int):
+    """Get all jobs for a note, newest first"""
+    return job_queue.list_for_note(note_id)
+
+
+@app.get("/jobs/{job_id}", response_model=ProcessingJob)
+async def get_job(job_id: int):
+    """Get job status and progress"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: int):
+    """Stream job progress as Server-Sent Events until the job finishes"""
+    if not job_queue.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_payload = None
+        while True:
+            job = job_queue.get(job_id)
+            payload = json.dumps(jsonable_encoder(job))
+            if payload != last_payload:
+                yield f"data: {payload}\n\n"
+                last_payload = payload
+            if job.status in FINISHED_STATUSES:
+                break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.get("/notes/{note_id}/summary/stream")
+async def stream_note_summary(note_id: int):
+    """Stream the note's summary as it is generated (SSE: token events, then a done event)"""
+    job = job_queue.active_summary_job(note_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No summarization job for this note")
+    job_id = job.id
+
+    async def event_stream():
+        sent = 0
+        while True:
+            job = job_queue.get(job_id)
+            text = job_queue.partial_output(job_id)
+            if len(text) > sent:
+                yield f"event: token\ndata: {json.dumps({'text': text[sent:]})}\n\n"
+                sent = len(text)
+            if job.status in FINISHED_STATUSES:
+                yield f"event: done\ndata: {json.dumps(jsonable_encoder(job))}\n\n"
+                break
+            await asyncio.sleep(0.1)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/jobs/{job_id}/cancel", response_model=ProcessingJob)
+async def cancel_job(job_id: int):
+    """Cancel a queued or running job"""
+    job = job_queue.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# Change feed endpoints
+CHANGE_POLL_SECONDS = 0.25  # In-memory check; how quickly other views see a save
+
+
+@app.get("/changes")
+async def stream_changes(request: Request, since: Optional[str] = None):
+    """
+    Stream committed changes as Server-Sent Events (see change_feed.py)
+
+    The first event ("ready") carries the current resume token; every change
+    event's id is a token too. Reconnecting with Last-Event-ID (EventSource
+    does this itself) or ?since=<token> continues after it, or sends "reset"
+    if those changes are no longer available, in which case the client
+    should refetch what it shows.
+    """
+    token = request.headers.get("last-event-id") or since
+    cursor = change_feed.resume_from(token) if token else None
+
+    async def event_stream():
+        nonlocal cursor
+        if cursor is None:
+            cursor = change_feed.last_seq
+            if token:
+                yield f"event: reset\ndata: {json.dumps({'token': change_feed.token(cursor)})}\n\n"
+        yield f"event: ready\nid: {change_feed.token(cursor)}\ndata: {json.dumps({'token': change_feed.token(cursor)})}\n\n"
+
+        idle = 0.0
+        while not await request.is_disconnected():
+            events = change_feed.after(cursor)
+            for change in events:
+                yield f"id: {change_feed.token(change['seq'])}\ndata: {json.dumps(change)}\n\n"
+                cursor = change["seq"]
+            idle = 0.0 if events else idle + CHANGE_POLL_SECONDS
+            if idle >= 15:
+                yield ": keepalive\n\n"  # Keeps proxies and the webview from timing the stream out
+                idle = 0.0
+            await asyncio.sleep(CHANGE_POLL_SECONDS)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 # Relationship endpoints
 @app.get("/gps/{gp_id}/people")
 async def get_gp_people(gp_id: int):
@@ -678,9 +1012,21 @@ async def get_gp_tasks(gp_id: int):
 
 
 # Sales Funnel endpoints
+# Tables the funnel responses read (their cache entries go stale when any of them is written)
+SALES_FUNNEL_TABLES = ("lp", "fundlpinterest", "note", "notelplink", "notefundlink")
+ROADSHOW_FUNNEL_TABLES = ("roadshow", "lp", "roadshowlpstatus", "note", "notelplink", "noteroadshowlink")
+
+
 @app.get("/funds/{fund_id}/sales-funnel")
 async def get_fund_sales_funnel(fund_id: int):
     """Get sales funnel for a fund with all LPs and their interest levels"""
+    return await response_cache.get_or_compute(
+        "sales_funnel", (fund_id,), SALES_FUNNEL_TABLES, lambda: build_sales_funnel(fund_id)
+    )
+
+
+def build_sales_funnel(fund_id: int) -> List[dict]:
+    """Every LP with its interest in the fund and the latest note shared with it"""
     with get_session() as session:
         # Get all LPs
         all_lps = session.query(LP).all()
@@ -693,26 +1039,16 @@ async def get_fund_sales_funnel(fund_id: int):
         # Create a map of lp_id -> interest data
         interest_map = {record.lp_id: record for record in interest_records}
 
+        # Most recent note related to BOTH each LP and this fund (one query for all LPs)
+        contacts = funnel_updates.latest_contacts(session, "fund", fund_id)
+
         # Build the sales funnel data
         result = []
         for lp in all_lps:
             interest_data = interest_map.get(lp.id)
 
-            # Find the most recent note related to BOTH this LP and this fund
-            # If no such note exists, leave the fields empty (None)
-            latest_note = (
-                session.query(Note)
-                .join(NoteLPLink, Note.id == NoteLPLink.note_id)
-                .join(NoteFundLink, Note.id == NoteFundLink.note_id)
-                .filter(NoteLPLink.lp_id == lp.id)
-                .filter(NoteFundLink.fund_id == fund_id)
-                .order_by(Note.date.desc())
-                .first()
-            )
-
-            # Extract note info (will be None if no note found)
-            last_contact_date = latest_note.date if latest_note else None
-            latest_note_id = latest_note.id if latest_note else None
+            # Extract note info (None if no note links both)
+            last_contact_date, latest_note_id = contacts.get(lp.id, (None, None))
 
             # Determine interest level
             interest_level = interest_data.interest if interest_data else "inactive"
@@ -739,64 +1075,82 @@ async def get_fund_sales_funnel(fund_id: int):
         return result
 
 
-@app.put("/funds/{fund_id}/lps/{lp_id}/interest")
-async def update_lp_interest(fund_id: int, lp_id: int, interest: str):
-    """Update LP interest level for a fund"""
+@app.get("/funnel/analytics")
+async def get_funnel_analytics(
+    fund_ids: Optional[List[int]] = Query(None),
+    window_days: int = 30,
+    windows: int = 6,
+    until: Optional[datetime] = None
+):
+    """
+    Portfolio sales funnel: per-fund stage counts, ticket sums and weighted
+    pipeline value, plus stage conversion rates per time window
+
+    Args:
+        fund_ids: Funds to include (repeat the parameter; default all)
+        window_days, windows: Conversion windows, the last one ending at until (default now)
+    """
+    if window_days < 1 or not 1 <= windows <= 120:
+        raise HTTPException(status_code=400, detail="window_days must be >= 1 and windows between 1 and 120")
     with get_session() as session:
-        # Check if record exists
-        record = session.query(FundLPInterest).filter(
-            FundLPInterest.fund_id == fund_id,
-            FundLPInterest.lp_id == lp_id
-        ).first()
+        return {
+            **funnel_analytics.stage_summary(session, fund_ids),
+            "stages": funnel_analytics.STAGES,
+            "conversion": funnel_analytics.conversion_rates(session, fund_ids, window_days, windows, until),
+        }
 
-        if record:
-            # Update existing record
-            record.interest = interest
-        else:
-            # Create new record
-            record = FundLPInterest(fund_id=fund_id, lp_id=lp_id, interest=interest)
-            session.add(record)
 
-        # Update last_contact_date by finding the latest note related to both fund and LP
-        # Get notes that are linked to both the fund and the LP
-        fund_note_ids = session.query(NoteFundLink.note_id).filter(
-            NoteFundLink.fund_id == fund_id
-        ).all()
-        fund_note_ids = [nid[0] for nid in fund_note_ids]
+def set_funnel_stages(funnel: str, owner_model, owner_id: int, stages: Dict[int, str]) -> list:
+    """Upsert LP stages in a fund/roadshow funnel; 404 if the fund/roadshow or an LP doesn't exist"""
+    with get_session() as session:
+        if not session.get(owner_model, owner_id):
+            raise HTTPException(status_code=404, detail=f"{owner_model.__name__} not found")
+        found = set(session.execute(select(LP.id).where(LP.id.in_(list(stages)))).scalars())
+        missing = [lp_id for lp_id in stages if lp_id not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"LPs not found: {missing}")
+        records = funnel_updates.set_stages(session, funnel, owner_id, stages)
+        session.commit()
+        return records
 
-        lp_note_ids = session.query(NoteLPLink.note_id).filter(
-            NoteLPLink.lp_id == lp_id
-        ).all()
-        lp_note_ids = [nid[0] for nid in lp_note_ids]
 
-        # Find common note IDs
-        common_note_ids = list(set(fund_note_ids) & set(lp_note_ids))
+class LPInterestUpdate(BaseModel):
+    lp_id: int
+    interest: str
 
-        if common_note_ids:
-            # Get the latest note
-            latest_note = session.query(Note).filter(
-                Note.id.in_(common_note_ids)
-            ).order_by(Note.date.desc()).first()
 
-            if latest_note:
-                record.last_contact_date = latest_note.date
-                record.latest_note_id = latest_note.id
+@app.put("/funds/{fund_id}/lps/{lp_id}/interest")
+async def update_lp_interest(fund_id: int, lp_id: int, interest: str):
+    """Update LP interest level for a fund"""
+    return set_funnel_stages("fund", Fund, fund_id, {lp_id: interest})[0]
+
 
-        session.commit()
-        session.refresh(record)
-        return record
+@app.put("/funds/{fund_id}/lps/interest")
+async def update_lp_interests(fund_id: int, updates: List[LPInterestUpdate]):
+    """Update the interest level of many LPs for a fund at once (e.g. all invited to a roadshow)"""
+    return set_funnel_stages("fund", Fund, fund_id, {u.lp_id: u.interest for u in updates})
 
 
 # Roadshow endpoints
-@app.get("/roadshows", response_model=List[Roadshow])
+def roadshow_with_attachments(roadshow: Roadshow, attachments: List[Attachment]) -> dict:
+    """Roadshow fields plus attachment references (file bodies are fetched separately)"""
+    data = roadshow.dict(exclude={"flight_images"})
+    data["attachments"] = [attachment_ref(a) for a in attachments]
+    return data
+
+
+@app.get("/roadshows")
 async def get_roadshows():
-    """Get all roadshows"""
+    """Get all roadshows with their attachment references"""
     with get_session() as session:
         roadshows = session.query(Roadshow).all()
-        return roadshows
+        by_roadshow = {}
+        for attachment in session.query(Attachment).order_by(Attachment.id).all():
+            by_roadshow.setdefault(attachment.roadshow_id, []).append(attachment)
+        return [roadshow_with_attachments(r, by_roadshow.get(r.id, [])) for r in roadshows]
 
 
-@app.post("/roadshows", response_model=Roadshow)
+@app.post("/roadshows")
 async def create_roadshow(roadshow_data: dict):
     """Create new roadshow"""
     from datetime import datetime
@@ -815,12 +1169,19 @@ async def create_roadshow(roadshow_data: dict):
             if isinstance(roadshow_data['departure'], str):
                 roadshow_data['departure'] = datetime.fromisoformat(roadshow_data['departure'].replace('Z', '+00:00'))
 
+        # Inline images from older clients go to the attachment store
+        flight_images = roadshow_data.pop('flight_images', None)
+
         # Create roadshow object
         roadshow = Roadshow(**roadshow_data)
         session.add(roadshow)
         session.commit()
         session.refresh(roadshow)
 
+        if flight_images:
+            import_flight_images(session, attachment_store, roadshow.id, flight_images)
+            session.commit()
+
         # Update fund.roadshow_date if arrival is set
         if roadshow.arrival and roadshow.fund_id:
             fund = session.get(Fund, roadshow.fund_id)
@@ -828,7 +1189,8 @@ async def create_roadshow(roadshow_data: dict):
                 fund.roadshow_date = roadshow.arrival
                 session.commit()
 
-        return roadshow
+        attachments = session.query(Attachment).filter(Attachment.roadshow_id == roadshow.id).order_by(Attachment.id).all()
+        return roadshow_with_attachments(roadshow, attachments)
 
 
 @app.put("/roadshows/{roadshow_id}")
@@ -837,10 +1199,6 @@ async def update_roadshow(roadshow_id: int, roadshow_update: dict):
     from datetime import datetime
 
     with get_session() as session:
-        roadshow = session.get(Roadshow, roadshow_id)
-        if not roadshow:
-            raise HTTPException(status_code=404, detail="Roadshow not found")
-
         # Convert date strings to datetime objects
         if 'arrival' in roadshow_update and roadshow_update['arrival']:
             if isinstance(roadshow_update['arrival'], str):
@@ -854,22 +1212,30 @@ async def update_roadshow(roadshow_id: int, roadshow_update: dict):
             if isinstance(roadshow_update['departure'], str):
                 roadshow_update['departure'] = datetime.fromisoformat(roadshow_update['departure'].replace('Z', '+00:00'))
 
-        # Update fields
-        for key, value in roadshow_update.items():
-            if key != 'id' and hasattr(roadshow, key):
-                setattr(roadshow, key, value)
+        replace_images = 'flight_images' in roadshow_update
+        flight_images = roadshow_update.pop('flight_images', None)
+        roadshow = update_or_raise(session, Roadshow, roadshow_id, roadshow_update, "Roadshow")
 
-        session.commit()
-        session.refresh(roadshow)
+        # Inline images from older clients replace the roadshow's attachments
+        if replace_images:
+            old_attachments = session.query(Attachment).filter(Attachment.roadshow_id == roadshow_id).all()
+            for attachment in old_attachments:
+                session.delete(attachment)
+            session.flush()
+            import_flight_images(session, attachment_store, roadshow_id, flight_images)
+            for attachment in old_attachments:
+                attachment_store.delete_if_unreferenced(session, attachment.content_hash)
 
         # Update fund.roadshow_date if arrival changed
         if roadshow.arrival and roadshow.fund_id:
             fund = session.get(Fund, roadshow.fund_id)
-            if fund:
+            if fund and fund.roadshow_date != roadshow.arrival:
                 fund.roadshow_date = roadshow.arrival
-                session.commit()
 
-        return roadshow
+        session.commit()
+
+        attachments = session.query(Attachment).filter(Attachment.roadshow_id == roadshow.id).order_by(Attachment.id).all()
+        return roadshow_with_attachments(roadshow, attachments)
 
 
 @app.delete("/roadshows/{roadshow_id}")
@@ -879,7 +1245,86 @@ async def delete_roadshow(roadshow_id: int):
         roadshow = session.get(Roadshow, roadshow_id)
         if not roadshow:
             raise HTTPException(status_code=404, detail="Roadshow not found")
+
+        attachments = session.query(Attachment).filter(Attachment.roadshow_id == roadshow_id).all()
+        for attachment in attachments:
+            session.delete(attachment)
         session.delete(roadshow)
+        session.flush()
+        for attachment in attachments:
+            attachment_store.delete_if_unreferenced(session, attachment.content_hash)
+
+        session.commit()
+        return {"status": "deleted"}
+
+
+# Roadshow attachment endpoints
+@app.get("/roadshows/{roadshow_id}/attachments")
+async def get_roadshow_attachments(roadshow_id: int):
+    """Get attachment references for a roadshow"""
+    with get_session() as session:
+        attachments = session.query(Attachment).filter(
+            Attachment.roadshow_id == roadshow_id
+        ).order_by(Attachment.id).all()
+        return [attachment_ref(a) for a in attachments]
+
+
+@app.post("/roadshows/{roadshow_id}/attachments")
+async def upload_roadshow_attachment(roadshow_id: int, file: UploadFile = File(...)):
+    """Upload a file (multipart form field "file") and attach it to a roadshow"""
+    with get_session() as session:
+        if not session.get(Roadshow, roadshow_id):
+            raise HTTPException(status_code=404, detail="Roadshow not found")
+
+    try:
+        content_hash, size = await asyncio.to_thread(attachment_store.save_stream, file.file)
+    except AttachmentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    with get_session() as session:
+        attachment = Attachment(
+            roadshow_id=roadshow_id,
+            content_hash=content_hash,
+            mime_type=file.content_type or "application/octet-stream",
+            size_bytes=size,
+            filename=file.filename
+        )
+        session.add(attachment)
+        session.commit()
+        session.refresh(attachment)
+        return attachment_ref(attachment)
+
+
+@app.get("/attachments/{attachment_id}")
+async def download_attachment(attachment_id: int):
+    """Stream an attachment's file"""
+    with get_session() as session:
+        attachment = session.get(Attachment, attachment_id)
+        if not attachment:
+            raise HTTPException(status_code=404, detail="Attachment not found")
+
+    path = attachment_store.path(attachment.content_hash)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Attachment file missing")
+
+    # Content-addressed, so the body behind this id never changes
+    return FileResponse(
+        path,
+        media_type=attachment.mime_type,
+        headers={"Cache-Control": "private, max-age=31536000, immutable", "ETag": f'"{attachment.content_hash}"'}
+    )
+
+
+@app.delete("/attachments/{attachment_id}")
+async def delete_attachment(attachment_id: int):
+    """Delete an attachment (the file is removed once nothing references it)"""
+    with get_session() as session:
+        attachment = session.get(Attachment, attachment_id)
+        if not attachment:
+            raise HTTPException(status_code=404, detail="Attachment not found")
+        session.delete(attachment)
+        session.flush()
+        attachment_store.delete_if_unreferenced(session, attachment.content_hash)
         session.commit()
         return {"status": "deleted"}
 
@@ -888,6 +1333,13 @@ async def delete_roadshow(roadshow_id: int):
 @app.get("/roadshows/{roadshow_id}/lp-status")
 async def get_roadshow_lp_status(roadshow_id: int):
     """Get LP status funnel for a specific roadshow"""
+    return await response_cache.get_or_compute(
+        "roadshow_funnel", (roadshow_id,), ROADSHOW_FUNNEL_TABLES, lambda: build_roadshow_funnel(roadshow_id)
+    )
+
+
+def build_roadshow_funnel(roadshow_id: int) -> List[dict]:
+    """Every LP with its status for the roadshow and the latest note shared with it"""
     with get_session() as session:
         # Get the roadshow
         roadshow = session.get(Roadshow, roadshow_id)
@@ -897,28 +1349,20 @@ async def get_roadshow_lp_status(roadshow_id: int):
         # Get all LPs
         lps = session.query(LP).all()
 
+        # Status records and latest shared notes for every LP at once
+        status_map = {
+            record.lp_id: record
+            for record in session.query(RoadshowLPStatus).filter(RoadshowLPStatus.roadshow_id == roadshow_id)
+        }
+        contacts = funnel_updates.latest_contacts(session, "roadshow", roadshow_id)
+
         result = []
         for lp in lps:
             # Check if there's a status record for this LP-Roadshow combo
-            status_data = session.query(RoadshowLPStatus).filter(
-                RoadshowLPStatus.roadshow_id == roadshow_id,
-                RoadshowLPStatus.lp_id == lp.id
-            ).first()
-
-            # Find the most recent note related to BOTH this LP and this roadshow
-            latest_note = (
-                session.query(Note)
-                .join(NoteLPLink, Note.id == NoteLPLink.note_id)
-                .join(NoteRoadshowLink, Note.id == NoteRoadshowLink.note_id)
-                .filter(NoteLPLink.lp_id == lp.id)
-                .filter(NoteRoadshowLink.roadshow_id == roadshow_id)
-                .order_by(Note.date.desc())
-                .first()
-            )
+            status_data = status_map.get(lp.id)
 
             # Extract note info
-            last_contact_date = latest_note.date if latest_note else None
-            latest_note_id = latest_note.id if latest_note else None
+            last_contact_date, latest_note_id = contacts.get(lp.id, (None, None))
 
             # Determine status
             status = status_data.status if status_data else "inactive"
@@ -945,53 +1389,192 @@ async def get_roadshow_lp_status(roadshow_id: int):
         return result
 
 
+class LPStatusUpdate(BaseModel):
+    lp_id: int
+    status: str
+
+
 @app.put("/roadshows/{roadshow_id}/lps/{lp_id}/status")
 async def update_lp_roadshow_status(roadshow_id: int, lp_id: int, status: str):
     """Update LP status for a roadshow"""
+    return set_funnel_stages("roadshow", Roadshow, roadshow_id, {lp_id: status})[0]
+
+
+@app.put("/roadshows/{roadshow_id}/lps/status")
+async def update_lp_roadshow_statuses(roadshow_id: int, updates: List[LPStatusUpdate]):
+    """Update the status of many LPs for a roadshow at once"""
+    return set_funnel_stages("roadshow", Roadshow, roadshow_id, {u.lp_id: u.status for u in updates})
+
+
+# Image rendition endpoints
+@app.get("/renditions/prewarm")
+async def get_rendition_prewarm_status():
+    """Get progress of the rendition pre-warm job"""
+    return image_service.prewarm_status
+
+
+@app.post("/renditions/prewarm")
+async def prewarm_renditions():
+    """Generate renditions for every note image in the background"""
+    started = image_service.start_prewarm()
+    return {"started": started, **image_service.prewarm_status}
+
+
+@app.get("/renditions/{size}/{filename}")
+async def get_image_rendition(size: str, filename: str, request: Request, v: Optional[str] = None):
+    """
+    Serve a resized WebP copy of a note image (generated on first request)
+
+    v is the source image's content hash (NoteImage.content_hash, or a prefix
+    of at least 8 characters). A URL carrying the current hash can be cached
+    forever; without it, or with an outdated one, clients revalidate by ETag
+    so an image replaced under the same name shows up.
+    """
+    if size not in RENDITION_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {', '.join(RENDITION_SIZES)}")
+
+    result = await asyncio.to_thread(image_service.rendition, filename, size)
+    if not result:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path, etag = result
+
+    digest = image_service.source_hash(image_service.source_path(filename))
+    if v and len(v) >= 8 and digest.startswith(v):
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "no-cache"
+    headers = {"Cache-Control": cache_control, "ETag": f'"{etag}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, headers=headers)
+
+
+# Duplicate detection endpoints
+class MergeRequest(BaseModel):
+    entity: str  # person, lp, gp, distributor
+    keep_id: int
+    merge_id: int
+
+
+@app.get("/duplicates")
+async def get_duplicates(entity: str, threshold: float = dedup.DEFAULT_THRESHOLD, limit: int = 100):
+    """Get likely duplicate pairs for review, best matches first"""
+    if entity not in dedup.ENTITIES:
+        raise HTTPException(status_code=400, detail=f"entity must be one of {', '.join(dedup.ENTITIES)}")
+    # Pure-Python scoring of every candidate pair; keep it off the event loop
+    return await asyncio.to_thread(dedup.find_duplicates, entity, threshold, limit)
+
+
+@app.post("/duplicates/merge")
+async def merge_duplicates(request: MergeRequest):
+    """Merge merge_id into keep_id, moving all relationships to the kept record"""
+    try:
+        kept = dedup.merge_entities(request.entity, request.keep_id, request.merge_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not kept:
+        raise HTTPException(status_code=404, detail="Record not found")
+    return kept
+
+
+# Database view queries (server-side filter/sort/page with facet counts)
+class SortKey(BaseModel):
+    field: str
+    dir: str = "asc"  # asc, desc
+
+
+class ViewQuery(BaseModel):
+    filter: Optional[dict] = None  # {"and": [{"field": "priority", "op": "in", "value": ["High"]}, ...]}
+    search: Optional[str] = None
+    sort: List[SortKey] = []
+    offset: int = 0
+    limit: int = query_engine.DEFAULT_LIMIT
+    facets: Optional[List[str]] = None  # None = the entity's default facets
+    fields: Optional[List[str]] = None  # None = all columns except large text
+
+
+def run_view_query(entity: str, query: ViewQuery):
     with get_session() as session:
-        # Check if record exists
-        record = session.query(RoadshowLPStatus).filter(
-            RoadshowLPStatus.roadshow_id == roadshow_id,
-            RoadshowLPStatus.lp_id == lp_id
-        ).first()
+        try:
+            return query_engine.run_query(session, entity, **query.dict())
+        except query_engine.QueryError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        if record:
-            # Update existing record
-            record.status = status
-        else:
-            # Create new record
-            record = RoadshowLPStatus(roadshow_id=roadshow_id, lp_id=lp_id, status=status)
-            session.add(record)
 
-        # Update last_contact_date by finding the latest note related to both roadshow and LP
-        roadshow_note_ids = session.query(NoteRoadshowLink.note_id).filter(
-            NoteRoadshowLink.roadshow_id == roadshow_id
-        ).all()
-        roadshow_note_ids = [nid[0] for nid in roadshow_note_ids]
+@app.post("/lps/query")
+async def query_lps(query: ViewQuery):
+    """Filtered, sorted page of LPs with facet counts"""
+    return run_view_query("lp", query)
 
-        lp_note_ids = session.query(NoteLPLink.note_id).filter(
-            NoteLPLink.lp_id == lp_id
-        ).all()
-        lp_note_ids = [nid[0] for nid in lp_note_ids]
 
-        # Find common note IDs
-        common_note_ids = list(set(roadshow_note_ids) & set(lp_note_ids))
+@app.post("/gps/query")
+async def query_gps(query: ViewQuery):
+    """Filtered, sorted page of GPs with facet counts"""
+    return run_view_query("gp", query)
 
-        if common_note_ids:
-            # Get the latest note
-            latest_note = session.query(Note).filter(
-                Note.id.in_(common_note_ids)
-            ).order_by(Note.date.desc()).first()
 
-            if latest_note:
-                record.last_contact_date = latest_note.date
-                record.latest_note_id = latest_note.id
+@app.post("/people/query")
+async def query_people(query: ViewQuery):
+    """Filtered, sorted page of people with facet counts"""
+    return run_view_query("person", query)
 
+
+@app.post("/funds/query")
+async def query_funds(query: ViewQuery):
+    """Filtered, sorted page of funds with facet counts"""
+    return run_view_query("fund", query)
+
+
+@app.post("/notes/query")
+async def query_notes(query: ViewQuery):
+    """Filtered, sorted page of notes (with related LP/GP/fund names) and facet counts"""
+    return run_view_query("note", query)
+
+
+@app.post("/distributors/query")
+async def query_distributors(query: ViewQuery):
+    """Filtered, sorted page of distributors with facet counts"""
+    return run_view_query("distributor", query)
+
+
+# Batch endpoint
+class BatchRequest(BaseModel):
+    operations: List[Dict[str, Any]]  # See batch.run_batch
+
+
+@app.post("/batch")
+async def run_batch(request: BatchRequest):
+    """
+    Run create/update/link operations in order in one transaction
+
+    Operations can reference records created earlier in the batch as "$<ref>"
+    (e.g. todos of a new note), so a meeting save is one round trip and one
+    commit. Any failure rolls back the whole batch; the error names the
+    failing operation's index (null if the batch itself is over the size limit).
+    """
+    with get_session() as session:
+        try:
+            outcome = batch.run_batch(session, request.operations)
+        except batch.BatchError as e:
+            raise HTTPException(status_code=400, detail={"index": e.index, "message": str(e)})
+        except VersionConflict as e:
+            raise HTTPException(status_code=409, detail={
+                "index": e.index,
+                "message": f"{type(e.current).__name__} was changed elsewhere (now version {e.current.version})",
+                "current": jsonable_encoder(e.current)
+            })
+
+        # Serialized before commit expires them (saves a refresh per created record)
+        for result in outcome["results"]:
+            if "record" in result:
+                result["record"] = jsonable_encoder(result["record"])
         session.commit()
-        session.refresh(record)
-        return record
+
+    if outcome["note_ids"]:
+        get_note_index().schedule(outcome["note_ids"])
+    return {"results": outcome["results"], "refs": outcome["refs"]}
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("CRM_PORT", "8000")))
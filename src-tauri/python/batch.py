@@ -0,0 +1,206 @@
+"""
+Transactional batches of create/update/link operations
+A meeting save (note, its links, its todos) runs as one request and one
+commit instead of a request and fsync per step. Later operations refer to
+records created earlier in the batch as "$<ref>"; if any operation fails the
+whole batch is rolled back.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import DateTime, delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.util import identity_key
+from sqlmodel import Session
+
+from database import (
+    LP, GP, Person, Note, Todo, Distributor, Fund,
+    GPLPLink, GPPersonLink, LPPersonLink, DistributorPersonLink,
+    NoteLPLink, NoteGPLink, NoteFundLink, NoteDistributorLink, NoteRoadshowLink
+)
+from note_images import sync_note_images
+from row_updates import update_row, VersionConflict
+
+MAX_OPERATIONS = 500
+
+# Roadshows are left out: their attachments and fund date sync live in the endpoints
+ENTITIES = {
+    "lp": LP,
+    "gp": GP,
+    "person": Person,
+    "fund": Fund,
+    "note": Note,
+    "todo": Todo,
+    "distributor": Distributor,
+}
+
+# relation -> (link model, owner column, other column); set_links replaces the owner's links
+RELATIONS = {
+    "note_lp": (NoteLPLink, "note_id", "lp_id"),
+    "note_gp": (NoteGPLink, "note_id", "gp_id"),
+    "note_fund": (NoteFundLink, "note_id", "fund_id"),
+    "note_distributor": (NoteDistributorLink, "note_id", "distributor_id"),
+    "note_roadshow": (NoteRoadshowLink, "note_id", "roadshow_id"),
+    "gp_lp": (GPLPLink, "gp_id", "lp_id"),
+    "gp_person": (GPPersonLink, "gp_id", "person_id"),
+    "lp_person": (LPPersonLink, "lp_id", "person_id"),
+    "distributor_person": (DistributorPersonLink, "distributor_id", "person_id"),
+}
+
+NOTE_CONTENT_FIELDS = {"content_json", "raw_notes", "image_paths"}
+
+
+class BatchError(ValueError):
+    """
+    An operation is invalid or failed; index is its position in the batch,
+    or None when the batch as a whole was rejected (too many operations)
+    """
+
+    def __init__(self, index: Optional[int], message: str):
+        super().__init__(message)
+        self.index = index
+
+
+class _Batch:
+    def __init__(self, session: Session):
+        self.session = session
+        self.refs: Dict[str, int] = {}
+        self.note_ids: Set[int] = set()  # Notes to re-index after commit
+        self.notes_to_sync: Set[int] = set()  # Notes whose images must be re-indexed before commit
+
+    def resolve(self, value: Any) -> Any:
+        """"$ref" -> id of the record created under that ref"""
+        if isinstance(value, str) and value.startswith("$"):
+            if value[1:] not in self.refs:
+                raise ValueError(f"Unknown reference: {value}")
+            return self.refs[value[1:]]
+        return value
+
+    def values(self, model, data: Optional[dict]) -> dict:
+        """Request data -> column values: references in *_id columns, ISO strings in date columns"""
+        if not isinstance(data, dict):
+            raise ValueError("data must be an object")
+        table = model.__table__
+        values = {}
+        for key, value in data.items():
+            if key not in table.c:
+                raise ValueError(f"Unknown field for {table.name}: {key}")
+            if key.endswith("_id"):
+                value = self.resolve(value)
+            elif isinstance(table.c[key].type, DateTime) and isinstance(value, str):
+                value = datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+            values[key] = value
+        return values
+
+    def create(self, op: dict) -> dict:
+        model = _entity(op)
+        values = self.values(model, op.get("data"))
+        values.pop("id", None)
+        values.pop("version", None)
+        record = model(**values)
+        self.session.add(record)
+        self.session.flush()
+        if op.get("ref"):
+            self.refs[op["ref"]] = record.id
+        if model is Note:
+            self.note_ids.add(record.id)
+            self.notes_to_sync.add(record.id)
+        return {"ref": op.get("ref"), "entity": op["entity"], "id": record.id, "record": record}
+
+    def update(self, op: dict) -> dict:
+        model = _entity(op)
+        row_id = self.resolve(op.get("id"))
+        values = self.values(model, op.get("data"))
+        record = update_row(self.session, model, row_id, values, op.get("version"))
+        if record is None:
+            raise ValueError(f"{op['entity']} {row_id} not found")
+        # A record created earlier in the batch is now stale in the identity map
+        loaded = self.session.identity_map.get(identity_key(model, row_id))
+        if loaded is not None:
+            self.session.expire(loaded)
+        if model is Note:
+            self.note_ids.add(row_id)
+            if NOTE_CONTENT_FIELDS & values.keys():
+                self.notes_to_sync.add(row_id)
+        return {"entity": op["entity"], "id": row_id, "version": record.version}
+
+    def link(self, op: dict) -> dict:
+        link, owner, other = _relation(op)
+        owner_id = self.resolve(op.get("id"))
+        ids = list(dict.fromkeys(self.resolve(i) for i in _id_list(op)))
+        table = link.__table__
+        if op["op"] == "set_links":
+            self.session.execute(delete(table).where(table.c[owner] == owner_id))
+        if op["op"] == "unlink":
+            if ids:
+                self.session.execute(delete(table).where(table.c[owner] == owner_id, table.c[other].in_(ids)))
+        elif ids:
+            # OR IGNORE: linking twice is a no-op, like POST /notes/{id}/funds/{id}
+            self.session.execute(
+                insert(table).prefix_with("OR IGNORE"),
+                [{owner: owner_id, other: other_id} for other_id in ids]
+            )
+        return {"relation": op["relation"], "id": owner_id, "count": len(ids)}
+
+
+def _entity(op: dict):
+    if op.get("entity") not in ENTITIES:
+        raise ValueError(f"entity must be one of {', '.join(ENTITIES)}")
+    return ENTITIES[op["entity"]]
+
+
+def _relation(op: dict):
+    if op.get("relation") not in RELATIONS:
+        raise ValueError(f"relation must be one of {', '.join(RELATIONS)}")
+    return RELATIONS[op["relation"]]
+
+
+def _id_list(op: dict) -> List[Any]:
+    ids = op.get("ids", [])
+    if not isinstance(ids, list):
+        raise ValueError("ids must be a list")
+    return ids
+
+
+def run_batch(session: Session, operations: List[dict]) -> Dict[str, Any]:
+    """
+    Run operations in order in the caller's session (caller commits)
+
+    Operations:
+        {"op": "create", "entity": "note", "ref": "note", "data": {...}}
+        {"op": "update", "entity": "note", "id": 5 | "$note", "data": {...}, "version": 3}
+        {"op": "link" | "unlink" | "set_links", "relation": "note_lp", "id": "$note", "ids": [1, 2]}
+
+    Returns:
+        {results: [one per operation], refs: {ref: id}, note_ids: notes to re-index}
+
+    Raises:
+        BatchError: with the failing operation's index (the session is rolled back
+            when the database rejected it), or index None for an oversized batch
+        VersionConflict: an update's version is stale (.index is set)
+    """
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(None, f"At most {MAX_OPERATIONS} operations per batch")
+
+    batch = _Batch(session)
+    handlers = {"create": batch.create, "update": batch.update, "link": batch.link, "unlink": batch.link, "set_links": batch.link}
+    results = []
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get("op") not in handlers:
+            raise BatchError(index, f"op must be one of {', '.join(handlers)}")
+        try:
+            results.append(handlers[op["op"]](op))
+        except (ValueError, TypeError) as e:
+            raise BatchError(index, str(e))
+        except SQLAlchemyError as e:
+            # Constraint failures (duplicate notion_id, missing required field, ...) and bad values
+            session.rollback()
+            raise BatchError(index, str(getattr(e, "orig", None) or e).splitlines()[0])
+        except VersionConflict as e:
+            e.index = index
+            raise
+
+    for note_id in batch.notes_to_sync:
+        sync_note_images(session, session.get(Note, note_id))
+    return {"results": results, "refs": batch.refs, "note_ids": sorted(batch.note_ids)}
@@ -0,0 +1,298 @@
+"""
+Endpoint benchmarks: every backend.py route against the synthetic dataset
+
+Ids are the busiest rows of the dataset (most links), so per-entity routes are
+measured at their worst case. Not covered: GET /notes/{id}/summary/stream and
+POST /renditions/prewarm, which need a running LLM worker / background thread.
+"""
+
+import io
+
+import pytest
+
+
+def search_term(dataset, table: str, column: str = "name") -> str:
+    return dataset[table][len(dataset[table]) // 2][column].split(" ")[0][:4]
+
+
+@pytest.fixture(scope="module")
+def fixtures(client, ids, app):
+    """Rows the read benchmarks need that the dataset doesn't have: a job and an attachment"""
+    import backend
+
+    job = client.post(f"/notes/{ids['note']}/jobs", json={"job_type": "summarize"}).json()
+    client.post(f"/jobs/{job['id']}/cancel")  # Finished, so /events returns immediately
+    attachment = client.post(
+        f"/roadshows/{ids['roadshow']}/attachments",
+        files={"file": ("flight.png", io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"0" * 50_000), "image/png")}
+    ).json()
+
+    rendition = None
+    if backend.image_service.enabled:
+        from PIL import Image
+
+        rendition = "bench.png"
+        Image.new("RGB", (2400, 1600), (40, 90, 160)).save(
+            f"{backend.image_service.images_dir}/{rendition}"
+        )
+    return {"job": job["id"], "attachment": attachment["id"], "rendition": rendition}
+
+
+READS = [
+    "/health",
+    "/metrics",
+    "/metrics/slow-queries",
+    "/lps",
+    "/lps/search?q={q_lp}",
+    "/lps/{lp}/people",
+    "/lps/{lp}/notes",
+    "/lps/{lp}/tasks",
+    "/gps",
+    "/gps/search?q={q_gp}",
+    "/gps/{gp}/people",
+    "/gps/{gp}/notes",
+    "/gps/{gp}/tasks",
+    "/distributors",
+    "/funds",
+    "/funds/search?q={q_fund}",
+    "/funds/{fund}/notes",
+    "/funds/{fund}/sales-funnel",
+    "/people",
+    "/people/search?q={q_person}",
+    "/autocomplete?q={q_lp}",
+    "/autocomplete?q={q_person}&types=person&types=lp",
+    "/people/{person}/gps",
+    "/people/{person}/lps",
+    "/notes",
+    "/notes/images?ids={note_ids}",
+    "/notes/{note}",
+    "/notes/{note}/lps",
+    "/notes/{note}/gps",
+    "/notes/{note}/funds",
+    "/notes/{note}/jobs",
+    "/todos",
+    "/jobs/{job}",
+    "/jobs/{job}/events",
+    "/roadshows",
+    "/roadshows/{roadshow}/attachments",
+    "/roadshows/{roadshow}/lp-status",
+    "/funnel/analytics?until=2025-01-01T00:00:00&window_days=90&windows=8",
+    "/attachments/{attachment}",
+    "/renditions/prewarm",
+    "/renditions/thumb/{rendition}",
+]
+
+
+@pytest.mark.parametrize("route", READS)
+def test_read(benchmark, client, dataset, ids, fixtures, route):
+    if "{rendition}" in route and not fixtures["rendition"]:
+        pytest.skip("Pillow not installed")
+
+    url = route.format(
+        **ids,
+        **fixtures,
+        q_lp=search_term(dataset, "lp"),
+        q_gp=search_term(dataset, "gp"),
+        q_fund=search_term(dataset, "fund", "fund_name"),
+        q_person=search_term(dataset, "person"),
+        note_ids=",".join(str(n) for n in range(1, 51)),
+    )
+    benchmark.group = "endpoints: read"
+    benchmark.extra_info["route"] = route
+
+    response = benchmark(client.get, url)
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("route", [
+    "/lps",
+    "/gps",
+    "/funds",
+    "/people",
+    "/funds/{fund}/sales-funnel",
+    "/roadshows/{roadshow}/lp-status",
+])
+def test_read_uncached(benchmark, client, ids, route):
+    """Cached reads (see response_cache.py) with the cache emptied first: the cost after a write"""
+    from response_cache import response_cache
+
+    url = route.format(**ids)
+    benchmark.group = "endpoints: read (cache miss)"
+    benchmark.extra_info["route"] = route
+
+    response = benchmark.pedantic(lambda: client.get(url), setup=response_cache.clear, rounds=20, iterations=1)
+    assert response.status_code == 200, response.text
+
+
+QUERIES = {
+    "lps": {"filter": {"field": "priority", "op": "in", "value": ["High", "Medium"]}, "sort": [{"field": "name", "dir": "asc"}]},
+    "gps": {"search": "cap", "sort": [{"field": "location", "dir": "desc"}]},
+    "people": {"filter": {"field": "people_type", "op": "eq", "value": "LP"}},
+    "funds": {"filter": {"field": "status", "op": "is_not_empty"}},
+    "notes": {"filter": {"field": "related_lps", "op": "is_not_empty"}, "sort": [{"field": "date", "dir": "desc"}]},
+    "distributors": {},
+}
+
+
+@pytest.mark.parametrize("entity", list(QUERIES))
+def test_view_query(benchmark, client, entity):
+    """One database view page with its facet counts"""
+    benchmark.group = "endpoints: view query"
+    benchmark.extra_info["route"] = f"POST /{entity}/query"
+
+    response = benchmark(client.post, f"/{entity}/query", json=QUERIES[entity])
+    assert response.status_code == 200, response.text
+
+
+# Writes run a fixed number of rounds so the dataset barely grows
+WRITE_ROUNDS = 20
+
+
+def run_write(benchmark, route, call, setup=None):
+    benchmark.group = "endpoints: write"
+    benchmark.extra_info["route"] = route
+    kwargs = {"rounds": WRITE_ROUNDS, "iterations": 1}
+    if setup:
+        response = benchmark.pedantic(call, setup=setup, **kwargs)
+    else:
+        response = benchmark.pedantic(call, **kwargs)
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("route, body", [
+    ("/lps", {"name": "Bench LP", "location": "Monterrey"}),
+    ("/gps", {"name": "Bench GP", "location": "New York"}),
+    ("/distributors", {"name": "Bench Distributor"}),
+    ("/funds", {"fund_name": "Bench Fund I"}),
+    ("/people", {"name": "Bench Person", "email": "bench@example.com"}),
+    ("/notes", {"name": "Bench note", "raw_notes": "Discussed the fund.", "summary": "Short summary"}),
+    ("/todos", {"note_id": 1, "description": "Send the deck"}),
+    ("/roadshows", {"name": "Bench Roadshow", "fund_id": 1}),
+])
+def test_create(benchmark, client, route, body):
+    run_write(benchmark, f"POST {route}", lambda: client.post(route, json=body))
+
+
+@pytest.mark.parametrize("route, body", [
+    ("/lps/{lp}", {"name": "Updated LP", "priority": "High"}),
+    ("/gps/{gp}", {"name": "Updated GP", "contact_level": "Partner"}),
+    ("/distributors/1", {"name": "Updated Distributor"}),
+    ("/funds/{fund}", {"fund_name": "Updated Fund", "status": "Fundraising"}),
+    ("/people/{person}", {"name": "Updated Person", "position": "CIO"}),
+    ("/notes/{note}", {"name": "Updated note", "summary": "Updated summary"}),
+    ("/todos/{todo}", {"note_id": 1, "description": "Updated todo", "status": "completed"}),
+    ("/roadshows/{roadshow}", {"notes": "Updated roadshow notes"}),
+    ("/funds/{fund}/lps/{lp}/interest?interest=meeting", None),
+    ("/roadshows/{roadshow}/lps/{lp}/status?status=confirmed", None),
+])
+def test_update(benchmark, client, ids, route, body):
+    url = route.format(**ids)
+    run_write(benchmark, f"PUT {route}", lambda: client.put(url, json=body))
+
+
+@pytest.mark.parametrize("route, field, stage", [
+    ("/funds/{fund}/lps/interest", "interest", "meeting_offered"),
+    ("/roadshows/{roadshow}/lps/status", "status", "offered"),
+])
+def test_bulk_funnel_update(benchmark, client, dataset, ids, route, field, stage):
+    """50 LPs moved to one stage in a single request"""
+    url = route.format(**ids)
+    body = [{"lp_id": row["id"], field: stage} for row in dataset["lp"][:50]]
+    run_write(benchmark, f"PUT {route}", lambda: client.put(url, json=body))
+
+
+def test_patch_note(benchmark, client, ids):
+    """Autosave-sized edit: a splice into raw_notes instead of PUTting the whole note"""
+    url = f"/notes/{ids['note']}"
+    body = {"ops": [{"op": "splice", "path": "/raw_notes", "offset": 0, "remove": 0, "insert": "x"}]}
+    run_write(benchmark, "PATCH /notes/{note_id}", lambda: client.patch(url, json=body))
+
+
+def test_note_relationships(benchmark, client, ids):
+    url = f"/notes/{ids['note']}/relationships"
+    body = {"lp_ids": [ids["lp"]], "gp_ids": [ids["gp"]], "participant_ids": [ids["person"]], "fund_ids": [ids["fund"]]}
+    run_write(benchmark, "POST /notes/{note_id}/relationships", lambda: client.post(url, json=body))
+
+
+def test_batch_note_save(benchmark, client, ids):
+    """Meeting save as one batch: note, its links and a todo in one transaction"""
+    body = {"operations": [
+        {"op": "create", "entity": "note", "ref": "note", "data": {"name": "Bench meeting", "raw_notes": "notes"}},
+        {"op": "set_links", "relation": "note_lp", "id": "$note", "ids": [ids["lp"]]},
+        {"op": "set_links", "relation": "note_gp", "id": "$note", "ids": [ids["gp"]]},
+        {"op": "set_links", "relation": "note_fund", "id": "$note", "ids": [ids["fund"]]},
+        {"op": "create", "entity": "todo", "data": {"note_id": "$note", "description": "Follow up"}},
+    ]}
+    run_write(benchmark, "POST /batch", lambda: client.post("/batch", json=body))
+
+
+@pytest.mark.parametrize("method", ["post", "delete"])
+def test_link_note_fund(benchmark, client, ids, method):
+    url = f"/notes/{ids['note']}/funds/{ids['fund']}"
+    undo = client.delete if method == "post" else client.post
+
+    def setup():
+        undo(url)
+
+    run_write(benchmark, f"{method.upper()} /notes/{{note_id}}/funds/{{fund_id}}", lambda: getattr(client, method)(url), setup=setup)
+
+
+def test_jobs(benchmark, client, ids):
+    def enqueue_and_cancel():
+        job = client.post(f"/notes/{ids['note']}/jobs", json={"job_type": "summarize"}).json()
+        return client.post(f"/jobs/{job['id']}/cancel")
+
+    run_write(benchmark, "POST /notes/{note_id}/jobs + /jobs/{job_id}/cancel", enqueue_and_cancel)
+
+
+def test_upload_attachment(benchmark, client, ids):
+    url = f"/roadshows/{ids['roadshow']}/attachments"
+    counter = iter(range(10 ** 6))
+
+    def upload():
+        # Distinct content each round so the store writes a new file
+        payload = b"\x89PNG\r\n\x1a\n" + str(next(counter)).encode() * 20_000
+        return client.post(url, files={"file": ("flight.png", io.BytesIO(payload), "image/png")})
+
+    run_write(benchmark, "POST /roadshows/{roadshow_id}/attachments", upload)
+
+
+@pytest.mark.parametrize("route, body", [
+    ("/lps", {"name": "Doomed LP"}),
+    ("/gps", {"name": "Doomed GP"}),
+    ("/roadshows", {"name": "Doomed Roadshow", "fund_id": 1}),
+])
+def test_delete(benchmark, client, route, body):
+    """Each round deletes a row created (untimed) in setup"""
+    created = {}
+
+    def setup():
+        created["id"] = client.post(route, json=body).json()["id"]
+
+    run_write(benchmark, f"DELETE {route}/{{id}}", lambda: client.delete(f"{route}/{created['id']}"), setup=setup)
+
+
+def test_delete_attachment(benchmark, client, ids):
+    created = {}
+    counter = iter(range(10 ** 6))
+
+    def setup():
+        payload = f"doomed {next(counter)}".encode()
+        response = client.post(
+            f"/roadshows/{ids['roadshow']}/attachments",
+            files={"file": ("doomed.txt", io.BytesIO(payload), "text/plain")}
+        )
+        created["id"] = response.json()["id"]
+
+    run_write(benchmark, "DELETE /attachments/{id}", lambda: client.delete(f"/attachments/{created['id']}"), setup=setup)
+
+
+def test_merge_duplicates(benchmark, client):
+    pair = {}
+
+    def setup():
+        keep = client.post("/people", json={"name": "María Fernanda Garza", "email": "mfg@example.com"}).json()
+        merge = client.post("/people", json={"name": "Maria Fernanda Garza", "cell_phone": "+52 81 5555 1234"}).json()
+        pair["body"] = {"entity": "person", "keep_id": keep["id"], "merge_id": merge["id"]}
+
+    run_write(benchmark, "POST /duplicates/merge", lambda: client.post("/duplicates/merge", json=pair["body"]), setup=setup)
@@ -0,0 +1,76 @@
+"""
+Notion importer benchmarks: the synthetic dataset's Notion exports imported
+into a fresh database, one entity type at a time, in the order
+import_from_notion_complete.main() runs them
+"""
+
+import shutil
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+import database
+import import_from_notion_complete as notion_import
+from import_funds import import_funds
+
+IMPORT_ROUNDS = 3
+
+# entity -> (importer, table, entities that must already be imported)
+IMPORTERS = {
+    "distributors": (notion_import.import_distributors, "distributor", []),
+    "lps": (notion_import.import_lps, "lp", []),
+    "gps": (notion_import.import_gps, "gp", ["distributors"]),
+    "people": (notion_import.import_people, "person", ["distributors", "lps", "gps"]),
+    "funds": (import_funds, "fund", []),
+    "notes": (notion_import.import_notes, "note", ["distributors", "lps", "gps", "people", "funds"]),
+}
+
+
+class ScratchDatabase:
+    """A database file the importers (sqlite3 via DB_PATH, SQLModel via database.engine) both write to"""
+
+    def __init__(self, path: str, monkeypatch):
+        self.path = path
+        self.engine = create_engine(f"sqlite:///{path}")
+        monkeypatch.setattr(notion_import, "DB_PATH", path)
+        monkeypatch.setattr(database, "engine", self.engine)
+
+    def reset(self, template: str):
+        self.engine.dispose()
+        shutil.copyfile(template, self.path)
+
+
+@pytest.fixture(scope="module")
+def templates(notion_export_files, tmp_path_factory):
+    """Database files with each importer's prerequisites already imported"""
+    directory = tmp_path_factory.mktemp("import-templates")
+    empty = str(directory / "empty.db")
+    SQLModel.metadata.create_all(create_engine(f"sqlite:///{empty}"))
+
+    paths = {}
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for entity, (_, _, prerequisites) in IMPORTERS.items():
+            path = str(directory / f"before-{entity}.db")
+            scratch = ScratchDatabase(path, monkeypatch)
+            scratch.reset(empty)
+            for prerequisite in prerequisites:
+                IMPORTERS[prerequisite][0](notion_export_files[prerequisite])
+            scratch.engine.dispose()
+            paths[entity] = path
+    return paths
+
+
+@pytest.mark.parametrize("entity", list(IMPORTERS))
+def test_import(benchmark, dataset, notion_export_files, templates, tmp_path, monkeypatch, entity):
+    importer, table, _ = IMPORTERS[entity]
+    scratch = ScratchDatabase(str(tmp_path / "import.db"), monkeypatch)
+
+    benchmark.group = "notion import"
+    benchmark.extra_info["pages"] = len(dataset[table])
+    benchmark.pedantic(
+        importer,
+        args=(notion_export_files[entity],),
+        setup=lambda: scratch.reset(templates[entity]),
+        rounds=IMPORT_ROUNDS,
+        iterations=1
+    )
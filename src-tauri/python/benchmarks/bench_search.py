@@ -0,0 +1,66 @@
+"""
+Search benchmarks: semantic note search (indexing and queries), duplicate
+detection and the name search endpoints
+"""
+
+import pytest
+
+import dedup
+from semantic_search import HashingEmbedder, NoteSemanticIndex
+
+QUERIES = [
+    "interest in private credit",
+    "follow up with the data room",
+    "currency exposure peso feeder",
+]
+
+
+@pytest.fixture(scope="module")
+def semantic_index(app, bench_db, tmp_path_factory):
+    """Offline (hashing) index over every note, swapped in for the backend's"""
+    import semantic_search
+
+    index = NoteSemanticIndex(directory=str(tmp_path_factory.mktemp("vectors")))
+    index.embedders = [HashingEmbedder()]
+    index.update()
+    original, semantic_search.note_index = semantic_search.note_index, index
+    yield index
+    semantic_search.note_index = original
+
+
+def test_index_all_notes(benchmark, bench_db, tmp_path):
+    """Full embed of every note into an empty index"""
+    def setup():
+        index = NoteSemanticIndex(directory=str(tmp_path / f"vectors-{len(list(tmp_path.iterdir()))}"))
+        index.embedders = [HashingEmbedder()]
+        return (index,), {}
+
+    benchmark.group = "search: semantic"
+    benchmark.pedantic(lambda index: index.update(), setup=setup, rounds=3, iterations=1)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_semantic_search(benchmark, client, semantic_index, query):
+    benchmark.group = "search: semantic"
+    response = benchmark(client.get, "/notes/semantic-search", params={"q": query, "k": 20})
+    assert response.status_code == 200 and response.json()
+
+
+@pytest.mark.parametrize("entity", ["person", "lp", "gp", "distributor"])
+def test_find_duplicates(benchmark, bench_db, entity):
+    benchmark.group = "search: duplicates"
+    benchmark.pedantic(dedup.find_duplicates, args=(entity,), rounds=3, iterations=1)
+
+
+def test_duplicates_endpoint(benchmark, client):
+    benchmark.group = "search: duplicates"
+    response = benchmark.pedantic(client.get, args=("/duplicates",), kwargs={"params": {"entity": "person"}}, rounds=3)
+    assert response.status_code == 200 and response.json()
+
+
+@pytest.mark.parametrize("route", ["/lps/search", "/gps/search", "/funds/search", "/people/search"])
+@pytest.mark.parametrize("query", ["a", "cap", "Monte"])
+def test_name_search(benchmark, client, route, query):
+    benchmark.group = "search: names"
+    response = benchmark(client.get, route, params={"q": query})
+    assert response.status_code == 200
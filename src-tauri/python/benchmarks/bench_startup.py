@@ -0,0 +1,103 @@
+"""
+Startup benchmarks: time from launching `python backend.py` until /ready
+answers, the way the launchers wait for it, plus the pieces of that path
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+import database
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_TIMEOUT = 60
+STARTUP_ROUNDS = 3
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port: int, process: subprocess.Popen) -> dict:
+    deadline = time.perf_counter() + READY_TIMEOUT
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited with {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as response:
+                if response.status == 200:
+                    return response
+        except OSError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError("Backend did not become ready")
+
+
+def test_cold_start_until_ready(benchmark, bench_db, tmp_path):
+    """Launch the backend on a copy of the dataset database and poll /ready"""
+    data_dir = tmp_path / "db"
+    data_dir.mkdir()
+    db_path = str(data_dir / "crm.db")
+    shutil.copyfile(bench_db, db_path)
+    running = []
+
+    def stop():
+        while running:
+            process = running.pop()
+            process.terminate()
+            process.wait(timeout=10)
+
+    def setup():
+        stop()
+        port = free_port()
+        env = {**os.environ, "CRM_DB_PATH": db_path, "CRM_PORT": str(port)}
+        return (port, env), {}
+
+    def launch(port, env):
+        process = subprocess.Popen(
+            [sys.executable, "backend.py"],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        running.append(process)
+        wait_ready(port, process)
+
+    benchmark.group = "startup"
+    try:
+        benchmark.pedantic(launch, setup=setup, rounds=STARTUP_ROUNDS, iterations=1)
+    finally:
+        stop()
+
+
+def test_import_backend(benchmark):
+    """Fresh interpreter importing backend.py (most of the cold start)"""
+    benchmark.group = "startup"
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", "import backend"],),
+        kwargs={"cwd": BACKEND_DIR, "check": True},
+        rounds=STARTUP_ROUNDS,
+        iterations=1
+    )
+
+
+@pytest.mark.parametrize("current", [True, False], ids=["schema-current", "schema-outdated"])
+def test_create_db_and_tables(benchmark, bench_db, current):
+    """Schema check on an existing database: user_version hit vs full create_all()"""
+    def setup():
+        version = database.SCHEMA_VERSION if current else 0
+        with database.engine.begin() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+
+    benchmark.group = "startup"
+    benchmark.pedantic(database.create_db_and_tables, setup=setup, rounds=20, iterations=1)
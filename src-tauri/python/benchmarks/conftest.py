@@ -0,0 +1,127 @@
+"""
+Fixtures for the benchmark suite
+
+A synthetic dataset (see synthetic_data.py) is generated once per session at
+--bench-scale and loaded into a temporary SQLite database; database.engine is
+pointed at it before the backend is imported, so the real endpoints, importers
+and search code run against it. The same fixtures serve the test_*.py checks
+(SQL query budgets via pytest_sql_capture, the summarizer against a stub LLM).
+"""
+
+import os
+import shutil
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import create_engine  # noqa: E402
+
+import database  # noqa: E402
+from synthetic_data import DEFAULT_SEED, SCALES, generate_dataset, populate_database, write_notion_exports  # noqa: E402
+
+pytest_plugins = ["pytest_sql_capture", "pytester"]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("crm-bench", "CRM benchmarks")
+    group.addoption(
+        "--bench-scale",
+        default="1x",
+        help=f"Synthetic dataset size: {', '.join(SCALES)} or any Nx (default 1x)"
+    )
+    group.addoption(
+        "--bench-seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help=f"Synthetic dataset seed (default {DEFAULT_SEED})"
+    )
+
+
+def pytest_report_header(config):
+    return f"crm dataset: {config.getoption('--bench-scale')} (seed {config.getoption('--bench-seed')})"
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # Saved with every JSON result so runs at different scales aren't compared by accident
+    machine_info["crm_dataset_scale"] = config.getoption("--bench-scale")
+    machine_info["crm_dataset_seed"] = config.getoption("--bench-seed")
+
+
+@pytest.fixture(scope="session")
+def workdir(tmp_path_factory):
+    return tmp_path_factory.mktemp("crm-bench")
+
+
+@pytest.fixture(scope="session")
+def dataset(request):
+    scale_arg = request.config.getoption("--bench-scale")
+    scale = SCALES.get(scale_arg) or int(scale_arg.rstrip("x"))
+    return generate_dataset(scale, request.config.getoption("--bench-seed"))
+
+
+def busiest(dataset, link_table: str, key: str) -> int:
+    """Id with the most rows in a link table"""
+    return Counter(row[key] for row in dataset[link_table]).most_common(1)[0][0]
+
+
+@pytest.fixture(scope="session")
+def ids(dataset):
+    """Busiest row of each entity (most links), so per-entity routes run at their worst case"""
+    return {
+        "lp": busiest(dataset, "notelplink", "lp_id"),
+        "gp": busiest(dataset, "notegplink", "gp_id"),
+        "fund": busiest(dataset, "fundlpinterest", "fund_id"),
+        "roadshow": busiest(dataset, "roadshowlpstatus", "roadshow_id"),
+        "person": busiest(dataset, "lppersonlink", "person_id"),
+        "note": busiest(dataset, "noteimage", "note_id"),
+        "todo": 1,
+    }
+
+
+@pytest.fixture(scope="session")
+def bench_db(dataset, workdir):
+    """Path of a database holding the full synthetic dataset; database.engine points at it"""
+    db_path = str(workdir / "crm.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    populate_database(engine, dataset)
+    database.engine = engine
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def notion_export_files(dataset, workdir):
+    """Notion export JSON files for the dataset, keyed by entity"""
+    return write_notion_exports(dataset, str(workdir / "notion_exports"))
+
+
+@pytest.fixture(scope="session")
+def app(bench_db, workdir):
+    """The FastAPI app, with file stores redirected into the temp dir"""
+    import backend
+
+    backend.attachment_store.root = str(workdir / "attachments")
+    backend.image_service.images_dir = str(workdir / "images")
+    backend.image_service.cache_dir = str(workdir / "image_cache")
+    os.makedirs(backend.image_service.images_dir, exist_ok=True)
+    return backend.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """TestClient without startup events: no job queue or background indexer"""
+    from fastapi.testclient import TestClient
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def scratch_db(bench_db, workdir):
+    """Factory for throwaway copies of the dataset database (for benchmarks that write)"""
+    def make(name: str = "scratch.db") -> str:
+        path = str(workdir / name)
+        shutil.copyfile(bench_db, path)
+        return path
+    return make
@@ -0,0 +1,114 @@
+"""
+SQL query budgets for the endpoints that used to issue a query per row
+
+The budgets are the query counts at the busiest rows of the dataset; a
+per-LP/per-note lookup creeping back in fails these tests instead of only
+showing up as a slower benchmark.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import Note, NoteLPLink, get_session
+
+
+@pytest.fixture(autouse=True)
+def uncached(app):
+    """Budgets are for computing a response, not serving it from the response cache"""
+    from response_cache import response_cache
+
+    response_cache.clear()
+
+
+@pytest.fixture
+def link_notes(bench_db):
+    """Factory that links new notes to an LP; they are deleted again after the test"""
+    created = []
+
+    def link(lp_id: int, count: int = 50):
+        with get_session() as session:
+            notes = [Note(name=f"Budget note {i}", date=datetime(2024, 1, 1) + timedelta(days=i)) for i in range(count)]
+            session.add_all(notes)
+            session.flush()
+            session.add_all(NoteLPLink(note_id=note.id, lp_id=lp_id) for note in notes)
+            session.commit()
+            created.extend(note.id for note in notes)
+
+    yield link
+
+    with get_session() as session:
+        session.query(NoteLPLink).filter(NoteLPLink.note_id.in_(created)).delete()
+        session.query(Note).filter(Note.id.in_(created)).delete()
+        session.commit()
+
+
+@pytest.mark.max_queries(3)
+def test_sales_funnel_budget(client, ids):
+    response = client.get(f"/funds/{ids['fund']}/sales-funnel")
+    assert response.status_code == 200
+    assert len(response.json()) > 3  # One row per LP, so a per-LP query would blow the budget
+
+
+@pytest.mark.max_queries(2)
+def test_lp_notes_budget(client, ids):
+    response = client.get(f"/lps/{ids['lp']}/notes")
+    assert response.status_code == 200
+    assert len(response.json()) > 2
+
+
+@pytest.mark.max_queries(2)
+def test_note_lps_budget(client, ids):
+    response = client.get(f"/notes/{ids['note']}/lps")
+    assert response.status_code == 200
+
+
+def test_lp_notes_scale(client, ids, query_recorder, link_notes):
+    query_recorder.assert_constant(
+        lambda: client.get(f"/lps/{ids['lp']}/notes"),
+        grow=lambda: link_notes(lp_id=ids["lp"], count=50),
+    )
+
+
+def test_n_plus_one_fails(pytester, monkeypatch):
+    """The plugin fails a test that loops a query per row, and one over its budget"""
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.environ.get("PYTHONPATH")
+    ])))
+    pytester.makepyfile(
+        """
+        import pytest
+        from sqlalchemy import create_engine, text
+
+        import database
+
+        database.engine = create_engine("sqlite://")
+
+
+        def query(times):
+            with database.engine.connect() as conn:
+                for lp_id in range(times):
+                    conn.execute(text("SELECT :lp_id"), {"lp_id": lp_id})
+
+
+        def test_query_per_row():
+            query(20)
+
+
+        @pytest.mark.max_queries(3)
+        def test_over_budget():
+            query(4)
+
+
+        @pytest.mark.max_queries(3)
+        def test_within_budget():
+            query(3)
+        """
+    )
+    result = pytester.runpytest_subprocess("-p", "pytest_sql_capture", "-p", "no:cacheprovider", "--sql-nplusone")
+    result.assert_outcomes(passed=1, failed=2)
+    result.stdout.fnmatch_lines([
+        "*test_query_per_row: possible N+1 queries*",
+        "*test_over_budget: expected at most 3 queries, got 4 queries*",
+    ])
@@ -0,0 +1,145 @@
+"""
+Map-reduce summarization against a stub Ollama server
+
+The stub answers /api/generate with canned NDJSON streams: a partial summary
+for each chunk prompt and one merged result for the reduce prompt. It records
+every prompt and the peak number of requests in flight.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from summarization_agent import SummarizationAgent, split_transcript
+
+MERGED = {
+    "summary": "Merged meeting summary",
+    "key_points": ["Fund II terms", "Next steps"],
+    "action_items": ["Send the deck", "Schedule a follow-up"],
+    "fundraise": "Fund II",
+    "interest": "interested",
+}
+
+
+class StubLLM(BaseHTTPRequestHandler):
+    delay = 0.2  # Seconds per completion, so concurrent chunk requests overlap
+
+    def do_POST(self):
+        server = self.server
+        prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["prompt"]
+        with server.lock:
+            server.prompts.append(prompt)
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        try:
+            time.sleep(self.delay)
+            part = re.search(r"This is part (\d+) of (\d+)", prompt)
+            if part:
+                number = part.group(1)
+                text = json.dumps({
+                    "summary": f"Summary of part {number}",
+                    "key_points": [f"point {number}"],
+                    "action_items": [f"action {number}"],
+                    "fundraise": None,
+                    "interest": None,
+                })
+            else:
+                text = json.dumps(MERGED)
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            # Streamed in a few fragments, like a real model
+            for start in range(0, len(text), 40):
+                self.wfile.write(json.dumps({"response": text[start:start + 40], "done": False}).encode() + b"\n")
+            self.wfile.write(json.dumps({"response": "", "done": True}).encode() + b"\n")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def llm_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLM)
+    server.lock = threading.Lock()
+    server.prompts = []
+    server.in_flight = 0
+    server.peak = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_map_reduce_summary(llm_server):
+    agent = SummarizationAgent(
+        server_url=f"http://127.0.0.1:{llm_server.server_port}",
+        use_cache=False,
+        chunk_tokens=200,
+        max_concurrency=2,
+    )
+    transcript = "\n".join(
+        f"Speaker {i % 3}: line {i} about the fund, the portfolio and the next meeting date."
+        for i in range(60)
+    )
+    chunks = split_transcript(transcript, agent.chunk_tokens)
+    assert len(chunks) > 2
+    assert all(len(chunk) <= agent.chunk_tokens * 4 for chunk in chunks)
+    assert "\n".join(chunks) == transcript  # Split on line breaks, nothing lost
+
+    tokens = []
+    result = agent.summarize_transcription(transcript, raise_on_error=True, on_token=tokens.append)
+
+    # One request per chunk, each carrying its own chunk text, then one reduce
+    chunk_prompts = [prompt for prompt in llm_server.prompts if "This is part" in prompt]
+    reduce_prompts = [prompt for prompt in llm_server.prompts if "Partial summaries" in prompt]
+    assert len(chunk_prompts) == len(chunks)
+    for number, chunk in enumerate(chunks, start=1):
+        assert any(f"part {number} of {len(chunks)}" in prompt and chunk in prompt for prompt in chunk_prompts)
+    assert len(reduce_prompts) == 1
+    positions = [reduce_prompts[0].index(f"Summary of part {number}") for number in range(1, len(chunks) + 1)]
+    assert positions == sorted(positions)  # Partials reach the reduce step in transcript order
+
+    # Chunks ran in parallel, never more than max_concurrency at once
+    assert llm_server.peak == 2
+
+    assert result == MERGED
+    assert json.loads("".join(tokens)) == MERGED  # Only the final pass is streamed to on_token
+
+
+def test_map_phase_progress_and_cancel(llm_server):
+    agent = SummarizationAgent(
+        server_url=f"http://127.0.0.1:{llm_server.server_port}",
+        use_cache=False,
+        chunk_tokens=200,
+        max_concurrency=2,
+    )
+    transcript = "\n".join(f"Speaker {i % 3}: line {i} about the fund and the portfolio." for i in range(120))
+    total = len(split_transcript(transcript, agent.chunk_tokens))
+    assert total > 4
+
+    class Cancelled(Exception):
+        pass
+
+    progress = []
+
+    def on_progress(done, chunks):
+        progress.append((done, chunks))
+        if done == 2:
+            raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        agent.summarize_transcription(transcript, raise_on_error=True, on_progress=on_progress)
+
+    assert progress == [(1, total), (2, total)]
+    # Chunks still queued were dropped and nothing was merged
+    assert len(llm_server.prompts) < total
+    assert not any("Partial summaries" in prompt for prompt in llm_server.prompts)
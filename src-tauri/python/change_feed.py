@@ -0,0 +1,164 @@
+"""
+Change feed for live views
+Committed writes become events (entity, id, op, changed fields and their new
+values) in an in-memory log that GET /changes streams as Server-Sent Events.
+Each event's SSE id is a resume token: a client that reconnects (EventSource
+sends Last-Event-ID) gets what it missed, or a "reset" event when the token is
+from an earlier backend run or older than the log, and should refetch.
+
+ORM flushes are captured automatically. Core statements that write through a
+session are recorded explicitly by their callers (row_updates, funnel_updates)
+or, failing that, produce an "invalidate" event for the whole table.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import chain
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+LOG_SIZE = int(os.getenv("CRM_CHANGE_FEED_SIZE", "10000"))
+
+# Tables the views show (jobs, attachments, images and the derived index tables are left out)
+FEED_TABLES = {
+    "lp", "gp", "person", "fund", "note", "todo", "distributor", "roadshow",
+    "fundlpinterest", "roadshowlpstatus",
+    "gplplink", "gppersonlink", "lppersonlink", "distributorpersonlink",
+    "notelplink", "notegplink", "notefundlink", "notedistributorlink", "noteroadshowlink",
+}
+
+# Execution option for Core statements whose caller records the change itself
+RECORDED = {"change_feed_recorded": True}
+
+_SESSION_KEY = "crm_change_events"  # session.info: events waiting for the commit
+
+
+class ChangeFeed:
+    """Bounded in-memory log of committed changes"""
+
+    def __init__(self, size: int = LOG_SIZE):
+        self.epoch = uuid.uuid4().hex[:12]  # Tokens from another backend run can't resume
+        self._events: Deque[dict] = deque(maxlen=size)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[List[dict]], None]] = []
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def token(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def publish(self, events: List[dict]):
+        if not events:
+            return
+        with self._lock:
+            now = time.time()
+            for change in events:
+                self._seq += 1
+                self._events.append({"seq": self._seq, "at": now, **change})
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception as e:
+                # Runs inside the commit; a failing listener mustn't fail the write
+                print(f"Change feed listener {listener!r} failed: {e}")
+
+    def subscribe(self, listener: Callable[[List[dict]], None]):
+        """Call listener(events) with every batch of committed changes (in the committing thread)"""
+        self._listeners.append(listener)
+
+    def after(self, seq: int) -> List[dict]:
+        """Events newer than seq, oldest first"""
+        with self._lock:
+            if not self._events or self._events[-1]["seq"] <= seq:
+                return []
+            return [change for change in self._events if change["seq"] > seq]
+
+    def resume_from(self, token: Optional[str]) -> Optional[int]:
+        """Sequence number to continue after, or None if the token can't be resumed"""
+        epoch, _, seq = (token or "").rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        with self._lock:
+            oldest = self._events[0]["seq"] if self._events else self._seq + 1
+            # Events after seq must all still be in the log
+            if seq > self._seq or seq + 1 < oldest:
+                return None
+        return seq
+
+
+change_feed = ChangeFeed()
+
+
+# Capture
+def record(session: Session, entity: str, key: Any, op: str, values: Optional[Dict[str, Any]] = None):
+    """Queue an event for the session's next commit (for writes the ORM doesn't see)"""
+    if entity not in FEED_TABLES:
+        return
+    change = {"entity": entity, "id": key, "op": op}
+    if values is not None:
+        change["fields"] = list(values)
+        change["values"] = jsonable_encoder(values)
+    session.info.setdefault(_SESSION_KEY, []).append(change)
+
+
+def _key(obj) -> Any:
+    """id, or {column: value} for the composite keys of link tables"""
+    mapper = inspect(obj).mapper
+    columns = [column.key for column in mapper.primary_key]
+    if columns == ["id"]:
+        return obj.id
+    return {column: getattr(obj, column) for column in columns}
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is None or table.name not in FEED_TABLES:
+            continue
+        columns = [column.key for column in table.columns]
+        if obj in session.deleted:
+            record(session, table.name, _key(obj), "delete")
+        elif obj in session.new:
+            record(session, table.name, _key(obj), "insert", {column: getattr(obj, column) for column in columns})
+        else:
+            state = inspect(obj)
+            changed = [column for column in columns if state.attrs[column].history.has_changes()]
+            if changed and "version" in columns and "version" not in changed:
+                changed.append("version")  # Bumped by an SQL expression (row_updates), so it has no history
+            if changed:
+                record(session, table.name, _key(obj), "update", {column: getattr(obj, column) for column in changed})
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk(orm_execute_state):
+    """Bulk Core writes nobody recorded: views showing the table should refetch it"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if orm_execute_state.execution_options.get("change_feed_recorded"):
+        return
+    session, entity = orm_execute_state.session, orm_execute_state.statement.table.name
+    queued = session.info.get(_SESSION_KEY, [])
+    if not any(change["entity"] == entity and change["op"] == "invalidate" for change in queued):
+        record(session, entity, None, "invalidate")
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session):
+    change_feed.publish(session.info.pop(_SESSION_KEY, []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session):
+    session.info.pop(_SESSION_KEY, None)
@@ -4,6 +4,8 @@ Uses SQLModel (Pydantic + SQLAlchemy) for type-safe database operations
 """
 
 from sqlmodel import SQLModel, Field, Relationship, create_engine, Session
+from sqlalchemy import Index
+from sqlalchemy.exc import OperationalError
 from typing import Optional, List
 from datetime import datetime
 import os
@@ -20,6 +22,7 @@ class Distributor(SQLModel, table=True):
     headquarter: Optional[str] = None  # Headquarters location
     mexico: Optional[str] = None  # Mexico presence/info
     text: Optional[str] = None  # General notes
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
     # Relationships
     gps: List["GP"] = Relationship(back_populates="distributor")  # One-to-many via GP.distributor_id
@@ -41,10 +44,11 @@ class LP(SQLModel, table=True):
     local_mf: Optional[str] = None  # Local Multi-Family interest
     investment_high: Optional[float] = None  # High investment amount
     investment_low: Optional[float] = None  # Low investment amount
-    location: Optional[str] = None  # Location
-    priority: Optional[str] = None  # Priority level
-    type_of_group: Optional[str] = None  # Type of LP group
+    location: Optional[str] = Field(default=None, index=True)  # Location
+    priority: Optional[str] = Field(default=None, index=True)  # Priority level
+    type_of_group: Optional[str] = Field(default=None, index=True)  # Type of LP group
     text: Optional[str] = None  # General notes/text
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
     # Relationships via link tables
     # Many-to-many with Note handled via NoteLPLink
@@ -113,16 +117,31 @@ class FundLPInterest(SQLModel, table=True):
     latest_note_id: Optional[int] = None  # ID of the latest related note
 
 
+class FundLPInterestChange(SQLModel, table=True):
+    """One sales funnel stage change (history for conversion analytics, see funnel_analytics.py)"""
+    __table_args__ = (
+        Index("ix_fundlpinterestchange_window", "changed_at", "fund_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    fund_id: int = Field(foreign_key="fund.id")
+    lp_id: int = Field(foreign_key="lp.id", index=True)
+    from_interest: str = "inactive"  # LPs without a FundLPInterest row count as inactive
+    to_interest: str
+    changed_at: datetime = Field(default_factory=datetime.now)
+
+
 class GP(SQLModel, table=True):
     """General Partner organization"""
     id: Optional[int] = Field(default=None, primary_key=True)
     notion_id: Optional[str] = Field(default=None, index=True, unique=True)  # Notion page ID
     name: str = Field(index=True)
-    location: Optional[str] = None
-    contact_level: Optional[str] = None  # e.g., "Partner", "Open Dialogue", etc.
+    location: Optional[str] = Field(default=None, index=True)
+    contact_level: Optional[str] = Field(default=None, index=True)  # e.g., "Partner", "Open Dialogue", etc.
     flagship_strategy: Optional[str] = None
     other_strategies: Optional[str] = None
     note: Optional[str] = None  # General notes about the GP
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
     # Foreign keys
     distributor_id: Optional[int] = Field(default=None, foreign_key="distributor.id")
@@ -148,13 +167,14 @@ class Person(SQLModel, table=True):
 
     # Professional details
     position: Optional[str] = None  # Job title/position
-    people_type: Optional[str] = None  # LP, GP, Distributor, Other (can be multiple)
+    people_type: Optional[str] = Field(default=None, index=True)  # LP, GP, Distributor, Other (can be multiple)
     personal_note: Optional[str] = None  # Personal notes about the person
 
     # Legacy fields (keeping for backwards compatibility)
     role: Optional[str] = None  # Deprecated - use position instead
     org_type: Optional[str] = None  # Deprecated - use people_type instead
     org_id: Optional[int] = None  # Deprecated
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
 
 class Note(SQLModel, table=True):
@@ -163,10 +183,10 @@ class Note(SQLModel, table=True):
     notion_id: Optional[str] = Field(default=None, index=True, unique=True)  # Notion page ID for matching
 
     name: str  # Note title
-    date: Optional[datetime] = None
+    date: Optional[datetime] = Field(default=None, index=True)
 
     # Notion properties
-    contact_type: Optional[str] = None
+    contact_type: Optional[str] = Field(default=None, index=True)
     local_mf: Optional[str] = None  # Local Multi-Family
     local_alts: Optional[str] = None  # Local Alternatives
     intl_mf: Optional[str] = None  # International Multi-Family
@@ -182,14 +202,15 @@ class Note(SQLModel, table=True):
     content_json: Optional[str] = None  # Full block structure as JSON
 
     # Image references
-    image_paths: Optional[str] = None  # Comma-separated local image paths
+    image_paths: Optional[str] = None  # Comma-separated local image paths (derived from NoteImage rows)
 
     # Legacy fields (for compatibility with existing code)
     raw_notes: Optional[str] = ""
     summary: Optional[str] = ""
-    interest: Optional[str] = None  # Sales funnel stage
+    interest: Optional[str] = Field(default=None, index=True)  # Sales funnel stage
     audio_path: Optional[str] = None
     transcription_path: Optional[str] = None
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
     # Relationships via link tables (many-to-many)
     # GPs, LPs, Distributors handled via NoteGPLink, NoteLPLink, NoteDistributorLink
@@ -205,6 +226,7 @@ class Todo(SQLModel, table=True):
     description: str
     status: str = "pending"  # pending/completed
     due_date: Optional[datetime] = None
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
     # Relationship
     note: Optional[Note] = Relationship(back_populates="todos")
@@ -219,9 +241,9 @@ class Fund(SQLModel, table=True):
     fund_name: str = Field(index=True)
 
     # Fund details from Notion
-    geography: Optional[str] = None
+    geography: Optional[str] = Field(default=None, index=True)
     target_multiple: Optional[float] = None
-    status: Optional[str] = None
+    status: Optional[str] = Field(default=None, index=True)
     days_to_rs: Optional[int] = None
     target_irr: Optional[str] = None  # Can be "20+" etc
     hard_cap_mn: Optional[float] = None  # Hard cap in millions
@@ -239,6 +261,7 @@ class Fund(SQLModel, table=True):
 
     # GP relationship - stored as notion_id reference
     gp_notion_id: Optional[str] = None  # Reference to GP's notion_id
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
     # Many-to-many with Note handled via NoteFundLink
 
@@ -266,11 +289,13 @@ class Roadshow(SQLModel, table=True):
     mty_driver: str = "None"  # Options: Needed, Done, None
     cdmx_driver: str = "None"  # Options: Needed, Done, None
 
-    # Image storage for flight details
-    flight_images: Optional[str] = None  # JSON array of base64 image data URLs
+    # Legacy inline flight images (JSON array of base64 data URLs); now stored as
+    # Attachment rows, see migrate_flight_images.py
+    flight_images: Optional[str] = None
 
     # General notes about this roadshow
     notes: Optional[str] = None
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})  # Bumped on every update (see row_updates.py)
 
 
 class RoadshowLPStatus(SQLModel, table=True):
@@ -292,18 +317,108 @@ class NoteRoadshowLink(SQLModel, table=True):
     roadshow_id: int = Field(foreign_key="roadshow.id", primary_key=True)
 
 
+class ProcessingJob(SQLModel, table=True):
+    """Background transcription/summarization job for a note (persistent job queue)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    note_id: int = Field(foreign_key="note.id", index=True)
+
+    job_type: str  # transcribe, summarize, process (transcribe + summarize)
+    status: str = Field(default="queued", index=True)  # queued, running, completed, failed, cancelled
+    progress: float = 0.0  # 0.0 - 1.0
+    message: Optional[str] = None  # Current step, shown in the UI
+    error: Optional[str] = None
+    result_json: Optional[str] = None  # JSON result written back to the note
+    partial_output: Optional[str] = None  # Streamed LLM output so far (saved periodically)
+    cancel_requested: bool = False
+    attempts: int = 0
+
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class NoteImage(SQLModel, table=True):
+    """Image referenced by a note's content blocks (including nested toggles/columns)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    note_id: int = Field(foreign_key="note.id", index=True)
+    block_id: Optional[str] = None  # Notion block ID of the image block
+    path: str  # Local path, e.g. notion_images/<block>_<hash>.png
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256, None if the file is missing
+    width: Optional[int] = None
+    height: Optional[int] = None
+    position: int = 0  # Order of the image within the note
+
+
+class Attachment(SQLModel, table=True):
+    """File attached to a roadshow (e.g. flight screenshots); bytes live in the attachment store"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    roadshow_id: int = Field(foreign_key="roadshow.id", index=True)
+
+    content_hash: str = Field(index=True)  # SHA-256 of the file, also its path in the store
+    mime_type: str
+    size_bytes: int
+    filename: Optional[str] = None  # Original file name, if known
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class FacetValue(SQLModel, table=True):
+    """One value of a comma-joined multi-select field (kept in sync by facet_index.py)"""
+    __table_args__ = (
+        # Filters and facet counts: (entity, field, value) -> entity ids, index only
+        Index("ix_facetvalue_lookup", "entity", "field", "value", "entity_id"),
+        # Rewriting one record's values
+        Index("ix_facetvalue_record", "entity", "entity_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: str  # lp, gp, person, fund, note
+    entity_id: int
+    field: str  # Column the value came from, e.g. sectors
+    value: str
+
+
 # Database setup
-DB_PATH = os.path.join(os.path.dirname(__file__), "../../db/crm.db")
+DB_PATH = os.getenv("CRM_DB_PATH") or os.path.join(os.path.dirname(__file__), "../../db/crm.db")
+DB_DIR = os.path.dirname(DB_PATH)  # Vector index, attachments, etc. live next to the database
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Stored in PRAGMA user_version once create_all() has run; bump it whenever a
+# table or index is added so existing databases pick it up on the next startup
+SCHEMA_VERSION = 4
+
+# SQL echo is noisy and slow; query timing lives in instrumentation.py (/metrics)
+engine = create_engine(DATABASE_URL, echo=os.getenv("CRM_SQL_ECHO") == "1")
 
 
 def create_db_and_tables():
-    """Initialize database and create all tables"""
+    """Initialize database and create all tables (skipped when user_version is current)"""
     # Ensure db directory exists
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    os.makedirs(DB_DIR, exist_ok=True)
+
+    # Checking one pragma is much cheaper than create_all() reflecting every table
+    with engine.connect() as conn:
+        stored_version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+    if stored_version == SCHEMA_VERSION:
+        return
+    if stored_version > SCHEMA_VERSION:
+        # Written by a newer build: leave its stamp so that build doesn't skip its own upgrade
+        print(f"Warning: database schema version {stored_version} is newer than this build's ({SCHEMA_VERSION})")
+        return
+
     SQLModel.metadata.create_all(engine)
+    # create_all() skips existing tables, including indexes added to them later
+    complete = True
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except OperationalError as e:  # Column not migrated yet (see migrate_*.py)
+                print(f"Skipping index {index.name}: {e.orig}")
+                complete = False
+    # Only stamp a complete schema, so skipped indexes are retried on the next startup
+    if complete:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 
 def get_session():
@@ -311,6 +426,13 @@ def get_session():
     return Session(engine)
 
 
+# Every ORM writer (backend, importers, scripts) keeps FacetValue rows in sync;
+# imported last because facet_index imports the models above (not when run as a
+# script: facet_index would import this file a second time as "database")
+if __name__ != "__main__":
+    import facet_index  # noqa: E402,F401
+
+
 if __name__ == "__main__":
     # Create tables when running directly
     create_db_and_tables()
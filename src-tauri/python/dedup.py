@@ -0,0 +1,335 @@
+"""
+Duplicate detection and merging for People, LPs, GPs and Distributors
+Candidate pairs come from blocking keys (name tokens, email, phone) and are
+scored with trigram and token-level Jaro-Winkler similarity, so large tables are never
+compared all-against-all
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, update
+
+from database import (
+    LP, GP, Person, Distributor, Fund,
+    GPLPLink, GPPersonLink, LPPersonLink, DistributorPersonLink,
+    NoteLPLink, NoteGPLink, NoteDistributorLink,
+    FundLPInterest, FundLPInterestChange, RoadshowLPStatus,
+    get_session
+)
+
+
+# Words that don't distinguish organizations ("Banorte Afore S.A. de C.V." == "Afore Banorte")
+STOPWORDS = {
+    "sa", "de", "cv", "sab", "sapi", "srl", "inc", "llc", "ltd", "lp", "llp",
+    "the", "and", "y", "la", "el", "los", "las", "del", "co", "corp", "company", "group", "grupo",
+}
+
+# Blocks bigger than this come from very common tokens and would make pairing quadratic
+MAX_BLOCK_SIZE = 200
+
+DEFAULT_THRESHOLD = 0.88
+
+# Entity name -> (model, tables whose column points at the entity's id)
+ENTITIES = {
+    "person": (Person, [
+        (GPPersonLink, "person_id"),
+        (LPPersonLink, "person_id"),
+        (DistributorPersonLink, "person_id"),
+    ]),
+    "lp": (LP, [
+        (GPLPLink, "lp_id"),
+        (LPPersonLink, "lp_id"),
+        (NoteLPLink, "lp_id"),
+        (FundLPInterest, "lp_id"),
+        (FundLPInterestChange, "lp_id"),
+        (RoadshowLPStatus, "lp_id"),
+    ]),
+    "gp": (GP, [
+        (GPLPLink, "gp_id"),
+        (GPPersonLink, "gp_id"),
+        (NoteGPLink, "gp_id"),
+    ]),
+    "distributor": (Distributor, [
+        (DistributorPersonLink, "distributor_id"),
+        (NoteDistributorLink, "distributor_id"),
+        (GP, "distributor_id"),
+    ]),
+}
+
+
+# Normalization
+def fold(text: str) -> str:
+    """Lowercase and strip accents"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    """Sorted significant tokens of a name (word order and legal suffixes ignored)"""
+    if not name:
+        return []
+    tokens = re.findall(r"[a-z0-9]+", fold(name))
+    # Single letters are initials or pieces of "S.A. de C.V."
+    significant = [t for t in tokens if len(t) > 1 and t not in STOPWORDS]
+    return sorted(significant or tokens)
+
+
+def normalize_name(name: Optional[str]) -> str:
+    return " ".join(name_tokens(name))
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email or "@" not in email:
+        return None
+    return email.strip().lower()
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Last 10 digits, so "+52 81 1234 5678" and "8112345678" match"""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    return digits[-10:] if len(digits) >= 7 else None
+
+
+# Similarity
+# Pairs with less trigram overlap than this skip the slower token Jaro-Winkler check
+MIN_TRIGRAM_OVERLAP = 0.25
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of character trigrams"""
+    if not a or not b:
+        return 0.0
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb)
+
+
+def token_similarity(a: str, b: str, threshold: float = 0.0) -> float:
+    """
+    Symmetric Monge-Elkan score: each token's best Jaro-Winkler match in the
+    other name, averaged (so one shared word like "afore" isn't a match on its own)
+
+    Returns early with an upper bound once the score can't reach threshold.
+    """
+    tokens_a, tokens_b = a.split(), b.split()
+    if not tokens_a or not tokens_b:
+        return 0.0
+
+    rows = []
+    total = 0.0
+    for i, x in enumerate(tokens_a):
+        row = [jaro_winkler(x, y) for y in tokens_b]
+        rows.append(row)
+        total += max(row)
+        bound = (total + len(tokens_a) - i - 1) / len(tokens_a)
+        if bound < threshold:
+            return bound
+
+    score_a = total / len(tokens_a)
+    score_b = sum(max(column) for column in zip(*rows)) / len(tokens_b)
+    return min(score_a, score_b)
+
+
+@lru_cache(maxsize=200_000)  # Token pairs repeat a lot across candidate pairs
+def jaro_winkler(a: str, b: str, prefix_scale: float = 0.1) -> float:
+    """Jaro-Winkler similarity in [0, 1]"""
+    if a == b:
+        return 1.0 if a else 0.0
+    if not a or not b:
+        return 0.0
+
+    window = max(len(a), len(b)) // 2 - 1
+    a_matched = [False] * len(a)
+    b_matched = [False] * len(b)
+    matches = 0
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_matched[j] and b[j] == char:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if matches == 0:
+        return 0.0
+
+    a_chars = [c for c, m in zip(a, a_matched) if m]
+    b_chars = [c for c, m in zip(b, b_matched) if m]
+    transpositions = sum(x != y for x, y in zip(a_chars, b_chars)) / 2
+
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+# Detection
+class _Record:
+    __slots__ = ("id", "name", "norm_name", "grams", "email", "phones")
+
+    def __init__(self, record_id: int, name: str, email: Optional[str] = None, phones: Tuple = ()):
+        self.id = record_id
+        self.name = name
+        self.norm_name = normalize_name(name)
+        self.grams = trigrams(self.norm_name) if self.norm_name else set()
+        self.email = normalize_email(email)
+        self.phones = {p for p in (normalize_phone(x) for x in phones) if p}
+
+
+def _load_records(entity: str) -> List[_Record]:
+    model, _ = ENTITIES[entity]
+    with get_session() as session:
+        if entity == "person":
+            rows = session.query(Person.id, Person.name, Person.email, Person.cell_phone, Person.office_phone).all()
+            return [_Record(r[0], r[1], r[2], (r[3], r[4])) for r in rows]
+        rows = session.query(model.id, model.name).all()
+        return [_Record(r[0], r[1]) for r in rows]
+
+
+def _blocking_keys(record: _Record) -> Set[str]:
+    keys = set()
+    for token in record.norm_name.split():
+        if len(token) >= 3:
+            keys.add(f"t:{token}")
+            keys.add(f"p:{token[:4]}")  # Catches typos after the 4th letter
+    if record.email:
+        keys.add(f"e:{record.email}")
+    for phone in record.phones:
+        keys.add(f"ph:{phone}")
+    return keys
+
+
+def score_pair(a: _Record, b: _Record, threshold: float = 0.0) -> Tuple[float, List[str]]:
+    """Similarity score and the reasons behind it (name scoring stops early once below threshold)"""
+    reasons = []
+    if a.email and a.email == b.email:
+        reasons.append("same email")
+    if a.phones & b.phones:
+        reasons.append("same phone")
+    if a.norm_name and a.norm_name == b.norm_name:
+        reasons.append("same normalized name")
+
+    if reasons:
+        return 1.0, reasons
+
+    if not a.grams or not b.grams:
+        return 0.0, []
+    name_score = len(a.grams & b.grams) / len(a.grams | b.grams)
+    if name_score < threshold and name_score >= MIN_TRIGRAM_OVERLAP:
+        name_score = max(name_score, token_similarity(a.norm_name, b.norm_name, threshold))
+    return name_score, ["similar name"]
+
+
+def find_duplicates(entity: str, threshold: float = DEFAULT_THRESHOLD, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Find likely duplicate pairs for an entity type
+
+    Args:
+        entity: person, lp, gp or distributor
+        threshold: Minimum similarity score (0-1)
+        limit: Max pairs to return (best first)
+
+    Returns:
+        List of {entity, score, reasons, a: {id, name}, b: {id, name}}
+    """
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity: {entity}")
+
+    records = _load_records(entity)
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for index, record in enumerate(records):
+        for key in _blocking_keys(record):
+            blocks[key].append(index)
+
+    candidates: Set[Tuple[int, int]] = set()
+    for members in blocks.values():
+        if 1 < len(members) <= MAX_BLOCK_SIZE:
+            candidates.update(combinations(members, 2))
+
+    results = []
+    for i, j in candidates:
+        a, b = records[i], records[j]
+        score, reasons = score_pair(a, b, threshold)
+        if score >= threshold:
+            first, second = (a, b) if a.id < b.id else (b, a)
+            results.append({
+                "entity": entity,
+                "score": round(score, 4),
+                "reasons": reasons,
+                "a": {"id": first.id, "name": first.name},
+                "b": {"id": second.id, "name": second.name},
+            })
+
+    results.sort(key=lambda r: (-r["score"], r["a"]["id"], r["b"]["id"]))
+    return results[:limit] if limit else results
+
+
+# Merging
+def merge_entities(entity: str, keep_id: int, merge_id: int):
+    """
+    Merge merge_id into keep_id in one transaction
+
+    Every link table is repointed to keep_id (rows that would collide with an
+    existing link of keep_id are dropped), empty fields of the kept record are
+    filled from the merged one, and the merged record is deleted.
+
+    Returns:
+        The kept record, or None if either id doesn't exist
+    """
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity: {entity}")
+    if keep_id == merge_id:
+        raise ValueError("Cannot merge a record into itself")
+
+    model, references = ENTITIES[entity]
+    with get_session() as session:
+        keep = session.get(model, keep_id)
+        merged = session.get(model, merge_id)
+        if not keep or not merged:
+            return None
+
+        for table_model, column_name in references:
+            table = table_model.__table__
+            column = table.c[column_name]
+            # OR IGNORE skips rows whose composite key already exists for keep_id
+            session.execute(
+                update(table).where(column == merge_id).values({column_name: keep_id}).prefix_with("OR IGNORE")
+            )
+            session.execute(delete(table).where(column == merge_id))
+
+        # Funds reference GPs by Notion id
+        if entity == "gp" and merged.notion_id:
+            new_notion_id = keep.notion_id or merged.notion_id
+            session.execute(
+                update(Fund.__table__)
+                .where(Fund.__table__.c.gp_notion_id == merged.notion_id)
+                .values(gp_notion_id=new_notion_id)
+            )
+
+        fill = {
+            key: value
+            for key, value in merged.dict().items()
+            if key != "id" and value not in (None, "") and getattr(keep, key) in (None, "")
+        }
+        session.delete(merged)
+        session.flush()  # Free merged's unique notion_id before the kept record takes it
+
+        for key, value in fill.items():
+            setattr(keep, key, value)
+        session.add(keep)
+        session.commit()
+        session.refresh(keep)
+        return keep
@@ -0,0 +1,142 @@
+"""
+Normalized multi-value fields
+Notion multi-selects are stored as comma-joined strings ("LP, GP"). Each value
+is also kept as a FacetValue row so "people of type GP" or "funds in sector X"
+is an index lookup instead of a LIKE scan. Rows follow every ORM flush; the
+raw-SQL importers rebuild them once they're done.
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, event, exists, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from database import LP, GP, Person, Fund, Note, FacetValue, get_session
+
+
+# entity -> (model, comma-joined columns)
+MULTI_VALUE_FIELDS = {
+    "lp": (LP, ["location", "intl_alts", "intl_mf", "local_alts", "local_mf"]),
+    "gp": (GP, ["location", "other_strategies"]),
+    "person": (Person, ["people_type", "location"]),
+    "fund": (Fund, ["sectors"]),
+    "note": (Note, ["contact_type", "local_mf", "local_alts", "intl_mf", "intl_alts"]),
+}
+
+_ENTITY_BY_MODEL = {model: entity for entity, (model, _) in MULTI_VALUE_FIELDS.items()}
+
+
+def entity_for_model(model) -> Optional[str]:
+    return _ENTITY_BY_MODEL.get(model)
+
+
+def multi_value_fields(entity: str) -> List[str]:
+    return MULTI_VALUE_FIELDS[entity][1] if entity in MULTI_VALUE_FIELDS else []
+
+
+def split_values(text: Optional[str]) -> List[str]:
+    """Distinct non-empty items of a comma-joined string, in order"""
+    if not text:
+        return []
+    return list(dict.fromkeys(part.strip() for part in str(text).split(",") if part.strip()))
+
+
+def facet_rows(entity: str, entity_id: int, record) -> List[dict]:
+    """FacetValue rows for a record (model instance or column mapping)"""
+    get = record.get if isinstance(record, Mapping) else lambda field: getattr(record, field, None)
+    return [
+        {"entity": entity, "entity_id": entity_id, "field": field, "value": value}
+        for field in multi_value_fields(entity)
+        for value in split_values(get(field))
+    ]
+
+
+def sync_facet_values(connection, entity: str, records: Iterable, removed_ids: Iterable[int] = ()):
+    """Rewrite the FacetValue rows of records (and drop those of removed_ids)"""
+    table = FacetValue.__table__
+    records = list(records)
+    entity_ids = [record.id for record in records] + list(removed_ids)
+    if entity_ids:
+        connection.execute(delete(table).where(table.c.entity == entity, table.c.entity_id.in_(entity_ids)))
+    rows = [row for record in records for row in facet_rows(entity, record.id, record)]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_after_flush(session: Session, flush_context):
+    """Rewrite the FacetValue rows of records inserted, changed or deleted by this flush"""
+    changed: Dict[str, Dict[int, object]] = {}
+    removed: Dict[str, List[int]] = {}
+
+    for obj in session.new | session.dirty:
+        entity = _ENTITY_BY_MODEL.get(type(obj))
+        if entity is None or obj.id is None:
+            continue
+        state = inspect(obj)
+        if obj in session.new or any(state.attrs[f].history.has_changes() for f in multi_value_fields(entity)):
+            changed.setdefault(entity, {})[obj.id] = obj
+    for obj in session.deleted:
+        entity = _ENTITY_BY_MODEL.get(type(obj))
+        if entity is not None and obj.id is not None:
+            removed.setdefault(entity, []).append(obj.id)
+
+    if not changed and not removed:
+        return
+    connection = session.connection()
+    for entity in set(changed) | set(removed):
+        sync_facet_values(connection, entity, changed.get(entity, {}).values(), removed.get(entity, []))
+
+
+def rebuild_facet_values(entities: Optional[Iterable[str]] = None) -> int:
+    """
+    Rebuild FacetValue rows from the source columns
+
+    Used after imports that write with raw SQL (no ORM flush to hook into)
+    and to backfill databases created before the table existed.
+
+    Args:
+        entities: Entities to rebuild (None = all)
+
+    Returns:
+        Number of rows written
+    """
+    total = 0
+    with get_session() as session:
+        connection = session.connection()
+        for entity in entities or MULTI_VALUE_FIELDS:
+            model, fields = MULTI_VALUE_FIELDS[entity]
+            table = model.__table__
+            connection.execute(delete(FacetValue.__table__).where(FacetValue.__table__.c.entity == entity))
+            rows = []
+            for record in connection.execute(select(table.c.id, *[table.c[f] for f in fields])).mappings():
+                rows.extend(facet_rows(entity, record["id"], record))
+            if rows:
+                connection.execute(FacetValue.__table__.insert(), rows)
+            total += len(rows)
+        session.commit()
+    return total
+
+
+def backfill_facet_values() -> int:
+    """
+    Rebuild the rows of entities that have records missing theirs
+
+    Covers databases that predate the table and rows written by ORM code
+    before the flush hook was registered for every writer. One NOT EXISTS
+    probe per entity, so a complete index costs a few cheap queries.
+    """
+    facet = FacetValue.__table__
+    stale = []
+    with get_session() as session:
+        for entity, (model, fields) in MULTI_VALUE_FIELDS.items():
+            table = model.__table__
+            has_values = or_(*[func.trim(func.replace(func.coalesce(table.c[f], ""), ",", "")) != "" for f in fields])
+            missing = select(table.c.id).where(
+                has_values,
+                ~exists().where(facet.c.entity == entity, facet.c.entity_id == table.c.id)
+            ).limit(1)
+            if session.execute(missing).first():
+                stale.append(entity)
+    return rebuild_facet_values(stale) if stale else 0
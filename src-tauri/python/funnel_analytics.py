@@ -0,0 +1,179 @@
+"""
+Sales funnel analytics across funds
+Stage counts, ticket sums and weighted pipeline value for every fund come from
+one GROUP BY over FundLPInterest, and stage-to-stage conversion rates per time
+window from one GROUP BY over the FundLPInterestChange log, so a portfolio
+dashboard is a single request however many funds and LPs there are.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, bindparam, cast, func, literal, select
+from sqlmodel import Session
+
+from database import LP, Fund, FundLPInterest, FundLPInterestChange
+
+# Top to bottom, as in SalesFunnel.svelte
+STAGES = [
+    "commitment", "due_diligence", "interested", "meeting",
+    "meeting_offered", "no_reply", "low_probability", "inactive",
+]
+
+# Rough probability that an LP at a stage ends up investing (for weighted pipeline value)
+STAGE_WEIGHTS = {
+    "commitment": 1.0,
+    "due_diligence": 0.5,
+    "interested": 0.25,
+    "meeting": 0.1,
+    "meeting_offered": 0.05,
+    "no_reply": 0.0,
+    "low_probability": 0.02,
+    "inactive": 0.0,
+}
+
+# Progression order; a transition "advances" when it moves further along it
+PIPELINE = ["meeting_offered", "meeting", "interested", "due_diligence", "commitment"]
+
+
+def _advances(from_stage: str, to_stage: str) -> bool:
+    if to_stage not in PIPELINE:
+        return False
+    return from_stage not in PIPELINE or PIPELINE.index(to_stage) > PIPELINE.index(from_stage)
+
+
+def _empty_stage() -> dict:
+    return {"count": 0, "investment_low": 0.0, "investment_high": 0.0, "weighted_value": 0.0}
+
+
+def stage_summary(session: Session, fund_ids: Optional[List[int]] = None) -> dict:
+    """
+    Per-fund stage counts, summed LP ticket sizes and weighted pipeline value
+
+    LPs without a FundLPInterest row count as inactive, as in the funnel view.
+    The weighted value uses each LP's ticket midpoint (low/high, or whichever
+    is known) times STAGE_WEIGHTS.
+
+    Returns:
+        {funds: [{fund_id, fund_name, target_mn, stages, weighted_pipeline}], totals: {...}}
+    """
+    ticket = (func.coalesce(LP.investment_low, LP.investment_high) + func.coalesce(LP.investment_high, LP.investment_low)) / 2.0
+    active = (
+        select(
+            FundLPInterest.fund_id,
+            FundLPInterest.interest,
+            func.count(),
+            func.sum(LP.investment_low),
+            func.sum(LP.investment_high),
+            func.sum(ticket)
+        )
+        .join(LP, LP.id == FundLPInterest.lp_id)
+        .where(FundLPInterest.interest != "inactive")
+        .group_by(FundLPInterest.fund_id, FundLPInterest.interest)
+    )
+    funds = select(Fund.id, Fund.fund_name, Fund.target_mn).order_by(Fund.id)
+    if fund_ids is not None:
+        active = active.where(FundLPInterest.fund_id.in_(fund_ids))
+        funds = funds.where(Fund.id.in_(fund_ids))
+
+    lp_count, lp_low, lp_high = session.execute(
+        select(func.count(), func.coalesce(func.sum(LP.investment_low), 0.0), func.coalesce(func.sum(LP.investment_high), 0.0))
+    ).one()
+
+    summaries = {}
+    for fund_id, fund_name, target_mn in session.execute(funds):
+        summaries[fund_id] = {
+            "fund_id": fund_id,
+            "fund_name": fund_name,
+            "target_mn": target_mn,
+            "stages": {stage: _empty_stage() for stage in STAGES},
+            "weighted_pipeline": 0.0,
+        }
+
+    for fund_id, interest, count, low, high, mid in session.execute(active):
+        if fund_id not in summaries:
+            continue  # Interest rows of a deleted fund
+        stage = summaries[fund_id]["stages"].setdefault(interest, _empty_stage())
+        stage["count"] += count
+        stage["investment_low"] += low or 0.0
+        stage["investment_high"] += high or 0.0
+        stage["weighted_value"] += (mid or 0.0) * STAGE_WEIGHTS.get(interest, 0.0)
+
+    totals = {"stages": {stage: _empty_stage() for stage in STAGES}, "weighted_pipeline": 0.0}
+    for summary in summaries.values():
+        stages = summary["stages"]
+        # Every LP not at an active stage is inactive for this fund
+        stages["inactive"] = {
+            "count": lp_count - sum(s["count"] for k, s in stages.items() if k != "inactive"),
+            "investment_low": lp_low - sum(s["investment_low"] for k, s in stages.items() if k != "inactive"),
+            "investment_high": lp_high - sum(s["investment_high"] for k, s in stages.items() if k != "inactive"),
+            "weighted_value": 0.0,
+        }
+        summary["weighted_pipeline"] = sum(s["weighted_value"] for s in stages.values())
+        for key, values in stages.items():
+            total = totals["stages"].setdefault(key, _empty_stage())
+            for field, value in values.items():
+                total[field] += value
+        totals["weighted_pipeline"] += summary["weighted_pipeline"]
+
+    return {"funds": list(summaries.values()), "totals": totals}
+
+
+def conversion_rates(
+    session: Session,
+    fund_ids: Optional[List[int]] = None,
+    window_days: int = 30,
+    windows: int = 6,
+    until: Optional[datetime] = None
+) -> dict:
+    """
+    Stage transitions per time window, from the FundLPInterestChange log
+
+    Args:
+        fund_ids: Funds to include (None = all)
+        window_days: Length of each window
+        windows: Number of windows, ending at until
+        until: End of the last window (default now)
+
+    Returns:
+        {window_days, windows: [{start, end, transitions: [{from, to, count, rate}],
+        advance_rate: {stage: share of moves out of it that went further along the pipeline}}]}
+        rate is the share of the moves out of "from" (in that window) that went to "to".
+    """
+    until = until or datetime.now()
+    start = until - timedelta(days=window_days * windows)
+    # 0 = most recent window
+    age = cast((func.julianday(bindparam("until", until)) - func.julianday(FundLPInterestChange.changed_at)) / literal(window_days), Integer)
+    statement = (
+        select(age.label("age"), FundLPInterestChange.from_interest, FundLPInterestChange.to_interest, func.count())
+        .where(FundLPInterestChange.changed_at >= start, FundLPInterestChange.changed_at < until)
+        .group_by(age, FundLPInterestChange.from_interest, FundLPInterestChange.to_interest)
+    )
+    if fund_ids is not None:
+        statement = statement.where(FundLPInterestChange.fund_id.in_(fund_ids))
+
+    counts: Dict[int, Dict[tuple, int]] = defaultdict(lambda: defaultdict(int))
+    for window_age, from_stage, to_stage, count in session.execute(statement):
+        counts[min(window_age, windows - 1)][(from_stage, to_stage)] += count
+
+    result = []
+    for window_age in reversed(range(windows)):
+        moves = counts.get(window_age, {})
+        out_of: Dict[str, int] = defaultdict(int)
+        advanced: Dict[str, int] = defaultdict(int)
+        for (from_stage, to_stage), count in moves.items():
+            out_of[from_stage] += count
+            if _advances(from_stage, to_stage):
+                advanced[from_stage] += count
+        end = until - timedelta(days=window_days * window_age)
+        result.append({
+            "start": (end - timedelta(days=window_days)).isoformat(),
+            "end": end.isoformat(),
+            "transitions": [
+                {"from": from_stage, "to": to_stage, "count": count, "rate": count / out_of[from_stage]}
+                for (from_stage, to_stage), count in sorted(moves.items(), key=lambda item: -item[1])
+            ],
+            "advance_rate": {stage: advanced[stage] / total for stage, total in out_of.items()},
+        })
+    return {"window_days": window_days, "windows": result}
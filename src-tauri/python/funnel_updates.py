@@ -0,0 +1,112 @@
+"""
+Set-based funnel stage updates
+Moving LPs between stages of a fund's sales funnel or a roadshow's LP funnel
+is one INSERT ... ON CONFLICT DO UPDATE for all of them, with the latest note
+shared by each LP and the fund/roadshow found in one windowed query, instead
+of a lookup, an intersection and a save per LP. Sales funnel changes are also
+appended to FundLPInterestChange for conversion analytics.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session
+
+import change_feed
+from database import (
+    FundLPInterest, FundLPInterestChange, RoadshowLPStatus, Note, NoteLPLink, NoteFundLink, NoteRoadshowLink
+)
+
+# funnel -> (status model, owner column, stage column, note link model)
+FUNNELS = {
+    "fund": (FundLPInterest, "fund_id", "interest", NoteFundLink),
+    "roadshow": (RoadshowLPStatus, "roadshow_id", "status", NoteRoadshowLink),
+}
+
+# Funnels whose stage changes are logged
+CHANGE_LOGS = {"fund": FundLPInterestChange}
+
+
+def latest_contacts(session: Session, funnel: str, owner_id: int, lp_ids: Optional[List[int]] = None) -> Dict[int, Tuple]:
+    """lp_id -> (date, note id) of the latest note linked to both the LP and the fund/roadshow (None = all LPs)"""
+    _, owner, _, note_link = FUNNELS[funnel]
+    link = note_link.__table__
+    ranked = (
+        select(
+            NoteLPLink.lp_id,
+            Note.id.label("note_id"),
+            Note.date,
+            func.row_number().over(
+                partition_by=NoteLPLink.lp_id,
+                order_by=(Note.date.desc(), Note.id.desc())
+            ).label("rank")
+        )
+        .join(Note, Note.id == NoteLPLink.note_id)
+        .join(link, link.c.note_id == NoteLPLink.note_id)
+        .where(link.c[owner] == owner_id)
+    )
+    if lp_ids is not None:
+        ranked = ranked.where(NoteLPLink.lp_id.in_(lp_ids))
+    ranked = ranked.subquery()
+    rows = session.execute(select(ranked.c.lp_id, ranked.c.date, ranked.c.note_id).where(ranked.c.rank == 1))
+    return {lp_id: (date, note_id) for lp_id, date, note_id in rows}
+
+
+def set_stages(session: Session, funnel: str, owner_id: int, stages: Dict[int, str]) -> list:
+    """
+    Upsert the stage of many LPs in one statement (caller commits)
+
+    Args:
+        funnel: "fund" or "roadshow"
+        owner_id: Fund or roadshow id
+        stages: lp_id -> interest (fund) or status (roadshow)
+
+    Returns:
+        The stored records, in the order of stages
+    """
+    if not stages:
+        return []
+    model, owner, stage, _ = FUNNELS[funnel]
+    table = model.__table__
+    contacts = latest_contacts(session, funnel, owner_id, list(stages))
+    if funnel in CHANGE_LOGS:
+        previous = dict(session.execute(
+            select(table.c.lp_id, table.c[stage]).where(table.c[owner] == owner_id, table.c.lp_id.in_(list(stages)))
+        ).all())
+
+    statement = insert(table).values([
+        {
+            owner: owner_id,
+            "lp_id": lp_id,
+            stage: value,
+            "last_contact_date": contacts.get(lp_id, (None, None))[0],
+            "latest_note_id": contacts.get(lp_id, (None, None))[1],
+        }
+        for lp_id, value in stages.items()
+    ])
+    # LPs without a shared note keep their last contact, as the single-LP update always did
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c[owner], table.c.lp_id],
+        set_={
+            stage: statement.excluded[stage],
+            "last_contact_date": func.coalesce(statement.excluded.last_contact_date, table.c.last_contact_date),
+            "latest_note_id": func.coalesce(statement.excluded.latest_note_id, table.c.latest_note_id),
+        }
+    ).returning(*table.c).execution_options(**change_feed.RECORDED)
+
+    records = {row.lp_id: model(**row._mapping) for row in session.execute(statement)}
+    for row in records.values():
+        change_feed.record(session, table.name, {owner: owner_id, "lp_id": row.lp_id}, "upsert", row.dict())
+
+    if funnel in CHANGE_LOGS:
+        now = datetime.now()
+        changes = [
+            {owner: owner_id, "lp_id": lp_id, "from_interest": previous.get(lp_id, "inactive"), "to_interest": value, "changed_at": now}
+            for lp_id, value in stages.items()
+            if previous.get(lp_id, "inactive") != value
+        ]
+        if changes:
+            session.execute(CHANGE_LOGS[funnel].__table__.insert(), changes)
+    return [records[lp_id] for lp_id in stages]
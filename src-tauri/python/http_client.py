@@ -0,0 +1,242 @@
+"""
+Shared HTTP client for the AI server and Notion API
+Keep-alive connection pooling, per-host concurrency limits, retries with
+jittered backoff and a per-host circuit breaker
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Statuses worth retrying (rate limiting and transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Per-host concurrency limits; Notion allows ~3 requests/second per integration
+HOST_LIMITS = {"api.notion.com": 3}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a host's circuit is open"""
+
+
+class CircuitBreaker:
+    """Open after consecutive connection failures, then allow one trial call after a cooldown"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_thread: Optional[int] = None  # Thread sending the half-open trial call
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and self._trial_thread is None:
+                self._trial_thread = threading.get_ident()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_thread = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_thread = None
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let another call be the trial if this thread's trial ended without an outcome"""
+        with self._lock:
+            if self._trial_thread == threading.get_ident():
+                self._trial_thread = None
+
+
+class HTTPClient:
+    """Pooled requests.Session shared by all outbound calls"""
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        default_host_limit: int = 4,
+        host_limits: Optional[Dict[str, int]] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        status_ttl: float = 15.0
+    ):
+        """
+        Initialize HTTP client
+
+        Args:
+            pool_size: Keep-alive connections kept per host
+            default_host_limit: Max concurrent requests per host
+            host_limits: Per-host overrides of default_host_limit
+            max_retries: Retries for connection errors and RETRY_STATUSES
+            backoff_base: First backoff ceiling in seconds (doubles per attempt, full jitter)
+            backoff_max: Backoff ceiling in seconds
+            failure_threshold: Consecutive connection failures that open a host's circuit
+            reset_timeout: Seconds an open circuit waits before a trial request
+            status_ttl: Seconds check_available() results are cached
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.default_host_limit = default_host_limit
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.status_ttl = status_ttl
+
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._status_cache: Dict[str, Tuple[bool, float]] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                limit = self.host_limits.get(host, self.default_host_limit)
+                self._semaphores[host] = threading.BoundedSemaphore(limit)
+            return self._semaphores[host]
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Circuit breaker for the URL's host"""
+        host = self._host(url)
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _send(self, method: str, url: str, retries: Optional[int], **kwargs) -> requests.Response:
+        breaker = self.breaker(url)
+        retries = self.max_retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"Circuit open for {self._host(url)}, not sending request")
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                breaker.record_failure()
+                if attempt >= retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            except requests.exceptions.RequestException:
+                # Read timeouts etc. mean the host answered the connection
+                breaker.record_success()
+                raise
+            finally:
+                # Any other exception (e.g. a bad argument) says nothing about the host
+                breaker.release_trial()
+
+            breaker.record_success()
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                delay = self._backoff(attempt, response)
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Send a request over the shared session
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            retries: Override max_retries (use 0 for non-replayable bodies such as open files)
+            **kwargs: Passed to requests.Session.request
+
+        Returns:
+            Response (status is not checked)
+        """
+        with self._semaphore(self._host(url)):
+            return self._send(method, url, retries, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> Iterator[requests.Response]:
+        """Streaming request; holds the host's concurrency slot until the body is consumed"""
+        with self._semaphore(self._host(url)):
+            response = self._send(method, url, retries, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                response.close()
+
+    def check_available(self, url: str, timeout: float = 5) -> bool:
+        """GET url and report whether it answered 200; cached for status_ttl, False while the circuit is open"""
+        cached = self._status_cache.get(url)
+        if cached and time.monotonic() - cached[1] < self.status_ttl:
+            return cached[0]
+
+        try:
+            response = self.request("GET", url, retries=0, timeout=timeout)
+            available = response.status_code == 200
+        except requests.exceptions.RequestException:
+            available = False
+
+        self._status_cache[url] = (available, time.monotonic())
+        return available
+
+
+_default_client: Optional[HTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """Shared client instance"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
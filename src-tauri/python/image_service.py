@@ -0,0 +1,166 @@
+"""
+Resized WebP renditions of note images
+Renditions are generated on first request and cached on disk keyed by the
+source image's SHA-256 and the rendition size, so they never go stale
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from ai_cache import hash_file
+from database import DB_DIR, NoteImage, get_session
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow missing: renditions fall back to the original file
+    Image = None
+
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "notion_images")
+RENDITIONS_DIR = os.path.join(DB_DIR, "image_cache")
+
+# Rendition name -> max width/height in pixels
+RENDITION_SIZES = {
+    "thumb": 320,
+    "medium": 1280,
+}
+WEBP_QUALITY = 80
+
+
+class ImageService:
+    """Lazily generates and caches WebP renditions of images in images_dir"""
+
+    def __init__(self, images_dir: str = IMAGES_DIR, cache_dir: str = RENDITIONS_DIR):
+        self.images_dir = images_dir
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._hashes: Dict[str, Tuple[float, int, str]] = {}  # path -> (mtime, size, sha256)
+        self._prewarm_thread: Optional[threading.Thread] = None
+        self.prewarm_status = {"running": False, "total": 0, "done": 0, "missing": 0, "failed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    def source_path(self, filename: str) -> Optional[str]:
+        """Absolute path of an image in images_dir, or None if missing (rejects path traversal)"""
+        name = os.path.basename(filename)
+        if not name or name != filename or name.startswith("."):
+            return None
+        path = os.path.join(self.images_dir, name)
+        return path if os.path.isfile(path) else None
+
+    def source_hash(self, path: str) -> str:
+        """SHA-256 of a source image, memoized until its mtime or size changes"""
+        stat = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+        digest = hash_file(path)
+        self._hashes[path] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+    def _rendition_path(self, digest: str, size: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}_{size}.webp")
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def rendition(self, filename: str, size: str) -> Optional[Tuple[str, str]]:
+        """
+        Get (path, etag) of a rendition, generating it on first use
+
+        Args:
+            filename: Image file name inside images_dir
+            size: Key of RENDITION_SIZES
+
+        Returns:
+            (path, etag), or None if the source image doesn't exist.
+            Without Pillow the original image path is returned.
+        """
+        if size not in RENDITION_SIZES:
+            raise ValueError(f"Unknown rendition size: {size}")
+
+        source = self.source_path(filename)
+        if not source:
+            return None
+
+        digest = self.source_hash(source)
+        if not self.enabled:
+            return source, digest
+
+        path = self._rendition_path(digest, size)
+        if not os.path.exists(path):
+            # One generator per rendition; concurrent requests wait and reuse its output
+            with self._key_lock(path):
+                if not os.path.exists(path):
+                    self._render(source, path, RENDITION_SIZES[size])
+        return path, f"{digest[:16]}-{size}"
+
+    @staticmethod
+    def _render(source: str, target: str, max_side: int):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+            # Write to a temp file first so readers never see a partial image
+            tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            image.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(tmp_path, target)
+
+    # Pre-warming
+    def prewarm(self, filenames: Iterable[str]):
+        """Generate every rendition size for the given images (blocking)"""
+        filenames = list(filenames)
+        self.prewarm_status.update(running=True, total=len(filenames), done=0, missing=0, failed=0)
+        try:
+            for filename in filenames:
+                try:
+                    if not all(self.rendition(filename, size) for size in RENDITION_SIZES):
+                        self.prewarm_status["missing"] += 1
+                        continue
+                    self.prewarm_status["done"] += 1
+                except Exception as e:
+                    print(f"Error creating renditions for {filename}: {e}")
+                    self.prewarm_status["failed"] += 1
+        finally:
+            self.prewarm_status["running"] = False
+
+    def start_prewarm(self) -> bool:
+        """Pre-warm renditions for all note images in a background thread; False if already running"""
+        with self._lock:
+            if self._prewarm_thread and self._prewarm_thread.is_alive():
+                return False
+            self.prewarm_status.update(running=True, total=0, done=0, missing=0, failed=0)
+            self._prewarm_thread = threading.Thread(
+                target=lambda: self.prewarm(note_image_filenames()),
+                name="image-prewarm",
+                daemon=True
+            )
+            self._prewarm_thread.start()
+            return True
+
+
+def note_image_filenames() -> list:
+    """Unique image file names referenced by notes"""
+    with get_session() as session:
+        rows = session.query(NoteImage.path).distinct().all()
+
+    filenames = []
+    seen = set()
+    for (path,) in rows:
+        name = os.path.basename(path)
+        if name and name not in seen:
+            seen.add(name)
+            filenames.append(name)
+    return filenames
+
+
+# Shared service used by the backend
+image_service = ImageService()
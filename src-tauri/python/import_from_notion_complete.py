@@ -10,6 +10,10 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+from database import create_db_and_tables
+from note_images import extract_images, backfill_note_images
+from facet_index import rebuild_facet_values
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "../../db/crm.db")
 
 
@@ -92,7 +96,7 @@ def clear_old_data():
 
     # Clear in order (respecting foreign keys)
     tables = [
-        'todo', 'notegplink', 'notelplink', 'notedistributorlink',
+        'todo', 'noteimage', 'notegplink', 'notelplink', 'notedistributorlink',
         'gplink', 'gppersonlink', 'lppersonlink', 'distributorpersonlink',
         'note', 'person', 'gp', 'lp', 'distributor'
     ]
@@ -109,6 +113,13 @@ def clear_old_data():
     print("\n✓ Old data cleared\n")
 
 
+def index_facet_values(entity, label):
+    """Rebuild FacetValue rows for an entity (raw sqlite3 writes skip the ORM hook)"""
+    create_db_and_tables()
+    count = rebuild_facet_values([entity])
+    print(f"  ✓ Indexed {count} {label} multi-select values\n")
+
+
 def extract_text_from_rich_text(rich_text_array):
     """Extract plain text from Notion rich text"""
     if not rich_text_array:
@@ -251,7 +262,8 @@ def import_lps(export_file):
 
     conn.commit()
     conn.close()
-    print(f"  ✓ Imported {len(data['pages'])} LPs\n")
+    print(f"  ✓ Imported {len(data['pages'])} LPs")
+    index_facet_values("lp", "LP")
 
 
 def import_gps(export_file):
@@ -294,7 +306,8 @@ def import_gps(export_file):
 
     conn.commit()
     conn.close()
-    print(f"  ✓ Imported {len(data['pages'])} GPs\n")
+    print(f"  ✓ Imported {len(data['pages'])} GPs")
+    index_facet_values("gp", "GP")
 
 
 def import_people(export_file):
@@ -378,7 +391,8 @@ def import_people(export_file):
     print(f"  ✓ Imported {len(data['pages'])} people")
     print(f"  ✓ Created {len(lp_person_links)} LP-Person relationships")
     print(f"  ✓ Created {len(gp_person_links)} GP-Person relationships")
-    print(f"  ✓ Created {len(dist_person_links)} Distributor-Person relationships\n")
+    print(f"  ✓ Created {len(dist_person_links)} Distributor-Person relationships")
+    index_facet_values("person", "people")
 
 
 def import_notes(export_file):
@@ -434,11 +448,8 @@ def import_notes(export_file):
         blocks = page.get('blocks', [])
         content_json = json.dumps(blocks) if blocks else None
 
-        # Extract image paths
-        image_paths = []
-        for block in blocks:
-            if block.get('type') == 'image' and block.get('local_image_path'):
-                image_paths.append(block['local_image_path'])
+        # Extract image paths (including images nested in toggles/columns)
+        image_paths = [path for _, path in extract_images(blocks)]
         image_paths_str = ','.join(image_paths) if image_paths else None
 
         # Parse date (use page created_time as fallback if no date)
@@ -520,7 +531,13 @@ def import_notes(export_file):
     print(f"  ✓ Created {gp_links} Note-GP relationships")
     print(f"  ✓ Created {lp_links} Note-LP relationships")
     print(f"  ✓ Created {dist_links} Note-Distributor relationships")
-    print(f"  ✓ Created {fund_links} Note-Fund relationships\n")
+    print(f"  ✓ Created {fund_links} Note-Fund relationships")
+
+    # Index images (hash, dimensions) from the imported block trees
+    create_db_and_tables()
+    image_count = backfill_note_images(only_if_empty=False)
+    print(f"  ✓ Indexed {image_count} note images")
+    index_facet_values("note", "note")
 
 
 def main():
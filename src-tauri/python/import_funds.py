@@ -5,7 +5,7 @@ Import Funds from Notion export JSON
 
 import json
 from datetime import datetime
-from database import Fund, get_session
+from database import Fund, get_session, create_db_and_tables
 from sqlmodel import select
 
 
@@ -67,6 +67,8 @@ def import_funds(json_file_path):
     pages = data.get('pages', [])
     print(f"Found {len(pages)} funds to import")
 
+    create_db_and_tables()  # FacetValue table must exist before the first flush
+
     with get_session() as session:
         imported = 0
         updated = 0
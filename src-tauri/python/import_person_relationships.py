@@ -5,10 +5,46 @@ Parses Notion link format and creates relationships
 
 import csv
 import re
+from collections import defaultdict
 from database import Person, GP, LP, GPPersonLink, LPPersonLink, get_session, engine
+from dedup import normalize_name
 from sqlmodel import Session, select
 
 
+class NameLookup:
+    """
+    Name -> id, by exact name first and then by normalized name
+
+    The normalized key ("Afore Banorte" == "Banorte Afore") drops stopwords,
+    so different rows can share it ("Banorte" / "Grupo Banorte"); such a key
+    is only used when it belongs to a single row, and is logged otherwise.
+    """
+
+    def __init__(self, rows, label: str):
+        self.label = label
+        self.exact = {}
+        self.normalized = defaultdict(set)
+        for row_id, name in rows:
+            self.exact[name] = row_id
+            self.normalized[normalize_name(name)].add(row_id)
+        self._reported = set()
+
+    def __len__(self):
+        return len(self.exact)
+
+    def get(self, name: str):
+        if name in self.exact:
+            return self.exact[name]
+        key = normalize_name(name)
+        ids = self.normalized.get(key, set())
+        if len(ids) == 1:
+            return next(iter(ids))
+        if len(ids) > 1 and key not in self._reported:
+            self._reported.add(key)
+            print(f"⚠ Skipping ambiguous {self.label} name '{name}': matches {len(ids)} records")
+        return None
+
+
 def extract_names_from_notion_links(text):
     """Extract names from Notion link format"""
     if not text or text.strip() == '':
@@ -23,12 +59,12 @@ def import_gp_person_relationships(csv_path: str):
     """Import GP-Person relationships from People CSV"""
 
     with Session(engine) as session:
-        # Build lookup dictionaries
+        # Build lookups (exact name, then a unique normalized name: "Afore Banorte" matches "Banorte Afore")
         print("Building GP lookup...")
-        gps = {gp.name: gp.id for gp in session.exec(select(GP)).all()}
+        gps = NameLookup(session.exec(select(GP.id, GP.name)).all(), "GP")
 
         print("Building Person lookup...")
-        people = {person.name: person.id for person in session.exec(select(Person)).all()}
+        people = NameLookup(session.exec(select(Person.id, Person.name)).all(), "person")
 
         print(f"\nFound {len(gps)} GPs and {len(people)} People in database\n")
 
@@ -38,18 +74,16 @@ def import_gp_person_relationships(csv_path: str):
             links_created = 0
             for row in reader:
                 person_name = row.get('Name', '').strip()
-                if not person_name or person_name not in people:
+                person_id = people.get(person_name) if person_name else None
+                if not person_id:
                     continue
 
-                person_id = people[person_name]
-
                 # Parse GP links
                 gp_names = extract_names_from_notion_links(row.get('🌆 CRM GPs', ''))
 
                 for gp_name in gp_names:
-                    if gp_name in gps:
-                        gp_id = gps[gp_name]
-
+                    gp_id = gps.get(gp_name)
+                    if gp_id:
                         # Check if link already exists
                         existing = session.exec(
                             select(GPPersonLink).where(
@@ -72,12 +106,12 @@ def import_lp_person_relationships(csv_path: str):
     """Import LP-Person relationships from People CSV"""
 
     with Session(engine) as session:
-        # Build lookup dictionaries
+        # Build lookups (exact name, then a unique normalized name: "Afore Banorte" matches "Banorte Afore")
         print("Building LP lookup...")
-        lps = {lp.name: lp.id for lp in session.exec(select(LP)).all()}
+        lps = NameLookup(session.exec(select(LP.id, LP.name)).all(), "LP")
 
         print("Building Person lookup...")
-        people = {person.name: person.id for person in session.exec(select(Person)).all()}
+        people = NameLookup(session.exec(select(Person.id, Person.name)).all(), "person")
 
         print(f"\nFound {len(lps)} LPs and {len(people)} People in database\n")
 
@@ -87,18 +121,16 @@ def import_lp_person_relationships(csv_path: str):
             links_created = 0
             for row in reader:
                 person_name = row.get('Name', '').strip()
-                if not person_name or person_name not in people:
+                person_id = people.get(person_name) if person_name else None
+                if not person_id:
                     continue
 
-                person_id = people[person_name]
-
                 # Parse LP links
                 lp_names = extract_names_from_notion_links(row.get('💰 CRM LPs', ''))
 
                 for lp_name in lp_names:
-                    if lp_name in lps:
-                        lp_id = lps[lp_name]
-
+                    lp_id = lps.get(lp_name)
+                    if lp_id:
                         # Check if link already exists
                         existing = session.exec(
                             select(LPPersonLink).where(
@@ -0,0 +1,229 @@
+"""
+Request and SQL instrumentation
+ASGI middleware recording per-route latency histograms plus SQLAlchemy cursor
+hooks counting queries per request; exposes Prometheus text metrics, adds
+Server-Timing / X-Query-Count headers and keeps a slow-query log with
+EXPLAIN QUERY PLAN output
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+SLOW_QUERY_MS = float(os.getenv("CRM_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG_SIZE = 200
+
+# Histogram buckets in seconds (Prometheus convention)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """Queries issued while handling one request"""
+    __slots__ = ("query_count", "query_seconds")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_seconds = 0.0
+
+
+# Set by the middleware; worker threads started with copied contexts
+# (asyncio.to_thread, FastAPI's threadpool) update the same object
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("crm_request_stats", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Metrics:
+    """Process-wide request and query metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.request_count: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.request_queries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.slow_query_count = 0
+        self.slow_queries: Deque[dict] = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            self.request_latency[(method, route)].observe(seconds)
+            self.request_count[(method, route, status)] += 1
+            self.request_queries[(method, route)] += stats.query_count
+
+    def record_query(self, seconds: float):
+        with self._lock:
+            self.query_count += 1
+            self.query_seconds += seconds
+
+    def record_slow_query(self, entry: dict):
+        with self._lock:
+            self.slow_query_count += 1
+            self.slow_queries.append(entry)
+
+    def render_prometheus(self) -> str:
+        """Metrics in Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP crm_http_request_duration_seconds Request latency by route")
+            lines.append("# TYPE crm_http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self.request_latency.items()):
+                labels = f'method="{method}",route="{_escape(route)}"'
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'crm_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'crm_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.total}')
+                lines.append(f"crm_http_request_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"crm_http_request_duration_seconds_count{{{labels}}} {histogram.total}")
+
+            lines.append("# HELP crm_http_requests_total Requests by route and status")
+            lines.append("# TYPE crm_http_requests_total counter")
+            for (method, route, status), count in sorted(self.request_count.items()):
+                lines.append(
+                    f'crm_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}'
+                )
+
+            lines.append("# HELP crm_http_request_queries_total SQL queries issued by route")
+            lines.append("# TYPE crm_http_request_queries_total counter")
+            for (method, route), count in sorted(self.request_queries.items()):
+                lines.append(f'crm_http_request_queries_total{{method="{method}",route="{_escape(route)}"}} {count}')
+
+            lines.append("# HELP crm_db_queries_total SQL queries executed")
+            lines.append("# TYPE crm_db_queries_total counter")
+            lines.append(f"crm_db_queries_total {self.query_count}")
+            lines.append("# HELP crm_db_query_duration_seconds_total Time spent in SQL queries")
+            lines.append("# TYPE crm_db_query_duration_seconds_total counter")
+            lines.append(f"crm_db_query_duration_seconds_total {self.query_seconds:.6f}")
+            lines.append("# HELP crm_db_slow_queries_total Queries slower than CRM_SLOW_QUERY_MS")
+            lines.append("# TYPE crm_db_slow_queries_total counter")
+            lines.append(f"crm_db_slow_queries_total {self.slow_query_count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics = Metrics()
+
+
+# SQL hooks
+def _explain(conn, statement: str, parameters) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN for a SELECT (SQLite), run on the raw DBAPI connection"""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception:
+        return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("crm_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["crm_query_start"].pop()
+    elapsed = time.perf_counter() - started
+
+    metrics.record_query(elapsed)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.query_seconds += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        plan = None if executemany else _explain(conn, statement, parameters)
+        entry = {
+            "at": time.time(),
+            "ms": round(elapsed * 1000, 2),
+            "statement": statement,
+            "plan": plan,
+        }
+        metrics.record_slow_query(entry)
+        print(f"Slow query ({entry['ms']} ms): {statement}")
+        for line in plan or []:
+            print(f"    {line}")
+
+
+def instrument_engine(engine: Engine):
+    """Attach query counting/timing hooks to an engine (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ASGI middleware
+class InstrumentationMiddleware:
+    """
+    Times each HTTP request, counts its SQL queries and adds
+    Server-Timing / X-Query-Count response headers
+
+    Implemented as plain ASGI (not BaseHTTPMiddleware) so streaming
+    responses pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.query_seconds * 1000:.1f};desc="{stats.query_count} queries", '
+                    f"app;dur={elapsed_ms:.1f}".encode()
+                ))
+                headers.append((b"x-query-count", str(stats.query_count).encode()))
+                headers.append((b"timing-allow-origin", b"*"))  # Let the webview read Server-Timing
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_request.reset(token)
+            route = scope.get("route")
+            # Label by route template so /notes/1 and /notes/2 share a series
+            route_label = getattr(route, "path", None) or "unmatched"
+            metrics.record_request(scope["method"], route_label, status, time.perf_counter() - started, stats)
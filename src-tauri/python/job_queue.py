@@ -0,0 +1,374 @@
+"""
+Persistent background job queue for transcription and summarization
+Jobs are stored in the ProcessingJob table so they survive backend restarts
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from database import DB_DIR, Note, Todo, ProcessingJob, get_session
+
+
+AI_SERVER_URL = os.getenv("CRM_AI_SERVER_URL", "http://localhost:11434")
+SUMMARY_CHUNK_TOKENS = int(os.getenv("CRM_SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_CONCURRENCY = int(os.getenv("CRM_SUMMARY_CONCURRENCY", "2"))
+TRANSCRIPTS_DIR = os.path.join(DB_DIR, "transcripts")
+
+JOB_TYPES = ("transcribe", "summarize", "process")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# How often streamed summary output is saved to the job row
+PARTIAL_FLUSH_SECONDS = 2.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when the job was cancelled by the user"""
+
+
+def format_ai_summary(result: Dict) -> str:
+    """Render a summarization result as readable text for Note.ai_summary"""
+    lines = [result.get("summary") or ""]
+
+    key_points = result.get("key_points") or []
+    if key_points:
+        lines.append("")
+        lines.append("Key points:")
+        lines.extend(f"- {point}" for point in key_points)
+
+    for label, key in (("Fundraise", "fundraise"), ("Interest", "interest")):
+        if result.get(key):
+            lines.append("")
+            lines.append(f"{label}: {result[key]}")
+
+    return "\n".join(lines).strip()
+
+
+def _action_item_text(item) -> Optional[str]:
+    """Action items may come back as strings or as {"description": ...} objects"""
+    if isinstance(item, str):
+        return item.strip() or None
+    if isinstance(item, dict):
+        text = item.get("description") or item.get("task") or item.get("text")
+        return text.strip() if isinstance(text, str) and text.strip() else None
+    return None
+
+
+class JobQueue:
+    """SQLite-backed job queue with a pool of worker threads"""
+
+    def __init__(self, num_workers: int = 2, poll_interval: float = 2.0, server_url: str = AI_SERVER_URL):
+        """
+        Initialize job queue
+
+        Args:
+            num_workers: Number of worker threads
+            poll_interval: Seconds an idle worker waits before checking the table again
+            server_url: URL of local AI server
+        """
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.server_url = server_url
+
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._claim_lock = threading.Lock()
+
+        # job_id -> streamed LLM output so far, for live progress streaming
+        self._live_output: Dict[int, str] = {}
+
+    # Lifecycle
+    def start(self):
+        """Requeue jobs interrupted by a previous shutdown and start the workers"""
+        if self._threads:
+            return
+
+        with get_session() as session:
+            session.query(ProcessingJob).filter(ProcessingJob.status == "running").update(
+                {"status": "queued", "message": "Requeued after restart"}
+            )
+            session.commit()
+
+        self._stop.clear()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers; running jobs are requeued on next start"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    # Public API
+    def enqueue(self, note_id: int, job_type: str) -> ProcessingJob:
+        """Add a job for a note and wake an idle worker"""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        with get_session() as session:
+            job = ProcessingJob(note_id=note_id, job_type=job_type)
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: int) -> Optional[ProcessingJob]:
+        with get_session() as session:
+            return session.get(ProcessingJob, job_id)
+
+    def list_for_note(self, note_id: int) -> List[ProcessingJob]:
+        with get_session() as session:
+            return (
+                session.query(ProcessingJob)
+                .filter(ProcessingJob.note_id == note_id)
+                .order_by(ProcessingJob.id.desc())
+                .all()
+            )
+
+    def cancel(self, job_id: int) -> Optional[ProcessingJob]:
+        """Cancel a queued job immediately, or ask a running job to stop at its next step"""
+        with get_session() as session:
+            job = session.get(ProcessingJob, job_id)
+            if not job:
+                return None
+
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+            elif job.status == "running":
+                job.cancel_requested = True
+
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            return job
+
+    def partial_output(self, job_id: int) -> str:
+        """Streamed LLM output so far (in-memory while running, else the last saved copy)"""
+        if job_id in self._live_output:
+            return self._live_output[job_id]
+        job = self.get(job_id)
+        return (job.partial_output or "") if job else ""
+
+    def active_summary_job(self, note_id: int) -> Optional[ProcessingJob]:
+        """Latest job for a note that produces a summary"""
+        with get_session() as session:
+            return (
+                session.query(ProcessingJob)
+                .filter(
+                    ProcessingJob.note_id == note_id,
+                    ProcessingJob.job_type.in_(("summarize", "process"))
+                )
+                .order_by(ProcessingJob.id.desc())
+                .first()
+            )
+
+    # Worker internals
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            job_id = self._claim_next()
+            if job_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(job_id)
+
+    def _claim_next(self) -> Optional[int]:
+        """Atomically move the oldest queued job to running"""
+        with self._claim_lock, get_session() as session:
+            job = (
+                session.query(ProcessingJob)
+                .filter(ProcessingJob.status == "queued")
+                .order_by(ProcessingJob.id)
+                .first()
+            )
+            if not job:
+                return None
+
+            claimed = session.query(ProcessingJob).filter(
+                ProcessingJob.id == job.id,
+                ProcessingJob.status == "queued"
+            ).update({
+                "status": "running",
+                "started_at": datetime.now(),
+                "attempts": ProcessingJob.attempts + 1,
+                "progress": 0.0,
+                "error": None,
+            })
+            session.commit()
+            return job.id if claimed else None
+
+    def _update(self, job_id: int, **fields) -> ProcessingJob:
+        with get_session() as session:
+            job = session.get(ProcessingJob, job_id)
+            for key, value in fields.items():
+                setattr(job, key, value)
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            return job
+
+    def _reporter(self, job_id: int) -> Callable[[float, str], None]:
+        """Progress callback that also raises JobCancelled when cancellation was requested"""
+        def report(progress: float, message: str):
+            job = self._update(job_id, progress=progress, message=message)
+            if job.cancel_requested:
+                raise JobCancelled()
+        return report
+
+    def _run(self, job_id: int):
+        job = self.get(job_id)
+        report = self._reporter(job_id)
+
+        try:
+            if job.cancel_requested:
+                raise JobCancelled()
+
+            result = {}
+            if job.job_type in ("transcribe", "process"):
+                scale = 0.5 if job.job_type == "process" else 1.0
+                report(0.0, "Transcribing audio")
+                result["transcription_path"] = self._transcribe(job.note_id)
+                report(scale, "Transcription complete")
+
+            if job.job_type in ("summarize", "process"):
+                start = 0.5 if job.job_type == "process" else 0.0
+                report(start, "Summarizing")
+                result["summary"] = self._summarize(
+                    job.note_id, job_id, lambda fraction, message: report(start + (1.0 - start) * fraction, message)
+                )
+
+            self._update(
+                job_id,
+                status="completed",
+                progress=1.0,
+                message="Done",
+                result_json=json.dumps(result),
+                finished_at=datetime.now()
+            )
+
+        except JobCancelled:
+            self._update(job_id, status="cancelled", message="Cancelled", finished_at=datetime.now())
+
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=datetime.now())
+
+        finally:
+            # Keep whatever the model produced, even on timeout or cancellation
+            if job_id in self._live_output:
+                self._update(job_id, partial_output=self._live_output.pop(job_id))
+
+    def _transcribe(self, note_id: int) -> str:
+        """Transcribe the note's audio and store the transcript path on the note"""
+        with get_session() as session:
+            note = session.get(Note, note_id)
+            if not note:
+                raise ValueError("Note not found")
+            if not note.audio_path:
+                raise ValueError("Note has no audio recording")
+            audio_path = note.audio_path
+
+        from transcription_service import TranscriptionService  # Pulls in requests; imported on first job
+
+        service = TranscriptionService(server_url=self.server_url)
+        text = service.transcribe_with_whisper_api(audio_path, raise_on_error=True)
+
+        output_path = os.path.abspath(os.path.join(TRANSCRIPTS_DIR, f"note_{note_id}.txt"))
+        service.save_transcription(text, output_path)
+
+        with get_session() as session:
+            note = session.get(Note, note_id)
+            note.transcription_path = output_path
+            session.add(note)
+            session.commit()
+
+        return output_path
+
+    def _token_handler(self, job_id: int) -> Callable[[str], None]:
+        """Collect streamed fragments and periodically save them to the job row"""
+        self._live_output[job_id] = ""
+        last_flush = time.monotonic()
+
+        def on_token(fragment: str):
+            nonlocal last_flush
+            self._live_output[job_id] += fragment
+            if time.monotonic() - last_flush >= PARTIAL_FLUSH_SECONDS:
+                last_flush = time.monotonic()
+                job = self._update(job_id, partial_output=self._live_output[job_id])
+                if job.cancel_requested:
+                    raise JobCancelled()
+
+        return on_token
+
+    def _summarize(self, note_id: int, job_id: int, report: Callable[[float, str], None]) -> Dict:
+        """
+        Summarize the note's transcript (or typed notes) and write back summary and todos
+
+        report(fraction, message) is called as each chunk of a long transcript
+        is summarized, so progress moves and a cancel takes effect between chunks.
+        """
+        with get_session() as session:
+            note = session.get(Note, note_id)
+            if not note:
+                raise ValueError("Note not found")
+
+            text = None
+            if note.transcription_path and os.path.exists(note.transcription_path):
+                with open(note.transcription_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            if not text:
+                text = note.raw_notes or note.content_text
+
+        if not text or not text.strip():
+            raise ValueError("Note has no transcription or notes to summarize")
+
+        from summarization_agent import SummarizationAgent
+
+        agent = SummarizationAgent(
+            server_url=self.server_url,
+            chunk_tokens=SUMMARY_CHUNK_TOKENS,
+            max_concurrency=SUMMARY_CONCURRENCY
+        )
+        result = agent.summarize_transcription(
+            text,
+            raise_on_error=True,
+            on_token=self._token_handler(job_id),
+            # The map phase is most of the work; the merge streams its output after it
+            on_progress=lambda done, total: report(0.9 * done / total, f"Summarized part {done} of {total}")
+        )
+
+        with get_session() as session:
+            note = session.get(Note, note_id)
+            note.summary = result.get("summary") or ""
+            note.ai_summary = format_ai_summary(result)
+            session.add(note)
+
+            # Skip action items already on the note so retries don't duplicate todos
+            existing = {
+                todo.description
+                for todo in session.query(Todo).filter(Todo.note_id == note_id).all()
+            }
+            for item in result.get("action_items") or []:
+                description = _action_item_text(item)
+                if description and description not in existing:
+                    session.add(Todo(note_id=note_id, description=description))
+                    existing.add(description)
+
+            session.commit()
+
+        return result
+
+
+# Shared queue used by the backend
+job_queue = JobQueue()
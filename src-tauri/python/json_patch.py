@@ -0,0 +1,174 @@
+"""
+JSON Patch (RFC 6902) for record fields, plus a text splice operation
+Paths start with a column name ("/summary"). Deeper paths go into JSON text
+columns ("/content_json/3/paragraph/rich_text/0/plain_text"). "splice" edits a
+text column in place, so an autosave sends what was typed, not the whole note.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Set
+
+OPERATIONS = {"add", "remove", "replace", "test", "splice"}
+
+
+class PatchError(ValueError):
+    """Malformed operation or a path that doesn't exist (HTTP 400)"""
+
+
+class PatchTestFailed(PatchError):
+    """A "test" operation didn't match: the client's base is stale (HTTP 409)"""
+
+
+def parse_pointer(path: str) -> List[str]:
+    """JSON Pointer (RFC 6901) -> reference tokens"""
+    if not isinstance(path, str) or not path.startswith("/"):
+        raise PatchError(f"Path must start with '/': {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def touched_fields(ops: Iterable[dict]) -> Set[str]:
+    """Column names the operations read or write"""
+    fields = set()
+    for op in ops:
+        if not isinstance(op, dict):
+            raise PatchError("Operations must be objects")
+        fields.add(parse_pointer(op.get("path"))[0])
+    return fields
+
+
+def splice(text: str, offset: int, remove: int, insert: str) -> str:
+    """
+    Replace text[offset:offset + remove] with insert
+
+    Offsets count UTF-16 code units, like JavaScript string indices, so
+    emoji and other astral characters line up with the editor's.
+    """
+    if text is not None and not isinstance(text, str):
+        raise PatchError("splice needs a text value")
+    units = (text or "").encode("utf-16-le")
+    if not isinstance(offset, int) or not isinstance(remove, int) or offset < 0 or remove < 0:
+        raise PatchError("splice needs non-negative integer offset and remove")
+    if (offset + remove) * 2 > len(units):
+        raise PatchError(f"splice range {offset}+{remove} is past the end of the text ({len(units) // 2})")
+    try:
+        return (units[:offset * 2] + str(insert or "").encode("utf-16-le") + units[(offset + remove) * 2:]).decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise PatchError("splice splits a surrogate pair")
+
+
+def _index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _parent(document: Any, tokens: List[str]):
+    for token in tokens[:-1]:
+        if isinstance(document, dict) and token in document:
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_index(document, token, allow_end=False)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return document
+
+
+def _apply(document: Any, tokens: List[str], op: dict) -> Any:
+    """Apply one operation inside a JSON document; returns the (possibly new) root"""
+    kind = op["op"]
+    if not tokens:
+        if kind == "test":
+            if document != op.get("value"):
+                raise PatchTestFailed(f"test failed at {op['path']}")
+            return document
+        if kind in ("add", "replace"):
+            return op.get("value")
+        raise PatchError(f"Cannot {kind} the document root")
+
+    parent, last = _parent(document, tokens), tokens[-1]
+    if isinstance(parent, dict):
+        exists = last in parent
+        if kind == "add":
+            parent[last] = op.get("value")
+        elif not exists:
+            raise PatchError(f"Path not found: {op['path']}")
+        elif kind == "remove":
+            del parent[last]
+        elif kind == "replace":
+            parent[last] = op.get("value")
+        elif kind == "test" and parent[last] != op.get("value"):
+            raise PatchTestFailed(f"test failed at {op['path']}")
+        elif kind == "splice":
+            parent[last] = splice(parent[last], op.get("offset"), op.get("remove", 0), op.get("insert", ""))
+    elif isinstance(parent, list):
+        index = _index(parent, last, allow_end=kind == "add")
+        if kind == "add":
+            parent.insert(index, op.get("value"))
+        elif kind == "remove":
+            del parent[index]
+        elif kind == "replace":
+            parent[index] = op.get("value")
+        elif kind == "test" and parent[index] != op.get("value"):
+            raise PatchTestFailed(f"test failed at {op['path']}")
+        elif kind == "splice":
+            parent[index] = splice(parent[index], op.get("offset"), op.get("remove", 0), op.get("insert", ""))
+    else:
+        raise PatchError(f"Path not found: {op['path']}")
+    return document
+
+
+def apply_field_patch(values: Dict[str, Any], ops: List[dict], json_fields: Set[str]) -> Dict[str, Any]:
+    """
+    Apply operations to a record's column values
+
+    Args:
+        values: Current value of every column the ops touch (see touched_fields)
+        ops: Operations, applied in order; all or nothing
+        json_fields: Columns holding JSON text that paths may descend into
+
+    Returns:
+        Column -> new value, for the columns that actually changed
+    """
+    current = dict(values)
+    parsed: Dict[str, Any] = {}  # JSON fields being edited in place, serialized once at the end
+
+    for op in ops:
+        if op.get("op") not in OPERATIONS:
+            raise PatchError(f"Unknown operation: {op.get('op')!r}")
+        field, *tokens = parse_pointer(op["path"])
+        if field not in current:
+            raise PatchError(f"Unknown field: {field}")
+
+        if not tokens:
+            if field in parsed:
+                current[field] = json.dumps(parsed.pop(field))
+            kind = op["op"]
+            if kind == "test":
+                if current[field] != op.get("value"):
+                    raise PatchTestFailed(f"test failed at /{field}")
+            elif kind == "splice":
+                current[field] = splice(current[field], op.get("offset"), op.get("remove", 0), op.get("insert", ""))
+            else:
+                current[field] = None if kind == "remove" else op.get("value")
+            continue
+
+        if field not in json_fields:
+            raise PatchError(f"{field} is not a JSON field")
+        if field not in parsed:
+            try:
+                parsed[field] = json.loads(current[field]) if current[field] else None
+            except (TypeError, ValueError):
+                raise PatchError(f"{field} does not hold valid JSON")
+            if op["op"] == "test":
+                _apply(parsed.pop(field), tokens, op)  # Reading only: keep the stored text as is
+                continue
+        parsed[field] = _apply(parsed[field], tokens, op)
+
+    for field, document in parsed.items():
+        current[field] = json.dumps(document)
+    return {field: value for field, value in current.items() if value != values[field]}
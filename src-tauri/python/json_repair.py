@@ -0,0 +1,142 @@
+"""
+Lenient JSON parsing for LLM output
+Recovers the JSON value from responses wrapped in prose or code fences,
+truncated mid-stream, or ending with a trailing comma
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# How many earlier cut points to try before giving up on a truncated value
+MAX_REPAIR_ATTEMPTS = 8
+
+
+class IncrementalJSONParser:
+    """
+    Feed response fragments as they stream in and take a best-effort parse at any time
+
+    The scanner keeps its string/bracket state between fragments, so each
+    character is scanned once no matter how often snapshot() is called. A
+    bracketed value that closes but isn't JSON (prose like "Note [draft]: {...}")
+    is kept only as a fallback and the scan resumes after it.
+    """
+
+    def __init__(self):
+        self._fallback: Optional[Any] = None  # Repaired parse of a bracketed value that wasn't JSON
+        self._reset()
+
+    def _reset(self):
+        self.complete = False  # Top-level value closed
+        self._parts: List[str] = []  # Response text from the first '{' or '['
+        self._length = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._stack: List[str] = []  # Expected closing brackets
+        # (cut position, closers) where text[:cut] + closers is a complete value
+        self._cut_points: List[Tuple[int, str]] = []
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, fragment: str):
+        """Scan a new fragment of response text"""
+        # Anything the model says after the value is ignored
+        while fragment and not self.complete:
+            fragment = self._scan(fragment)
+
+    def _scan(self, fragment: str) -> str:
+        """Scan fragment; returns text to scan again when the value turned out to be prose"""
+        start = 0
+        if not self._started:
+            starts = [i for i in (fragment.find("{"), fragment.find("[")) if i >= 0]
+            if not starts:
+                return ""  # Skip prose or ``` fences before the value
+            start = min(starts)
+            self._started = True
+
+        end = len(fragment)
+        for i in range(start, len(fragment)):
+            char = fragment[i]
+            position = self._length + i - start
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(_CLOSERS[char])
+                self._cut_points.append((position + 1, "".join(reversed(self._stack))))
+            elif char in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+                    end = i + 1
+                    break
+            elif char == ",":
+                self._cut_points.append((position, "".join(reversed(self._stack))))
+
+        self._parts.append(fragment[start:end])
+        self._length += end - start
+
+        if self.complete and not _is_json(self.text):
+            # Look for the value after this one, keeping its repaired parse in case nothing better follows
+            self._fallback = self.snapshot()
+            self._reset()
+            return fragment[end:]
+        return ""
+
+    def snapshot(self) -> Optional[Any]:
+        """Best-effort parse of everything fed so far, or None if nothing is recoverable"""
+        if not self._started:
+            return self._fallback
+
+        candidates = []
+        if self.complete:
+            candidates.append(self.text)
+        else:
+            closing = '"' if self._in_string else ""
+            candidates.append(self.text + closing + "".join(reversed(self._stack)))
+
+        # Fall back to cutting at the last complete element (drops a dangling
+        # key, half-written literal or trailing comma)
+        for cut, closers in reversed(self._cut_points[-MAX_REPAIR_ATTEMPTS:]):
+            candidates.append(self.text[:cut] + closers)
+
+        for candidate in candidates:
+            try:
+                return json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+        return self._fallback
+
+
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Parse a complete LLM response leniently; returns None if no JSON value is found"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.snapshot()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Move Roadshow.flight_images (inline base64 data URLs) into the attachment store.
+Safe to re-run: roadshows whose flight_images is already cleared are skipped.
+The backend also runs this on startup.
+"""
+
+import os
+
+from database import Roadshow, DB_PATH, create_db_and_tables, get_session
+from attachment_store import attachment_store, import_flight_images
+
+
+def migrate_flight_images() -> int:
+    """Decode every roadshow's flight_images into Attachment rows and clear the column"""
+    with get_session() as session:
+        roadshows = session.query(Roadshow).filter(Roadshow.flight_images.isnot(None)).all()
+        if not roadshows:
+            return 0
+        print(f"Found {len(roadshows)} roadshows with inline flight images")
+
+        total = 0
+        for roadshow in roadshows:
+            attachments = import_flight_images(session, attachment_store, roadshow.id, roadshow.flight_images)
+            roadshow.flight_images = None
+            session.add(roadshow)
+            # One commit per roadshow so an interrupted run keeps finished work
+            session.commit()
+            total += len(attachments)
+            print(f"  {roadshow.name}: {len(attachments)} images")
+
+    print(f"\nMigration complete! Moved {total} images to {os.path.abspath(attachment_store.root)}")
+    return total
+
+
+if __name__ == "__main__":
+    if not os.path.exists(DB_PATH):
+        print(f"ERROR: Database not found at {DB_PATH}")
+        print("Please run database.py first to create the database.")
+        exit(1)
+
+    # Creates the attachment table if it doesn't exist yet
+    create_db_and_tables()
+    if not migrate_flight_images():
+        print("No inline flight images to migrate")
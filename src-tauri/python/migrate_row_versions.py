@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Add the version column (optimistic concurrency, see row_updates.py) to tables
+created before it existed. Safe to re-run; the backend also runs this on startup.
+"""
+
+import os
+
+import database
+from row_updates import VERSIONED_MODELS
+
+
+def migrate_row_versions() -> int:
+    """ALTER TABLE ... ADD COLUMN version where it's missing; returns tables changed"""
+    changed = 0
+    with database.engine.begin() as conn:
+        for model in VERSIONED_MODELS:
+            table = model.__tablename__
+            columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+            if columns and "version" not in columns:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+                print(f"  Added version column to {table}")
+                changed += 1
+    return changed
+
+
+if __name__ == "__main__":
+    if not os.path.exists(database.DB_PATH):
+        print(f"ERROR: Database not found at {database.DB_PATH}")
+        print("Please run database.py first to create the database.")
+        exit(1)
+    print(f"Migration complete! Updated {migrate_row_versions()} tables.")
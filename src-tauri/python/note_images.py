@@ -0,0 +1,150 @@
+"""
+Note image index
+Walks a note's block tree (including blocks nested under "children") and keeps
+one NoteImage row per image, so readers don't re-parse JSON or split strings
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from ai_cache import hash_file
+from database import Note, NoteImage, get_session
+from image_service import IMAGES_DIR
+from notion_blocks import iter_blocks, load_blocks
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow missing: rows are stored without dimensions
+    Image = None
+
+
+def note_blocks(note: Note) -> List[dict]:
+    """Block tree of a note (Notion imports may only have it in raw_notes)"""
+    blocks = load_blocks(note.content_json)
+    if not blocks and note.raw_notes and note.raw_notes.lstrip().startswith("["):
+        blocks = load_blocks(note.raw_notes)
+    return blocks
+
+
+def extract_images(blocks: List[dict]) -> List[Tuple[Optional[str], str]]:
+    """(block_id, local path) of every downloaded image block, in document order"""
+    images = []
+    for block in iter_blocks(blocks):
+        if block.get("type") == "image" and block.get("local_image_path"):
+            images.append((block.get("id"), block["local_image_path"]))
+    return images
+
+
+def resolve_image_path(path: str, images_dir: str = IMAGES_DIR) -> Optional[str]:
+    """Find an image on disk; paths are stored relative to wherever the export ran"""
+    candidate = os.path.join(images_dir, os.path.basename(path))
+    if os.path.isfile(candidate):
+        return candidate
+    return path if os.path.isfile(path) else None
+
+
+def image_metadata(path: str) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """(sha256, width, height) of an image file; None for anything unavailable"""
+    file_path = resolve_image_path(path)
+    if not file_path:
+        return None, None, None
+
+    width = height = None
+    if Image is not None:
+        try:
+            with Image.open(file_path) as image:  # Reads the header only
+                width, height = image.size
+        except Exception:
+            pass
+    return hash_file(file_path), width, height
+
+
+def sync_note_images(session: Session, note: Note) -> List[NoteImage]:
+    """
+    Rebuild a note's NoteImage rows (caller commits)
+
+    Blocks are the source of truth; notes without blocks fall back to the
+    comma-separated image_paths. Note.image_paths is rewritten from the result
+    so older readers stay in sync.
+    """
+    blocks = note_blocks(note)
+    if blocks:
+        images = extract_images(blocks)
+    else:
+        paths = [path.strip() for path in (note.image_paths or "").split(",")]
+        images = [(None, path) for path in dict.fromkeys(paths) if path]
+
+    existing = {
+        row.path: row
+        for row in session.query(NoteImage).filter(NoteImage.note_id == note.id).all()
+    }
+    session.execute(delete(NoteImage).where(NoteImage.note_id == note.id))
+
+    rows = []
+    for position, (block_id, path) in enumerate(images):
+        previous = existing.get(path)
+        if previous and previous.content_hash:
+            metadata = (previous.content_hash, previous.width, previous.height)
+        else:
+            metadata = image_metadata(path)
+        content_hash, width, height = metadata
+        row = NoteImage(
+            note_id=note.id,
+            block_id=block_id,
+            path=path,
+            content_hash=content_hash,
+            width=width,
+            height=height,
+            position=position
+        )
+        session.add(row)
+        rows.append(row)
+
+    note.image_paths = ",".join(path for _, path in images) or None
+    session.add(note)
+    return rows
+
+
+def images_for_notes(session: Session, note_ids: Iterable[int]) -> Dict[int, List[NoteImage]]:
+    """NoteImage rows grouped by note id, in document order"""
+    note_ids = list(note_ids)
+    grouped: Dict[int, List[NoteImage]] = {note_id: [] for note_id in note_ids}
+    if not note_ids:
+        return grouped
+
+    rows = session.query(NoteImage).filter(
+        NoteImage.note_id.in_(note_ids)
+    ).order_by(NoteImage.note_id, NoteImage.position).all()
+    for row in rows:
+        grouped[row.note_id].append(row)
+    return grouped
+
+
+def backfill_note_images(only_if_empty: bool = True) -> int:
+    """
+    Build NoteImage rows for every note
+
+    Args:
+        only_if_empty: Skip the scan when the table already has rows
+
+    Returns:
+        Number of image rows created
+    """
+    with get_session() as session:
+        if only_if_empty and session.query(NoteImage.id).first():
+            return 0
+
+        total = 0
+        notes = session.query(Note).filter(
+            (Note.content_json.isnot(None)) | (Note.raw_notes.isnot(None)) | (Note.image_paths.isnot(None))
+        ).all()
+        for note in notes:
+            total += len(sync_note_images(session, note))
+        session.commit()
+
+    if total:
+        print(f"Indexed {total} note images")
+    return total
@@ -0,0 +1,50 @@
+"""
+Helpers for walking Notion block trees stored in Note.content_json
+Blocks exported by notion_export_with_images keep nested blocks under "children"
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def iter_blocks(blocks: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield every block depth-first, including blocks nested in toggles, columns, etc."""
+    stack = list(reversed(blocks or []))
+    while stack:
+        block = stack.pop()
+        if not isinstance(block, dict):
+            continue
+        yield block
+        children = block.get("children")
+        if children:
+            stack.extend(reversed(children))
+
+
+def load_blocks(content_json: Optional[str]) -> List[Dict[str, Any]]:
+    """Parse Note.content_json; returns [] for empty or non-block content"""
+    if not content_json:
+        return []
+    try:
+        blocks = json.loads(content_json)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return blocks if isinstance(blocks, list) else []
+
+
+def block_text(block: Dict[str, Any]) -> str:
+    """Plain text of a single block's rich_text (and image caption)"""
+    data = block.get(block.get("type"), {})
+    if not isinstance(data, dict):
+        return ""
+    rich_text = data.get("rich_text") or data.get("caption") or []
+    return "".join(
+        rt.get("plain_text") or rt.get("text", {}).get("content", "")
+        for rt in rich_text
+        if isinstance(rt, dict)
+    )
+
+
+def blocks_to_text(blocks: List[Dict[str, Any]]) -> str:
+    """Plain text of a whole block tree, one block per line"""
+    lines = (block_text(block) for block in iter_blocks(blocks))
+    return "\n".join(line for line in lines if line.strip())
@@ -9,6 +9,8 @@ import requests
 from typing import Dict, List, Any
 from datetime import datetime
 
+from http_client import get_client
+
 
 class NotionExporter:
     """Export Notion databases and pages via API"""
@@ -21,6 +23,7 @@ class NotionExporter:
             "Notion-Version": "2022-06-28"
         }
         self.base_url = "https://api.notion.com/v1"
+        self.http = get_client()  # Pooled keep-alive connections shared across calls
 
     def query_database(self, database_id: str) -> List[Dict[str, Any]]:
         """Query all pages in a database"""
@@ -35,7 +38,7 @@ class NotionExporter:
             if start_cursor:
                 payload["start_cursor"] = start_cursor
 
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.http.post(url, headers=self.headers, json=payload)
             response.raise_for_status()
 
             data = response.json()
@@ -49,7 +52,7 @@ class NotionExporter:
     def get_page(self, page_id: str) -> Dict[str, Any]:
         """Get a specific page"""
         url = f"{self.base_url}/pages/{page_id}"
-        response = requests.get(url, headers=self.headers)
+        response = self.http.get(url, headers=self.headers)
         response.raise_for_status()
         return response.json()
 
@@ -66,7 +69,7 @@ class NotionExporter:
             if start_cursor:
                 params["start_cursor"] = start_cursor
 
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
 
             data = response.json()
@@ -11,6 +11,8 @@ from datetime import datetime
 import hashlib
 from pathlib import Path
 
+from http_client import get_client
+
 
 class NotionExporterWithImages:
     """Export Notion databases and pages via API, downloading images locally"""
@@ -23,6 +25,7 @@ class NotionExporterWithImages:
             "Notion-Version": "2022-06-28"
         }
         self.base_url = "https://api.notion.com/v1"
+        self.http = get_client()  # Pooled keep-alive connections shared across calls
         self.image_dir = image_dir
 
         # Create image directory if it doesn't exist
@@ -41,7 +44,7 @@ class NotionExporterWithImages:
             if start_cursor:
                 payload["start_cursor"] = start_cursor
 
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.http.post(url, headers=self.headers, json=payload)
             response.raise_for_status()
 
             data = response.json()
@@ -65,7 +68,7 @@ class NotionExporterWithImages:
             if start_cursor:
                 params["start_cursor"] = start_cursor
 
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
 
             data = response.json()
@@ -97,7 +100,7 @@ class NotionExporterWithImages:
                 return filepath
 
             # Download the image
-            response = requests.get(url, timeout=30)
+            response = self.http.get(url, timeout=30)
             response.raise_for_status()
 
             with open(filepath, 'wb') as f:
@@ -0,0 +1,87 @@
+"""
+Pytest plugin: per-test SQL query budgets and N+1 detection
+
+Enable with `-p pytest_sql_capture` (run from src-tauri/python) or
+`pytest_plugins = ["pytest_sql_capture"]` in a conftest (the benchmark suite
+registers it; see benchmarks/test_query_budgets.py).
+
+    def test_lp_people(client, query_recorder):
+        with query_recorder.capture() as queries:
+            client.get("/lps/1/people")
+        queries.assert_max(2)
+
+    @pytest.mark.max_queries(3)
+    def test_funnel(client):
+        client.get("/funds/1/sales-funnel")
+
+    def test_lp_notes_scale(client, query_recorder, link_notes):
+        query_recorder.assert_constant(
+            lambda: client.get("/lps/1/notes"),
+            grow=lambda: link_notes(lp_id=1, count=50),
+        )
+
+With --sql-nplusone every test fails if one statement shape runs more than
+--sql-repeat-threshold times.
+"""
+
+import pytest
+
+import database
+from sql_capture import DEFAULT_REPEAT_THRESHOLD, QueryRecorder
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("sql-capture", "SQL query budgets")
+    group.addoption(
+        "--sql-nplusone",
+        action="store_true",
+        default=False,
+        help="Fail tests that repeat one statement shape more than --sql-repeat-threshold times"
+    )
+    group.addoption(
+        "--sql-repeat-threshold",
+        type=int,
+        default=DEFAULT_REPEAT_THRESHOLD,
+        help=f"Repeats of one statement shape tolerated per test (default {DEFAULT_REPEAT_THRESHOLD})"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "max_queries(n): fail if the test executes more than n SQL statements"
+    )
+    config.addinivalue_line(
+        "markers",
+        "allow_repeated_queries: skip --sql-nplusone checks for this test"
+    )
+
+
+@pytest.fixture
+def query_recorder() -> QueryRecorder:
+    """Recorder bound to the current database engine (tests may swap database.engine)"""
+    return QueryRecorder(database.engine)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Capture the test body only, so fixture setup (seeding data) doesn't count"""
+    marker = item.get_closest_marker("max_queries")
+    check_repeats = (
+        item.config.getoption("--sql-nplusone")
+        and not item.get_closest_marker("allow_repeated_queries")
+    )
+    if not marker and not check_repeats:
+        yield
+        return
+
+    recorder = QueryRecorder(database.engine)
+    with recorder.capture() as captured:
+        outcome = yield
+    if outcome.excinfo is not None:
+        return  # Report the test's own failure, not the budget
+
+    if marker:
+        captured.assert_max(marker.args[0], label=item.nodeid)
+    if check_repeats:
+        captured.assert_no_n_plus_one(item.config.getoption("--sql-repeat-threshold"), label=item.nodeid)
@@ -0,0 +1,370 @@
+"""
+Server-side filtering, sorting and faceting for the database views
+A JSON filter expression, multi-key sort and page window are compiled into one
+SQL query for the page, one COUNT and one GROUP BY per facet, so a view's
+latency depends on its page size rather than the size of the table
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, and_, exists, func, literal, not_, or_, select
+from sqlmodel import Session
+
+from database import (
+    LP, GP, Person, Note, Distributor, Fund, FacetValue,
+    NoteLPLink, NoteGPLink, NoteFundLink, NoteDistributorLink
+)
+from facet_index import multi_value_fields
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Entity name -> model, columns matched by "search", default facets and columns
+# left out of items unless asked for. Comma-joined multi-select columns
+# ("Monterrey, Mexico City") are filtered and counted through FacetValue rows,
+# see facet_index.MULTI_VALUE_FIELDS
+ENTITIES = {
+    "lp": {
+        "model": LP,
+        "search": ["name"],
+        "facets": ["priority", "type_of_group", "location"],
+        "exclude": set(),
+    },
+    "gp": {
+        "model": GP,
+        "search": ["name"],
+        "facets": ["contact_level", "location"],
+        "exclude": set(),
+    },
+    "person": {
+        "model": Person,
+        "search": ["name", "email", "position"],
+        "facets": ["people_type", "org_type", "location"],
+        "exclude": set(),
+    },
+    "fund": {
+        "model": Fund,
+        "search": ["fund_name"],
+        "facets": ["status", "geography", "asset_class", "potential"],
+        "exclude": set(),
+    },
+    "note": {
+        "model": Note,
+        "search": ["name", "summary"],
+        "facets": ["contact_type", "interest"],
+        "exclude": {"content_json", "content_text", "raw_notes"},
+    },
+    "distributor": {
+        "model": Distributor,
+        "search": ["name"],
+        "facets": ["headquarter", "mexico"],
+        "exclude": set(),
+    },
+}
+
+# Virtual fields backed by link tables: filterable by the related rows' names and
+# returned on each item as comma-separated names
+# entity -> field -> (link model, link column -> entity id, link column -> related id, related model, name column)
+RELATIONS = {
+    "note": {
+        "related_lps": (NoteLPLink, "note_id", "lp_id", LP, "name"),
+        "related_gps": (NoteGPLink, "note_id", "gp_id", GP, "name"),
+        "related_distributors": (NoteDistributorLink, "note_id", "distributor_id", Distributor, "name"),
+        # Shadows the legacy Note.fundraise text; funds are linked through NoteFundLink
+        "fundraise": (NoteFundLink, "note_id", "fund_id", Fund, "fund_name"),
+    },
+}
+
+OPERATORS = {
+    "eq", "ne", "in", "not_in", "contains", "not_contains", "starts_with",
+    "is_empty", "is_not_empty", "lt", "lte", "gt", "gte", "between",
+}
+RELATION_OPERATORS = {"contains", "not_contains", "eq", "in", "is_empty", "is_not_empty"}
+
+
+class QueryError(ValueError):
+    """Invalid filter, sort or field name (reported as HTTP 400)"""
+
+
+# Filter compilation
+def _config(entity: str) -> dict:
+    if entity not in ENTITIES:
+        raise QueryError(f"Unknown entity: {entity}")
+    return ENTITIES[entity]
+
+
+def _column(entity: str, field: str):
+    model = _config(entity)["model"]
+    column = model.__table__.columns.get(field)
+    if column is None:
+        raise QueryError(f"Unknown field for {entity}: {field}")
+    return column
+
+
+def _coerce(column, value):
+    """Convert JSON values to the column's type (ISO strings for dates)"""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [_coerce(column, v) for v in value]
+    try:
+        if isinstance(column.type, DateTime) and isinstance(value, str):
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+        if isinstance(column.type, Boolean):
+            return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes")
+        if isinstance(column.type, Integer):
+            return int(value)
+        if isinstance(column.type, Float):
+            return float(value)
+    except (TypeError, ValueError):
+        raise QueryError(f"Invalid value for {column.name}: {value!r}")
+    return value
+
+
+def _like_escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _has_value(entity: str, field: str, values: List[str]):
+    """Record has one of values in a multi-select field (index lookup on FacetValue)"""
+    facet = FacetValue.__table__
+    return exists(
+        select(literal(1)).where(
+            facet.c.entity == entity,
+            facet.c.field == field,
+            facet.c.value.in_([str(v).strip() for v in values]),
+            facet.c.entity_id == _config(entity)["model"].__table__.c.id
+        )
+    )
+
+
+def _is_empty(column):
+    if isinstance(column.type, (Boolean, Integer, Float, DateTime)):
+        return column.is_(None)
+    return or_(column.is_(None), column == "")
+
+
+def _leaf(entity: str, node: dict):
+    field, op, value = node.get("field"), node.get("op", "eq"), node.get("value")
+    if op not in OPERATORS:
+        raise QueryError(f"Unknown operator: {op}")
+
+    if field in RELATIONS.get(entity, {}):
+        return _relation_condition(entity, field, op, value)
+
+    column = _column(entity, field)
+    is_list = field in multi_value_fields(entity)
+    value = _coerce(column, value)
+
+    if op == "is_empty":
+        return _is_empty(column)
+    if op == "is_not_empty":
+        return not_(_is_empty(column))
+    if op in ("in", "not_in"):
+        if not isinstance(value, list):
+            raise QueryError(f"{op} needs a list value")
+        if is_list:
+            return _has_value(entity, field, value) if op == "in" else not_(_has_value(entity, field, value))
+        condition = column.in_(value)
+        return condition if op == "in" else or_(column.is_(None), not_(condition))
+    if op == "eq":
+        if isinstance(column.type, Boolean) and value is False:
+            return or_(column == False, column.is_(None))  # noqa: E712 (unchecked boxes are NULL)
+        return _has_value(entity, field, [value]) if is_list else column == value
+    if op == "ne":
+        if is_list:
+            return not_(_has_value(entity, field, [value]))
+        return or_(column.is_(None), column != value)
+    if op == "contains":
+        return column.ilike(f"%{_like_escape(value)}%", escape="\\")
+    if op == "not_contains":
+        return or_(column.is_(None), not_(column.ilike(f"%{_like_escape(value)}%", escape="\\")))
+    if op == "starts_with":
+        return column.ilike(f"{_like_escape(value)}%", escape="\\")
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise QueryError("between needs [low, high]")
+        low, high = value
+        return and_(*([column >= low] if low is not None else []), *([column <= high] if high is not None else []))
+    return {"lt": column < value, "lte": column <= value, "gt": column > value, "gte": column >= value}[op]
+
+
+def _relation_condition(entity: str, field: str, op: str, value):
+    if op not in RELATION_OPERATORS:
+        raise QueryError(f"Operator {op} is not supported for {field}")
+    link, own_key, other_key, related, name_field = RELATIONS[entity][field]
+    model = _config(entity)["model"]
+    link_table, related_table = link.__table__, related.__table__
+    name = related_table.c[name_field]
+
+    linked = (
+        select(literal(1))
+        .select_from(link_table.join(related_table, link_table.c[other_key] == related_table.c.id))
+        .where(link_table.c[own_key] == model.__table__.c.id)
+    )
+    if op == "is_empty":
+        return not_(exists(linked))
+    if op == "is_not_empty":
+        return exists(linked)
+    if op == "in":
+        if not isinstance(value, list):
+            raise QueryError(f"{op} needs a list value")
+        return exists(linked.where(name.in_(value)))
+    if value is None:
+        raise QueryError(f"{op} needs a value for {field}")
+    if op == "eq":
+        return exists(linked.where(func.lower(name) == str(value).lower()))
+    matches = exists(linked.where(name.ilike(f"%{_like_escape(value)}%", escape="\\")))
+    return matches if op == "contains" else not_(matches)
+
+
+def compile_filter(entity: str, node: Optional[dict]):
+    """
+    Compile a filter expression to a SQL condition (None for no filter)
+
+    Nodes are {"and": [...]}, {"or": [...]}, {"not": node} or a leaf
+    {"field": "priority", "op": "in", "value": ["High", "Medium"]}.
+    """
+    if not node:
+        return None
+    if not isinstance(node, dict):
+        raise QueryError("Filter nodes must be objects")
+    if "and" in node:
+        return and_(*[compile_filter(entity, child) for child in node["and"] if child]) if node["and"] else None
+    if "or" in node:
+        return or_(*[compile_filter(entity, child) for child in node["or"] if child]) if node["or"] else None
+    if "not" in node:
+        inner = compile_filter(entity, node["not"])
+        return not_(inner) if inner is not None else None
+    return _leaf(entity, node)
+
+
+def _node_fields(node: Optional[dict]) -> set:
+    if not node:
+        return set()
+    for key in ("and", "or"):
+        if key in node:
+            return set().union(*[_node_fields(child) for child in node[key]]) if node[key] else set()
+    if "not" in node:
+        return _node_fields(node["not"])
+    return {node.get("field")}
+
+
+def _search_condition(entity: str, search: Optional[str]):
+    if not search or not search.strip():
+        return None
+    pattern = f"%{_like_escape(search.strip())}%"
+    return or_(*[_column(entity, field).ilike(pattern, escape="\\") for field in _config(entity)["search"]])
+
+
+# Queries
+def _facet_counts(session: Session, entity: str, field: str, conditions: list) -> List[Dict[str, Any]]:
+    """[{value, count}] for a facet, most common first"""
+    column = _column(entity, field)
+    if field in multi_value_fields(entity):
+        # Covered by ix_facetvalue_lookup; the filter narrows entity_id via a subquery
+        facet = FacetValue.__table__
+        query = select(facet.c.value, func.count()).where(facet.c.entity == entity, facet.c.field == field)
+        if conditions:
+            table = _config(entity)["model"].__table__
+            query = query.where(facet.c.entity_id.in_(select(table.c.id).where(*conditions)))
+        query = query.group_by(facet.c.value)
+    else:
+        query = select(column, func.count()).where(not_(_is_empty(column)), *conditions).group_by(column)
+    rows = session.execute(query).all()
+    return [{"value": value, "count": count} for value, count in sorted(rows, key=lambda p: (-p[1], str(p[0])))]
+
+
+def _relation_names(session: Session, entity: str, ids: List[int]) -> Dict[str, Dict[int, str]]:
+    """Comma-separated related names per item, one query per relation"""
+    names: Dict[str, Dict[int, str]] = {}
+    for field, (link, own_key, other_key, related, name_field) in RELATIONS.get(entity, {}).items():
+        link_table, related_table = link.__table__, related.__table__
+        rows = session.execute(
+            select(link_table.c[own_key], related_table.c[name_field])
+            .join(related_table, link_table.c[other_key] == related_table.c.id)
+            .where(link_table.c[own_key].in_(ids))
+            .order_by(link_table.c[own_key], related_table.c[name_field])
+        ).all()
+        grouped: Dict[int, List[str]] = {}
+        for item_id, name in rows:
+            grouped.setdefault(item_id, []).append(name)
+        names[field] = {item_id: ", ".join(values) for item_id, values in grouped.items()}
+    return names
+
+
+def run_query(
+    session: Session,
+    entity: str,
+    filter: Optional[dict] = None,
+    search: Optional[str] = None,
+    sort: Optional[List[dict]] = None,
+    offset: int = 0,
+    limit: int = DEFAULT_LIMIT,
+    facets: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Run a view query
+
+    Args:
+        entity: lp, gp, person, fund, note or distributor
+        filter: Filter expression (see compile_filter)
+        search: Free text matched against the entity's search columns
+        sort: [{"field": "priority", "dir": "desc"}, ...]; ties break on id
+        offset, limit: Page window (limit capped at MAX_LIMIT)
+        facets: Fields to count values for (None = the entity's defaults)
+        fields: Columns to return (None = all but the large text columns)
+
+    Returns:
+        {total, offset, limit, items, facets: {field: [{value, count}]}}
+    """
+    config = _config(entity)
+    model = config["model"]
+    table = model.__table__
+    offset = max(0, offset)
+    limit = max(0, min(limit, MAX_LIMIT))
+
+    # Each top-level AND clause is kept separate so a facet can ignore the
+    # clauses on its own field (selecting "High" still shows the other priorities)
+    clauses = filter.get("and", [filter]) if filter and "and" in filter and len(filter) == 1 else [filter]
+    compiled = [(clause, compile_filter(entity, clause)) for clause in clauses if clause]
+    search_condition = _search_condition(entity, search)
+    base = [search_condition] if search_condition is not None else []
+    conditions = base + [condition for _, condition in compiled if condition is not None]
+
+    if fields:
+        columns = [_column(entity, field) for field in dict.fromkeys(["id", *fields])]
+    else:
+        columns = [column for column in table.columns if column.name not in config["exclude"]]
+
+    order_by = []
+    for key in sort or []:
+        column = _column(entity, key.get("field"))
+        direction = key.get("dir", "asc")
+        if direction not in ("asc", "desc"):
+            raise QueryError(f"Sort direction must be asc or desc, got {direction!r}")
+        order_by.append(column.desc().nulls_last() if direction == "desc" else column.asc().nulls_last())
+    order_by.append(table.c.id.asc())
+
+    total = session.execute(select(func.count()).select_from(table).where(*conditions)).scalar()
+    rows = session.execute(
+        select(*columns).where(*conditions).order_by(*order_by).offset(offset).limit(limit)
+    ).all()
+    items = [dict(row._mapping) for row in rows]
+
+    if RELATIONS.get(entity) and items:
+        names = _relation_names(session, entity, [item["id"] for item in items])
+        for item in items:
+            for field, by_id in names.items():
+                item[field] = by_id.get(item["id"])
+
+    facet_results = {}
+    for field in config["facets"] if facets is None else facets:
+        own = [condition for clause, condition in compiled if condition is not None and _node_fields(clause) == {field}]
+        others = [condition for condition in conditions if not any(condition is c for c in own)]
+        facet_results[field] = _facet_counts(session, entity, field, others)
+
+    return {"total": total, "offset": offset, "limit": limit, "items": items, "facets": facet_results}
@@ -0,0 +1,190 @@
+"""
+In-process read-through cache for hot read endpoints
+Responses are cached as serialized JSON, keyed by endpoint, parameters and a
+generation counter for every table the response reads. Every write bumps its
+tables' counters (ORM flushes, Core INSERT/UPDATE/DELETE run through a
+session, and again at commit), so a stale entry is simply never looked up
+again and ages out of the LRU. Concurrent misses for the same key share one
+computation.
+
+Writes from other processes (the CLI importers) aren't seen; entries also
+expire after CRM_CACHE_MAX_AGE seconds to bound that.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+MAX_BYTES = int(float(os.getenv("CRM_CACHE_MAX_MB", "64")) * 1024 * 1024)  # 0 disables the cache
+MAX_AGE_SECONDS = float(os.getenv("CRM_CACHE_MAX_AGE", "300"))
+
+_SESSION_KEY = "crm_cache_tables"  # session.info: tables written in the current transaction
+
+
+class ResponseCache:
+    """Memory-bounded LRU of serialized responses with per-table invalidation"""
+
+    def __init__(self, max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()  # Writes bump generations from worker threads
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._entries: "OrderedDict[tuple, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[tuple, asyncio.Future] = {}  # Only touched on the event loop
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def bump(self, tables: Iterable[str]):
+        """Invalidate every entry that read any of tables"""
+        with self._lock:
+            for table in tables:
+                self._generations[table] += 1
+
+    def _key(self, name: str, params: tuple, tables: Tuple[str, ...]) -> tuple:
+        with self._lock:
+            return (name, params, tuple(self._generations[table] for table in tables))
+
+    def _get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, stored_at = entry
+            if time.monotonic() - stored_at > self.max_age:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def _put(self, key: tuple, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, time.monotonic())
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats[oldest[0]]["evictions"] += 1
+
+    def _drop(self, key: tuple):
+        body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    async def get_or_compute(self, name: str, params: tuple, tables: Tuple[str, ...], compute: Callable[[], Any]) -> Response:
+        """
+        Serve a cached JSON response, or compute it once for all concurrent callers
+
+        Args:
+            name: Endpoint name (metrics label)
+            params: Hashable parameters the response depends on
+            tables: Every table compute reads
+            compute: Blocking function returning the response data; runs in a worker thread
+        """
+        if self.max_bytes <= 0:
+            return JSONResponse(jsonable_encoder(await asyncio.to_thread(compute)))
+
+        key = self._key(name, params, tables)
+        body = self._get(key)
+        stats = self.stats[name]
+        if body is not None:
+            stats["hits"] += 1
+            return Response(body, media_type="application/json")
+
+        task = self._inflight.get(key)
+        if task is None:
+            stats["misses"] += 1
+            # Its own task, so a client that disconnects doesn't cancel it for the others
+            task = asyncio.ensure_future(asyncio.to_thread(_serialize, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            stats["coalesced"] += 1
+        return Response(await asyncio.shield(task), media_type="application/json")
+
+    def _finish(self, key: tuple, task: asyncio.Future):
+        del self._inflight[key]
+        # exception() also marks a failure as retrieved; the waiters re-raise it themselves
+        if not task.cancelled() and task.exception() is None:
+            self._put(key, task.result())
+
+    def render_prometheus(self) -> str:
+        """Hit/miss counters in Prometheus text format (appended to /metrics)"""
+        lines = []
+        with self._lock:
+            for metric, help_text in (
+                ("hits", "Cached responses served"),
+                ("misses", "Responses computed"),
+                ("coalesced", "Requests that waited on an identical in-flight computation"),
+                ("evictions", "Entries evicted to stay under CRM_CACHE_MAX_MB"),
+            ):
+                lines.append(f"# HELP crm_cache_{metric}_total {help_text}")
+                lines.append(f"# TYPE crm_cache_{metric}_total counter")
+                for name, counts in sorted(self.stats.items()):
+                    lines.append(f'crm_cache_{metric}_total{{endpoint="{name}"}} {counts[metric]}')
+            lines.append("# HELP crm_cache_bytes Size of cached responses")
+            lines.append("# TYPE crm_cache_bytes gauge")
+            lines.append(f"crm_cache_bytes {self._bytes}")
+            lines.append("# HELP crm_cache_entries Cached responses")
+            lines.append("# TYPE crm_cache_entries gauge")
+            lines.append(f"crm_cache_entries {len(self._entries)}")
+        return "\n".join(lines) + "\n"
+
+
+def _serialize(compute: Callable[[], Any]) -> bytes:
+    """Response body exactly as FastAPI would send the returned value"""
+    return JSONResponse(jsonable_encoder(compute())).body
+
+
+response_cache = ResponseCache()
+
+
+# Invalidation hooks
+def _touch(session: Session, tables: Set[str]):
+    if tables:
+        response_cache.bump(tables)
+        session.info.setdefault(_SESSION_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _tables_flushed(session: Session, flush_context):
+    _touch(session, {
+        obj.__table__.name
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if hasattr(obj, "__table__")
+    })
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _tables_executed(orm_execute_state):
+    """Core/bulk DML through a session (row_updates, batch links, funnel upserts) doesn't flush"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _touch(orm_execute_state.session, {orm_execute_state.statement.table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _tables_committed(session: Session):
+    # Bumped again: a reader between the flush and the commit saw the old rows
+    response_cache.bump(session.info.pop(_SESSION_KEY, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _tables_rolled_back(session: Session):
+    session.info.pop(_SESSION_KEY, None)
@@ -0,0 +1,78 @@
+"""
+Single-statement partial updates with optimistic concurrency
+An edit is one UPDATE ... SET <changed columns>, version = version + 1
+... RETURNING *, instead of get / setattr / commit / refresh. A client that
+sends the version it loaded gets a conflict, not a lost update, if someone
+else saved in between; the extra read only happens on that failure path.
+"""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from database import LP, GP, Person, Fund, Note, Todo, Distributor, Roadshow
+import facet_index
+import change_feed
+
+VERSIONED_MODELS = (LP, GP, Person, Fund, Note, Todo, Distributor, Roadshow)
+
+# Never written from a request body
+PROTECTED_COLUMNS = {"id", "version"}
+
+
+class VersionConflict(Exception):
+    """The row's version no longer matches the one the client edited"""
+
+    def __init__(self, current):
+        super().__init__(f"{type(current).__name__} {current.id} is at version {current.version}")
+        self.current = current
+
+
+def update_row(session: Session, model, row_id: int, values: Dict[str, Any], expected_version: Optional[int] = None):
+    """
+    Apply a partial update in one statement (caller commits)
+
+    Args:
+        model: One of VERSIONED_MODELS
+        values: Column -> new value; unknown and protected keys are ignored
+        expected_version: Version the client edited (None = last write wins)
+
+    Returns:
+        The updated record (a detached instance), or None if row_id doesn't exist
+
+    Raises:
+        VersionConflict: expected_version is stale; .current holds the row as stored
+    """
+    table = model.__table__
+    values = {key: value for key, value in values.items() if key in table.c and key not in PROTECTED_COLUMNS}
+
+    statement = update(table).where(table.c.id == row_id)
+    if expected_version is not None:
+        statement = statement.where(table.c.version == expected_version)
+    statement = statement.values(**values, version=table.c.version + 1).returning(*table.c)
+    statement = statement.execution_options(**change_feed.RECORDED)
+
+    row = session.execute(statement).first()
+    if row is None:
+        current = session.execute(select(table).where(table.c.id == row_id)).first()
+        if current is None:
+            return None
+        raise VersionConflict(model(**current._mapping))
+
+    record = model(**row._mapping)
+    # Core statements don't flush, so keep the multi-select index in step here
+    entity = facet_index.entity_for_model(model)
+    if entity and values.keys() & set(facet_index.multi_value_fields(entity)):
+        facet_index.sync_facet_values(session.connection(), entity, [record])
+    change_feed.record(session, table.name, row_id, "update", {key: getattr(record, key) for key in [*values, "version"]})
+    return record
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_versions(session: Session, flush_context, instances):
+    """ORM edits (job results, merges, ...) bump the version too, so stale clients notice them"""
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj, include_collections=False):
+            # Incremented in SQL, like update_row: the copy in memory may predate a concurrent update
+            obj.version = type(obj).version + 1
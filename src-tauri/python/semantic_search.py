@@ -0,0 +1,353 @@
+"""
+Semantic search over meeting notes
+Note text is embedded with the local Ollama embeddings endpoint (or a
+deterministic hashing vectorizer when offline) and stored as unit vectors in
+a memory-mapped float32 matrix keyed by note id
+"""
+
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from database import DB_DIR, Note, get_session
+from notion_blocks import blocks_to_text, load_blocks
+
+
+AI_SERVER_URL = os.getenv("CRM_AI_SERVER_URL", "http://localhost:11434")
+EMBED_MODEL = os.getenv("CRM_EMBED_MODEL", "nomic-embed-text")
+VECTOR_DIR = os.path.join(DB_DIR, "vectors")
+
+HASHING_DIM = 512
+MAX_EMBED_CHARS = 8000  # Keep prompts inside the embedding model's context
+EMBED_BATCH_SIZE = 32
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def text_hash(text: str) -> int:
+    """64-bit content hash used to skip re-embedding unchanged notes"""
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+
+
+def note_text(note: Note) -> str:
+    """Searchable text of a note: title, summaries and body"""
+    body = note.content_text or blocks_to_text(load_blocks(note.content_json))
+    if not body and note.raw_notes and not note.raw_notes.lstrip().startswith("["):
+        body = note.raw_notes  # Notion imports store block JSON in raw_notes
+
+    parts = [note.name, note.summary, note.ai_summary, body]
+    return "\n".join(part for part in parts if part)[:MAX_EMBED_CHARS]
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words/bigrams hashing vectorizer (works offline)"""
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing{dim}"
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        folded = unicodedata.normalize("NFKD", text.lower())
+        folded = "".join(c for c in folded if not unicodedata.combining(c))
+        words = re.findall(r"\w+", folded)
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in self._tokens(text):
+                h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                matrix[row, h % self.dim] += 1.0 if h >> 63 else -1.0
+        return _normalize_rows(matrix)
+
+    def available(self) -> bool:
+        return True
+
+
+class OllamaEmbedder:
+    """Embeddings from the local Ollama server (/api/embed)"""
+
+    def __init__(self, server_url: str = AI_SERVER_URL, model: str = EMBED_MODEL):
+        self.server_url = server_url
+        self.model = model
+        self.name = f"ollama-{re.sub(r'[^A-Za-z0-9_.-]', '_', model)}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        from http_client import get_client  # requests is slow to import; only needed once Ollama is used
+
+        response = get_client().post(
+            f"{self.server_url}/api/embed",
+            json={"model": self.model, "input": texts},
+            timeout=120
+        )
+        response.raise_for_status()
+        return _normalize_rows(np.asarray(response.json()["embeddings"], dtype=np.float32))
+
+    def available(self) -> bool:
+        from http_client import get_client
+
+        return get_client().check_available(f"{self.server_url}/api/tags")
+
+
+class VectorIndex:
+    """
+    Memory-mapped matrix of unit vectors keyed by integer id
+
+    Rows freed by deletes are reused; the files grow by doubling.
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        self._lock = threading.RLock()
+        self.dim: Optional[int] = None
+        self.count = 0  # Rows in use, including freed rows
+        self._vectors = self._ids = self._hashes = None
+        self._row_of: Dict[int, int] = {}
+        self._free_rows: List[int] = []
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._path("meta.json")) and os.path.exists(self._path("vectors.npy")):
+            self._load()
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.name}.{suffix}")
+
+    def _load(self):
+        with open(self._path("meta.json"), "r") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self._vectors = np.load(self._path("vectors.npy"), mmap_mode="r+")
+        self._ids = np.load(self._path("ids.npy"), mmap_mode="r+")
+        self._hashes = np.load(self._path("hashes.npy"), mmap_mode="r+")
+
+        ids = np.asarray(self._ids[:self.count])
+        self._row_of = {int(note_id): row for row, note_id in enumerate(ids) if note_id >= 0}
+        self._free_rows = [int(row) for row in np.flatnonzero(ids < 0)]
+
+    def _save_meta(self):
+        with open(self._path("meta.json"), "w") as f:
+            json.dump({"dim": self.dim, "count": self.count}, f)
+
+    def _allocate(self, dim: int, capacity: int):
+        """(Re)create the backing files with the given capacity, keeping existing rows"""
+        old = (self._vectors, self._ids, self._hashes, self.count)
+        open_memmap = np.lib.format.open_memmap
+
+        vectors = open_memmap(self._path("vectors.npy.tmp"), mode="w+", dtype=np.float32, shape=(capacity, dim))
+        ids = open_memmap(self._path("ids.npy.tmp"), mode="w+", dtype=np.int64, shape=(capacity,))
+        hashes = open_memmap(self._path("hashes.npy.tmp"), mode="w+", dtype=np.uint64, shape=(capacity,))
+        ids[:] = -1
+
+        if old[0] is not None and old[3]:
+            vectors[:old[3]] = old[0][:old[3]]
+            ids[:old[3]] = old[1][:old[3]]
+            hashes[:old[3]] = old[2][:old[3]]
+
+        for array in (vectors, ids, hashes):
+            array.flush()
+        del vectors, ids, hashes
+        self._vectors = self._ids = self._hashes = None
+        for suffix in ("vectors.npy", "ids.npy", "hashes.npy"):
+            os.replace(self._path(f"{suffix}.tmp"), self._path(suffix))
+
+        self.dim = dim
+        self._save_meta()
+        self._vectors = np.load(self._path("vectors.npy"), mmap_mode="r+")
+        self._ids = np.load(self._path("ids.npy"), mmap_mode="r+")
+        self._hashes = np.load(self._path("hashes.npy"), mmap_mode="r+")
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def content_hash(self, note_id: int) -> Optional[int]:
+        row = self._row_of.get(note_id)
+        return int(self._hashes[row]) if row is not None else None
+
+    def ids(self) -> List[int]:
+        return list(self._row_of)
+
+    def upsert(self, ids: List[int], vectors: np.ndarray, hashes: List[int]):
+        """Insert or replace vectors (rows must already be unit length)"""
+        with self._lock:
+            if self.dim is None:
+                self._allocate(vectors.shape[1], max(1024, len(ids)))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} != index dimension {self.dim}")
+
+            new_rows = sum(1 for note_id in ids if note_id not in self._row_of)
+            needed = self.count + max(0, new_rows - len(self._free_rows))
+            if needed > self._vectors.shape[0]:
+                self._allocate(self.dim, max(needed, self._vectors.shape[0] * 2))
+
+            for note_id, vector, content_hash in zip(ids, vectors, hashes):
+                row = self._row_of.get(note_id)
+                if row is None:
+                    if self._free_rows:
+                        row = self._free_rows.pop()
+                    else:
+                        row = self.count
+                        self.count += 1
+                    self._row_of[note_id] = row
+                self._vectors[row] = vector
+                self._ids[row] = note_id
+                self._hashes[row] = content_hash
+
+            self.flush()
+
+    def remove(self, ids: Iterable[int]):
+        with self._lock:
+            for note_id in ids:
+                row = self._row_of.pop(note_id, None)
+                if row is not None:
+                    self._ids[row] = -1
+                    self._vectors[row] = 0.0
+                    self._free_rows.append(row)
+            self.flush()
+
+    def flush(self):
+        if self._vectors is None:
+            return  # Nothing allocated yet
+        self._vectors.flush()
+        self._ids.flush()
+        self._hashes.flush()
+        self._save_meta()
+
+    def search(self, query_vector: np.ndarray, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-k (id, cosine similarity) pairs, best first"""
+        with self._lock:
+            if not self._row_of:
+                return []
+            scores = self._vectors[:self.count] @ query_vector.astype(np.float32)
+            scores[np.asarray(self._ids[:self.count]) < 0] = -np.inf
+
+            k = min(k, len(self._row_of))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[row]), float(scores[row])) for row in top]
+
+
+class NoteSemanticIndex:
+    """
+    Keeps note vector indexes in sync with the database
+
+    A hashing index is always maintained so search works offline; an Ollama
+    index is maintained alongside it whenever the AI server is reachable and
+    is preferred for queries.
+    """
+
+    def __init__(self, directory: str = VECTOR_DIR, server_url: str = AI_SERVER_URL):
+        self.directory = directory
+        self.embedders = [OllamaEmbedder(server_url), HashingEmbedder()]
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._queue: "queue.Queue[Optional[List[int]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def index_for(self, embedder) -> VectorIndex:
+        if embedder.name not in self._indexes:
+            self._indexes[embedder.name] = VectorIndex(self.directory, f"notes-{embedder.name}")
+        return self._indexes[embedder.name]
+
+    # Background updates
+    def start(self):
+        """Start the background indexer and queue a full sync"""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="note-indexer", daemon=True)
+        self._thread.start()
+        self._queue.put([])  # Empty list means "sync everything"
+
+    def stop(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def schedule(self, note_ids: List[int]):
+        """Re-embed these notes in the background (no-op for unchanged text)"""
+        self._queue.put(list(note_ids))
+
+    def _run(self):
+        while True:
+            note_ids = self._queue.get()
+            if note_ids is None:
+                return
+            try:
+                self.update(note_ids or None)
+            except Exception as e:
+                print(f"Note indexing error: {e}")
+
+    # Indexing
+    def update(self, note_ids: Optional[List[int]] = None):
+        """
+        Embed new or changed notes
+
+        Args:
+            note_ids: Notes to refresh; None syncs every note and drops deleted ones
+        """
+        with get_session() as session:
+            query = session.query(Note)
+            if note_ids is not None:
+                query = query.filter(Note.id.in_(note_ids))
+            texts = {note.id: note_text(note) for note in query.all()}
+
+        for embedder in self.embedders:
+            if not embedder.available():
+                continue
+            # One embedder failing (e.g. the Ollama model isn't pulled) mustn't stop the others
+            try:
+                self._update_index(embedder, texts, note_ids)
+            except Exception as e:
+                print(f"Note indexing error ({embedder.name}): {e}")
+
+    def _update_index(self, embedder, texts: Dict[int, str], note_ids: Optional[List[int]]):
+        index = self.index_for(embedder)
+
+        if note_ids is None:
+            index.remove([note_id for note_id in index.ids() if note_id not in texts])
+        else:
+            index.remove([note_id for note_id in note_ids if note_id not in texts])
+
+        changed = [
+            (note_id, text, text_hash(text))
+            for note_id, text in texts.items()
+            if index.content_hash(note_id) != text_hash(text)
+        ]
+        for start in range(0, len(changed), EMBED_BATCH_SIZE):
+            batch = changed[start:start + EMBED_BATCH_SIZE]
+            vectors = embedder.embed([text for _, text, _ in batch])
+            index.upsert([b[0] for b in batch], vectors, [b[2] for b in batch])
+
+    # Queries
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-k (note_id, score) for a free-text query"""
+        fallback_size = len(self.index_for(self.embedders[-1]))
+        for embedder in self.embedders:
+            index = self.index_for(embedder)
+            # Skip an index that is still catching up with the always-on hashing index
+            if len(index) == 0 or len(index) < fallback_size or not embedder.available():
+                continue
+            try:
+                query_vector = embedder.embed([query])[0]
+            except Exception as e:
+                print(f"Query embedding failed ({embedder.name}), trying the next index: {e}")
+                continue
+            return index.search(query_vector, k)
+        return []
+
+
+# Shared index used by the backend
+note_index = NoteSemanticIndex()
@@ -0,0 +1,139 @@
+"""
+SQL statement capture and N+1 detection
+Records every statement an engine executes inside a capture block and groups
+them by shape (literals and IN-lists collapsed) to spot queries issued once
+per row
+"""
+
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|:\w+|%s|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only in values compare equal"""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class CapturedQueries:
+    """Statements recorded by one QueryRecorder.capture() block"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(statement_shape(s) for s in self.statements)
+
+    def repeated(self, threshold: int = DEFAULT_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """(shape, count) of statement shapes executed more than threshold times"""
+        return [(shape, n) for shape, n in self.shapes().most_common() if n > threshold]
+
+    def report(self, limit: int = 10) -> str:
+        lines = [f"{self.count} queries"]
+        for shape, n in self.shapes().most_common(limit):
+            lines.append(f"  {n:>4} x {shape[:200]}")
+        return "\n".join(lines)
+
+    def assert_max(self, max_queries: int, label: str = ""):
+        if self.count > max_queries:
+            prefix = f"{label}: " if label else ""
+            raise AssertionError(f"{prefix}expected at most {max_queries} queries, got {self.report()}")
+
+    def assert_no_n_plus_one(self, threshold: int = DEFAULT_REPEAT_THRESHOLD, label: str = ""):
+        repeated = self.repeated(threshold)
+        if repeated:
+            prefix = f"{label}: " if label else ""
+            details = "\n".join(f"  {n:>4} x {shape[:200]}" for shape, n in repeated)
+            raise AssertionError(f"{prefix}possible N+1 queries (same statement > {threshold} times):\n{details}")
+
+
+class QueryRecorder:
+    """Collects statements executed on an engine while a capture block is open"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._active: List[CapturedQueries] = []
+        self._listening = False
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            for captured in self._active:
+                captured.statements.append(statement)
+
+    @contextmanager
+    def capture(self) -> Iterator[CapturedQueries]:
+        """
+        Record statements from any thread (TestClient runs the app in its own thread)
+
+        Blocks may nest; each sees every statement executed while it is open.
+        """
+        captured = CapturedQueries()
+        with self._lock:
+            if not self._listening:
+                event.listen(self.engine, "after_cursor_execute", self._on_execute)
+                self._listening = True
+            self._active.append(captured)
+        try:
+            yield captured
+        finally:
+            with self._lock:
+                self._active.remove(captured)
+                if not self._active:
+                    event.remove(self.engine, "after_cursor_execute", self._on_execute)
+                    self._listening = False
+
+    def count(self, call: Callable[[], object]) -> CapturedQueries:
+        """Run call() and return the statements it executed"""
+        with self.capture() as captured:
+            call()
+        return captured
+
+    def assert_constant(
+        self,
+        call: Callable[[], object],
+        grow: Callable[[], object],
+        label: str = "",
+        slack: int = 0
+    ) -> Tuple[int, int]:
+        """
+        Assert call() issues the same number of queries after grow() adds data
+
+        Args:
+            call: The request under test, e.g. lambda: client.get("/lps/1/people")
+            grow: Adds rows the call will read (more links, notes, ...)
+            slack: Extra queries allowed after growing
+
+        Returns:
+            (queries before, queries after)
+        """
+        before = self.count(call)
+        grow()
+        after = self.count(call)
+        if after.count > before.count + slack:
+            prefix = f"{label}: " if label else ""
+            raise AssertionError(
+                f"{prefix}query count grows with data ({before.count} -> {after.count})\n"
+                f"before: {before.report()}\nafter: {after.report()}"
+            )
+        return before.count, after.count
@@ -5,81 +5,301 @@ Connects to local AI server for processing
 
 import requests
 import json
-from typing import Optional, Dict
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ai_cache import AICache, get_default_cache, hash_text
+from http_client import get_client
+from json_repair import repair_json
+
+# Bump when a prompt changes so stale cache entries are ignored
+SUMMARY_PROMPT_VERSION = "2"
+CHUNK_PROMPT_VERSION = "2"
+
+# Streaming requests: connect timeout, and max silence between two chunks
+STREAM_TIMEOUT = (10, 120)
+
+# Map-reduce defaults for long transcripts
+DEFAULT_CHUNK_TOKENS = 3000
+DEFAULT_MAX_CONCURRENCY = 2
+CHARS_PER_TOKEN = 4  # Rough average for English/Spanish text
+
+# Structured output schema passed as Ollama's `format` parameter
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "key_points": {"type": "array", "items": {"type": "string"}},
+        "action_items": {"type": "array", "items": {"type": "string"}},
+        "fundraise": {"type": ["string", "null"]},
+        "interest": {"type": ["string", "null"]}
+    },
+    "required": ["summary", "key_points", "action_items", "fundraise", "interest"]
+}
+
+SUMMARY_PROMPT = """
+        Analyze the following meeting transcription and provide:
+        1. A concise summary (2-3 sentences)
+        2. Key discussion points (bullet points)
+        3. Action items (if any)
+        4. Fundraising status (if mentioned)
+        5. Interest level/sales funnel stage (if applicable)
+
+        Transcription:
+        {transcription}
+
+        Provide response in JSON format with keys: summary, key_points, action_items, fundraise, interest
+        """
+
+CHUNK_PROMPT = """
+        This is part {index} of {total} of a meeting transcription.
+        Summarize only this part and provide:
+        1. A concise summary (2-3 sentences)
+        2. Key discussion points (bullet points)
+        3. Action items (if any)
+        4. Fundraising status (if mentioned)
+        5. Interest level/sales funnel stage (if applicable)
+
+        Transcription part:
+        {chunk}
+
+        Provide response in JSON format with keys: summary, key_points, action_items, fundraise, interest
+        """
+
+REDUCE_PROMPT = """
+        The following are summaries of consecutive parts of one meeting, in order.
+        Combine them into a single result for the whole meeting:
+        1. A concise summary (2-3 sentences)
+        2. Key discussion points (bullet points, without duplicates)
+        3. All action items (without duplicates)
+        4. Fundraising status (if mentioned, latest wins)
+        5. Interest level/sales funnel stage (if applicable, latest wins)
+
+        Partial summaries (JSON):
+        {partials}
+
+        Provide response in JSON format with keys: summary, key_points, action_items, fundraise, interest
+        """
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer available for the server-side model)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_transcript(text: str, chunk_tokens: int) -> List[str]:
+    """
+    Split a transcript into chunks of at most chunk_tokens (estimated)
+
+    Splits on paragraph/line breaks first, then sentences, and only cuts
+    mid-sentence when a single sentence is over budget.
+    """
+    max_chars = chunk_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for line in text.splitlines():
+        if len(line) <= max_chars:
+            pieces.append(line)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", line):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            pieces.append(sentence)
+
+    chunks = []
+    current = []
+    current_len = 0
+    for piece in pieces:
+        if current and current_len + len(piece) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, current_len = [], 0
+        current.append(piece)
+        current_len += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def normalize_summary(parsed, response_text: str = "") -> Dict:
+    """
+    Coerce a parsed model response into the summary shape
+
+    If nothing could be parsed, the full response text becomes the summary.
+    """
+    if not isinstance(parsed, dict):
+        parsed = {"summary": response_text.strip()}
+
+    def as_list(value):
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return value
+        return [value]
+
+    return {
+        "summary": parsed.get("summary") or "",
+        "key_points": as_list(parsed.get("key_points")),
+        "action_items": as_list(parsed.get("action_items")),
+        "fundraise": parsed.get("fundraise"),
+        "interest": parsed.get("interest")
+    }
+
+
+def _group_by_budget(partials: List[Dict], chunk_tokens: int) -> List[List[Dict]]:
+    """Group consecutive partial summaries so each group fits one reduce prompt"""
+    groups = []
+    current = []
+    for partial in partials:
+        if current and estimate_tokens(json.dumps(current + [partial])) > chunk_tokens:
+            groups.append(current)
+            current = []
+        current.append(partial)
+    if current:
+        groups.append(current)
+    return groups
 
 
 class SummarizationAgent:
     """AI agent for summarizing meeting transcriptions"""
 
-    def __init__(self, server_url: str = "http://localhost:11434", model: str = "llama3"):
+    def __init__(
+        self,
+        server_url: str = "http://localhost:11434",
+        model: str = "llama3",
+        cache: Optional[AICache] = None,
+        use_cache: bool = True,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ):
         """
         Initialize summarization agent
 
         Args:
             server_url: URL of local AI server (Ollama)
             model: Model name to use (llama3, mistral, etc.)
+            cache: Result cache (defaults to the shared on-disk cache)
+            use_cache: Set False to always hit the AI server
+            chunk_tokens: Token budget per prompt; longer transcripts use map-reduce
+            max_concurrency: Max parallel chunk requests to the AI server
         """
         self.server_url = server_url
         self.model = model
         self.generate_endpoint = f"{server_url}/api/generate"
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max(1, max_concurrency)
+
+    def _cache_key(self, text: str, prompt_version: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return AICache.make_key(hash_text(text), self.model, prompt_version)
 
-    def summarize_transcription(self, transcription: str) -> Dict[str, str]:
+    def stream_generate(self, prompt: str, format: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Stream a completion from Ollama's NDJSON /api/generate response
+
+        The read timeout applies between chunks, so long completions don't
+        time out as long as the model keeps producing tokens.
+
+        Args:
+            prompt: Prompt text
+            format: Optional JSON schema the response must follow
+
+        Yields:
+            Response text fragments as they arrive
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True
+        }
+        if format is not None:
+            payload["format"] = format
+
+        with get_client().stream(
+            "POST",
+            self.generate_endpoint,
+            json=payload,
+            timeout=STREAM_TIMEOUT
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"AI server error: {response.status_code}")
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise Exception(f"AI server error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    def _complete(self, prompt: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Run a streamed structured-output completion and return the full response text"""
+        fragments = []
+        for fragment in self.stream_generate(prompt, format=SUMMARY_SCHEMA):
+            fragments.append(fragment)
+            if on_token:
+                on_token(fragment)
+        return "".join(fragments)
+
+    def summarize_transcription(
+        self,
+        transcription: str,
+        raise_on_error: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, str]:
         """
         Generate summary from meeting transcription
 
+        Summary and action items come from a single structured-output request.
+        Transcriptions longer than chunk_tokens are summarized hierarchically:
+        chunks are summarized concurrently, then the partial summaries are
+        merged into the final result.
+
         Args:
             transcription: Raw meeting transcription
+            raise_on_error: Raise instead of returning a placeholder summary
+            on_token: Called with each streamed response fragment (final pass only)
+            on_progress: Called with (chunks done, total) as each chunk is summarized;
+                an exception it raises (e.g. a cancelled job) stops the remaining chunks
 
         Returns:
             Dict containing summary and extracted info
         """
+        map_reduce = estimate_tokens(transcription) > self.chunk_tokens
+        prompt_version = SUMMARY_PROMPT_VERSION
+        if map_reduce:
+            prompt_version = f"{SUMMARY_PROMPT_VERSION}-mr{self.chunk_tokens}"
 
-        prompt = f"""
-        Analyze the following meeting transcription and provide:
-        1. A concise summary (2-3 sentences)
-        2. Key discussion points (bullet points)
-        3. Action items (if any)
-        4. Fundraising status (if mentioned)
-        5. Interest level/sales funnel stage (if applicable)
-
-        Transcription:
-        {transcription}
-
-        Provide response in JSON format with keys: summary, key_points, action_items, fundraise, interest
-        """
+        cache_key = self._cache_key(transcription, prompt_version)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
         try:
-            response = requests.post(
-                self.generate_endpoint,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=120
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get('response', '')
-
-                # Parse JSON response from model
-                try:
-                    parsed = json.loads(response_text)
-                    return parsed
-                except json.JSONDecodeError:
-                    # Fallback if model doesn't return valid JSON
-                    return {
-                        "summary": response_text[:500],
-                        "key_points": [],
-                        "action_items": [],
-                        "fundraise": None,
-                        "interest": None
-                    }
+            if map_reduce:
+                partials = self._map_chunks(split_transcript(transcription, self.chunk_tokens), on_progress)
+                response_text = self._reduce_partials(partials, on_token)
             else:
-                raise Exception(f"AI server error: {response.status_code}")
+                response_text = self._complete(SUMMARY_PROMPT.format(transcription=transcription), on_token)
+
+            # Parse JSON response from model, repairing truncated output
+            parsed = repair_json(response_text)
+            result = normalize_summary(parsed, response_text)
+            if cache_key and isinstance(parsed, dict):
+                self.cache.set(cache_key, result)
+            return result
 
         except requests.exceptions.ConnectionError:
+            if raise_on_error:
+                raise
             print("AI server not connected. Using placeholder.")
             return {
                 "summary": "[Connect to office AI server for summarization]",
@@ -90,6 +310,8 @@ class SummarizationAgent:
             }
 
         except Exception as e:
+            if raise_on_error:
+                raise
             print(f"Summarization error: {e}")
             return {
                 "summary": f"[Summarization error: {str(e)}]",
@@ -99,57 +321,78 @@ class SummarizationAgent:
                 "interest": None
             }
 
+    def _summarize_chunk(self, chunk: str, index: int, total: int) -> Dict:
+        """Map step: summarize one transcript chunk (cached per chunk so retries resume)"""
+        cache_key = self._cache_key(chunk, CHUNK_PROMPT_VERSION)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        response_text = self._complete(CHUNK_PROMPT.format(index=index + 1, total=total, chunk=chunk))
+        parsed = repair_json(response_text)
+        result = normalize_summary(parsed, response_text)
+        if cache_key and isinstance(parsed, dict):
+            self.cache.set(cache_key, result)
+        return result
+
+    def _map_chunks(self, chunks: List[str], on_progress: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        """Summarize all chunks, at most max_concurrency requests at a time"""
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            futures = [
+                executor.submit(self._summarize_chunk, chunk, i, len(chunks))
+                for i, chunk in enumerate(chunks)
+            ]
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                if on_progress:
+                    on_progress(done, len(chunks))
+            return [future.result() for future in futures]
+        finally:
+            # On a failed chunk or a cancel, chunks still queued are dropped
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _reduce_partials(self, partials: List[Dict], on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Reduce step: merge partial summaries into the final JSON response text
+
+        If the partials don't fit in one prompt, they are merged in groups
+        first (concurrently) until they do.
+        """
+        while len(partials) > 1 and estimate_tokens(json.dumps(partials)) > self.chunk_tokens:
+            groups = _group_by_budget(partials, self.chunk_tokens)
+            if len(groups) == len(partials):
+                break  # every partial is already over budget on its own
+
+            def merge(group):
+                text = self._complete(REDUCE_PROMPT.format(partials=json.dumps(group, indent=1)))
+                return normalize_summary(repair_json(text), text)
+
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                partials = list(executor.map(merge, groups))
+
+        return self._complete(REDUCE_PROMPT.format(partials=json.dumps(partials, indent=1)), on_token)
+
     def extract_action_items(self, transcription: str) -> list:
         """
         Extract action items from meeting transcription
 
+        Action items are part of the structured summary, so this shares the
+        summary request (and its cache entry) instead of asking the model again.
+
         Args:
             transcription: Raw meeting transcription
 
         Returns:
             List of action items
         """
-        prompt = f"""
-        Extract all action items and follow-up tasks from this meeting transcription.
-        Return as a JSON array of strings.
-
-        Transcription:
-        {transcription}
-        """
-
-        try:
-            response = requests.post(
-                self.generate_endpoint,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=60
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get('response', '')
-
-                try:
-                    return json.loads(response_text)
-                except json.JSONDecodeError:
-                    return []
-
-            return []
-
-        except Exception as e:
-            print(f"Action item extraction error: {e}")
-            return []
+        result = self.summarize_transcription(transcription)
+        return result.get("action_items", [])
 
     def check_server_status(self) -> bool:
-        """Check if AI server is reachable"""
-        try:
-            response = requests.get(f"{self.server_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        """Check if AI server is reachable (cached briefly; False immediately while the circuit is open)"""
+        return get_client().check_available(f"{self.server_url}/api/tags", timeout=5)
 
 
 def summarize_meeting(transcription: str, server_url: Optional[str] = None) -> Dict[str, str]:
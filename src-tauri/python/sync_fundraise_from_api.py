@@ -6,9 +6,10 @@ This script fetches the current Fundraise property values from Notion and update
 
 import os
 import sqlite3
-import requests
 from typing import Dict, List
 
+from http_client import get_client
+
 # Notion API credentials
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 NOTION_DATABASE_ID = os.getenv("NOTION_NOTES_DATABASE_ID")  # Your Notes database ID
@@ -39,7 +40,7 @@ def fetch_all_notes_from_notion() -> List[Dict]:
         if start_cursor:
             payload["start_cursor"] = start_cursor
 
-        response = requests.post(url, headers=headers, json=payload)
+        response = get_client().post(url, headers=headers, json=payload)
 
         if response.status_code != 200:
             print(f"Error fetching from Notion API: {response.status_code}")
@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic CRM dataset for benchmarks
+Generates LPs, GPs, distributors, funds, roadshows, people, notes (with
+Notion-like block trees) and every link table at a configurable scale, and can
+write them either straight into a database or as Notion export JSON files the
+importers read. The same (scale, seed) always produces the same data.
+"""
+
+import json
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+from database import (
+    LP, GP, Person, Note, Todo, Distributor, Fund, Roadshow,
+    GPLPLink, GPPersonLink, LPPersonLink, DistributorPersonLink,
+    NoteLPLink, NoteGPLink, NoteDistributorLink, NoteFundLink, NoteRoadshowLink,
+    FundLPInterest, FundLPInterestChange, RoadshowLPStatus, NoteImage, FacetValue
+)
+from facet_index import MULTI_VALUE_FIELDS, facet_rows
+from funnel_analytics import PIPELINE
+from notion_blocks import iter_blocks
+
+
+# Row counts at scale 1 (roughly the size of the production CRM)
+BASE_COUNTS = {
+    "distributor": 15,
+    "gp": 120,
+    "lp": 250,
+    "fund": 40,
+    "roadshow": 12,
+    "person": 500,
+    "note": 800,
+}
+SCALES = {"1x": 1, "10x": 10, "100x": 100}
+DEFAULT_SEED = 42
+
+DUPLICATE_PERSON_RATE = 0.02  # Near-duplicate people, so dedup has work to do
+START_DATE = datetime(2019, 1, 1)
+
+# Insert order respects foreign keys
+TABLES = [
+    Distributor, LP, GP, Fund, Roadshow, Person, Note, Todo, NoteImage,
+    GPLPLink, GPPersonLink, LPPersonLink, DistributorPersonLink,
+    NoteLPLink, NoteGPLink, NoteDistributorLink, NoteFundLink, NoteRoadshowLink,
+    FundLPInterest, RoadshowLPStatus, FacetValue, FundLPInterestChange,
+]
+
+FIRST_NAMES = [
+    "Alejandro", "Ana", "Carlos", "Carmen", "Diego", "Elena", "Fernando", "Gabriela",
+    "Javier", "Laura", "Luis", "María", "Mariana", "Miguel", "Patricia", "Pablo",
+    "Rafael", "Regina", "Ricardo", "Sofía", "Jorge", "Daniela", "Eduardo", "Valeria",
+    "John", "Sarah", "Michael", "Emily", "David", "Jessica", "James", "Rachel",
+]
+LAST_NAMES = [
+    "García", "Hernández", "López", "Martínez", "González", "Rodríguez", "Pérez", "Sánchez",
+    "Ramírez", "Torres", "Flores", "Rivera", "Gómez", "Díaz", "Cruz", "Morales",
+    "Garza", "Treviño", "Villarreal", "Sada", "Zambrano", "Smith", "Johnson", "Brown",
+    "Miller", "Davis", "Wilson", "Anderson", "Taylor", "Thomas", "Moore", "Clark",
+]
+ORG_WORDS = [
+    "Capital", "Patrimonial", "Inversiones", "Grupo", "Family Office", "Asset Management",
+    "Partners", "Holdings", "Wealth", "Advisors", "Ventures", "Equity", "Alternativos",
+]
+ORG_PREFIXES = [
+    "Altum", "Bosque", "Cumbre", "Delta", "Encino", "Faro", "Granito", "Horizonte", "Iris",
+    "Jade", "Lince", "Monte", "Nogal", "Olmo", "Pinar", "Quetzal", "Roble", "Sierra",
+    "Tlaloc", "Valle", "Atlas", "Beacon", "Crest", "Harbor", "Summit", "Meridian",
+    "Northgate", "Ridgeline", "Sterling", "Westbrook",
+]
+LEGAL_SUFFIXES = ["", "", " S.A. de C.V.", " SAPI de CV", " LLC", " LP"]
+CITIES = ["Mexico City", "Monterrey", "Guadalajara", "Querétaro", "Mérida", "New York", "Miami", "Houston"]
+STRATEGIES = ["Private Equity", "Venture Capital", "Private Credit", "Real Estate", "Infrastructure", "Secondaries"]
+SECTORS = ["Healthcare", "Technology", "Consumer", "Industrials", "Energy", "Financials", "Logistics"]
+LP_TYPES = ["Family Office", "Multi-Family Office", "Afore", "Insurance", "Bank", "Endowment"]
+PRIORITIES = ["High", "Medium", "Low"]
+INTEREST_LEVELS = ["Yes", "No", "Maybe"]
+CONTACT_LEVELS = ["Partner", "Open Dialogue", "Introduced", "Cold"]
+CONTACT_TYPES = ["Meeting", "Call", "Email", "Conference", "Roadshow"]
+FUND_STATUSES = ["Fundraising", "Pipeline", "Closed", "On Hold"]
+FUNNEL_STAGES = [
+    "inactive", "commitment", "due_diligence", "interested",
+    "meeting", "meeting_offered", "no_reply", "low_probability",
+]
+ROADSHOW_STATUSES = ["inactive", "declined", "offered", "interested", "confirmed"]
+SENTENCES = [
+    "Discussed the fund's track record and the team's realized exits.",
+    "They are rebalancing toward private credit over the next two years.",
+    "Strong interest in healthcare and logistics; asked for the sector breakdown.",
+    "Investment committee meets quarterly, next window is in March.",
+    "Ticket size would be between five and fifteen million dollars.",
+    "Follow up with the data room link and the latest quarterly report.",
+    "Concerned about currency exposure; asked whether a peso feeder is planned.",
+    "Already invested with two of our GPs, satisfied with reporting.",
+    "Would like to meet the partners during the next Monterrey roadshow.",
+    "Prefers co-investment rights alongside the main commitment.",
+    "No appetite for venture this year, focus on yield.",
+    "Asked for references from other Mexican family offices.",
+]
+
+
+class _Generator:
+    """Builds one dataset; all randomness comes from a single seeded Random"""
+
+    def __init__(self, scale: int, seed: int):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.rows: Dict[str, List[dict]] = {model.__tablename__: [] for model in TABLES}
+        self.block_counter = 0
+
+    def count(self, table: str) -> int:
+        return BASE_COUNTS[table] * self.scale
+
+    def notion_id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def date(self, span_days: int = 6 * 365) -> datetime:
+        return START_DATE + timedelta(days=self.rng.randrange(span_days), minutes=self.rng.randrange(24 * 60))
+
+    def person_name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def org_name(self, index: int) -> str:
+        # Index suffix keeps names unique at large scales without looking generated
+        prefix = ORG_PREFIXES[index % len(ORG_PREFIXES)]
+        return f"{prefix} {self.rng.choice(ORG_WORDS)} {index // len(ORG_PREFIXES) + 1}{self.rng.choice(LEGAL_SUFFIXES)}"
+
+    def sample(self, population: int, low: int, high: int) -> List[int]:
+        """Distinct 1-based ids"""
+        k = min(population, self.rng.randint(low, high))
+        return sorted(self.rng.sample(range(1, population + 1), k))
+
+    # Entities
+    def build(self) -> Dict[str, List[dict]]:
+        self.build_distributors()
+        self.build_lps()
+        self.build_gps()
+        self.build_funds()
+        self.build_roadshows()
+        self.build_people()
+        self.build_notes()
+        self.build_facet_values()
+        self.build_interest_history()
+        return self.rows
+
+    def build_distributors(self):
+        for i in range(1, self.count("distributor") + 1):
+            self.rows["distributor"].append({
+                "id": i,
+                "notion_id": self.notion_id(),
+                "name": self.org_name(i),
+                "headquarter": self.rng.choice(CITIES),
+                "mexico": self.rng.choice(INTEREST_LEVELS),
+                "text": self.rng.choice(SENTENCES),
+            })
+
+    def build_lps(self):
+        for i in range(1, self.count("lp") + 1):
+            low = self.rng.choice([1, 2, 5, 10, 20])
+            self.rows["lp"].append({
+                "id": i,
+                "notion_id": self.notion_id(),
+                "name": self.org_name(i),
+                "aum_billions": round(self.rng.lognormvariate(0, 1.2), 2),
+                "intl_alts": self.rng.choice(INTEREST_LEVELS),
+                "intl_mf": self.rng.choice(INTEREST_LEVELS),
+                "local_alts": self.rng.choice(INTEREST_LEVELS),
+                "local_mf": self.rng.choice(INTEREST_LEVELS),
+                "investment_low": float(low),
+                "investment_high": float(low * self.rng.choice([2, 3, 5])),
+                "location": self.rng.choice(CITIES),
+                "priority": self.rng.choice(PRIORITIES),
+                "type_of_group": self.rng.choice(LP_TYPES),
+                "text": self.rng.choice(SENTENCES),
+            })
+
+    def build_gps(self):
+        lps = self.count("lp")
+        for i in range(1, self.count("gp") + 1):
+            self.rows["gp"].append({
+                "id": i,
+                "notion_id": self.notion_id(),
+                "name": self.org_name(i + 7),
+                "location": self.rng.choice(CITIES),
+                "contact_level": self.rng.choice(CONTACT_LEVELS),
+                "flagship_strategy": self.rng.choice(STRATEGIES),
+                "other_strategies": ", ".join(self.rng.sample(STRATEGIES, 2)),
+                "note": self.rng.choice(SENTENCES),
+                "distributor_id": self.rng.randint(1, self.count("distributor")) if self.rng.random() < 0.6 else None,
+            })
+            for lp_id in self.sample(lps, 0, 6):
+                self.rows["gplplink"].append({"gp_id": i, "lp_id": lp_id})
+
+    def build_funds(self):
+        gps = self.rows["gp"]
+        for i in range(1, self.count("fund") + 1):
+            gp = self.rng.choice(gps)
+            target = float(self.rng.choice([100, 250, 500, 750, 1000, 2000]))
+            self.rows["fund"].append({
+                "id": i,
+                "notion_id": self.notion_id(),
+                "fund_name": f"{gp['name'].split(' ')[0]} {self.rng.choice(STRATEGIES)} Fund {self.rng.choice(['II', 'III', 'IV', 'V'])}",
+                "geography": self.rng.choice(["US", "Europe", "LatAm", "Global"]),
+                "target_multiple": round(self.rng.uniform(1.5, 3.0), 1),
+                "status": self.rng.choice(FUND_STATUSES),
+                "days_to_rs": self.rng.randint(0, 180),
+                "target_irr": f"{self.rng.choice([12, 15, 18, 20, 25])}+",
+                "hard_cap_mn": target * 1.25,
+                "target_mn": target,
+                "roadshow_date": self.date(),
+                "sectors": ", ".join(self.rng.sample(SECTORS, 2)),
+                "note": self.rng.choice(SENTENCES),
+                "potential": self.rng.choice(PRIORITIES),
+                "asset_class": self.rng.choice(STRATEGIES),
+                "launch": self.date(),
+                "closed": self.rng.random() < 0.2,
+                "gp_notion_id": gp["notion_id"],
+            })
+            for lp_id in self.sample(self.count("lp"), 5, 40):
+                self.rows["fundlpinterest"].append({
+                    "fund_id": i,
+                    "lp_id": lp_id,
+                    "interest": self.rng.choice(FUNNEL_STAGES),
+                })
+
+    def build_roadshows(self):
+        for i in range(1, self.count("roadshow") + 1):
+            arrival = self.date()
+            self.rows["roadshow"].append({
+                "id": i,
+                "name": f"{arrival:%b %Y} {self.rng.choice(['Mexico', 'Monterrey', 'CDMX'])} Roadshow",
+                "fund_id": self.rng.randint(1, self.count("fund")),
+                "arrival": arrival,
+                "arrival_city": "Monterrey",
+                "second_city": "Mexico City",
+                "second_arrival": arrival + timedelta(days=2),
+                "departure": arrival + timedelta(days=4),
+                "lv_flight": self.rng.choice(["Needed", "Done", "None"]),
+                "lv_hotel": self.rng.choice(["Needed", "Done", "None"]),
+                "mty_driver": self.rng.choice(["Needed", "Done", "None"]),
+                "cdmx_driver": self.rng.choice(["Needed", "Done", "None"]),
+                "notes": self.rng.choice(SENTENCES),
+            })
+            for lp_id in self.sample(self.count("lp"), 5, 25):
+                self.rows["roadshowlpstatus"].append({
+                    "roadshow_id": i,
+                    "lp_id": lp_id,
+                    "status": self.rng.choice(ROADSHOW_STATUSES),
+                })
+
+    def build_people(self):
+        people = self.rows["person"]
+        for i in range(1, self.count("person") + 1):
+            if people and self.rng.random() < DUPLICATE_PERSON_RATE:
+                # Same person entered twice with a typo or missing accent
+                original = self.rng.choice(people)
+                name = original["name"].replace("í", "i").replace("á", "a")
+                if name == original["name"]:
+                    name = name[:-1]
+                email = original["email"]
+            else:
+                name = self.person_name()
+                email = f"{name.split(' ')[0].lower()}.{i}@example.com"
+            kind = self.rng.choice(["LP", "GP", "Distributor"])
+            people.append({
+                "id": i,
+                "notion_id": self.notion_id(),
+                "name": name,
+                "cell_phone": f"+52 81 {self.rng.randrange(10 ** 8):08d}",
+                "office_phone": f"+52 55 {self.rng.randrange(10 ** 8):08d}",
+                "email": email,
+                "location": self.rng.choice(CITIES),
+                "position": self.rng.choice(["Partner", "CIO", "Analyst", "Managing Director", "Associate"]),
+                "people_type": kind,
+                "personal_note": self.rng.choice(SENTENCES) if self.rng.random() < 0.3 else None,
+            })
+            if kind == "LP":
+                self.rows["lppersonlink"].append({"lp_id": self.rng.randint(1, self.count("lp")), "person_id": i})
+            elif kind == "GP":
+                self.rows["gppersonlink"].append({"gp_id": self.rng.randint(1, self.count("gp")), "person_id": i})
+            else:
+                self.rows["distributorpersonlink"].append({
+                    "distributor_id": self.rng.randint(1, self.count("distributor")),
+                    "person_id": i,
+                })
+
+    # Notes
+    def rich_text(self, text: str) -> List[dict]:
+        return [{"type": "text", "text": {"content": text}, "plain_text": text}]
+
+    def block(self, block_type: str, text: Optional[str] = None, children: Optional[List[dict]] = None) -> dict:
+        self.block_counter += 1
+        block = {
+            "object": "block",
+            "id": str(uuid.UUID(int=self.block_counter, version=4)),
+            "type": block_type,
+            "has_children": bool(children),
+            block_type: {"rich_text": self.rich_text(text)} if text is not None else {},
+        }
+        if children:
+            block["children"] = children
+        return block
+
+    def image_block(self) -> dict:
+        block = self.block("image")
+        block["image"] = {"type": "file", "caption": []}
+        block["local_image_path"] = f"notion_images/{block['id']}_{self.rng.getrandbits(32):08x}.png"
+        return block
+
+    def note_blocks(self) -> List[dict]:
+        """Notion-like page body: headings, paragraphs, lists, toggles, columns and images"""
+        blocks = [self.block("heading_2", self.rng.choice(["Summary", "Meeting notes", "Next steps"]))]
+        for _ in range(self.rng.randint(2, 10)):
+            roll = self.rng.random()
+            if roll < 0.45:
+                blocks.append(self.block("paragraph", " ".join(self.rng.sample(SENTENCES, 3))))
+            elif roll < 0.7:
+                blocks.append(self.block("bulleted_list_item", self.rng.choice(SENTENCES)))
+            elif roll < 0.8:
+                blocks.append(self.block("to_do", self.rng.choice(SENTENCES)))
+            elif roll < 0.88:
+                blocks.append(self.block("toggle", "Details", [
+                    self.block("paragraph", self.rng.choice(SENTENCES)),
+                    self.block("bulleted_list_item", self.rng.choice(SENTENCES)),
+                ]))
+            elif roll < 0.93:
+                blocks.append(self.block("column_list", children=[
+                    self.block("column", children=[self.block("paragraph", self.rng.choice(SENTENCES))]),
+                    self.block("column", children=[self.image_block()]),
+                ]))
+            else:
+                blocks.append(self.image_block())
+        return blocks
+
+    def build_notes(self):
+        for i in range(1, self.count("note") + 1):
+            blocks = self.note_blocks()
+            content_json = json.dumps(blocks)
+            lp_ids = self.sample(self.count("lp"), 0, 3)
+            name = self.rows["lp"][lp_ids[0] - 1]["name"] if lp_ids else self.person_name()
+            summary = self.rng.choice(SENTENCES)
+
+            self.rows["note"].append({
+                "id": i,
+                "notion_id": self.notion_id(),
+                "name": f"{self.rng.choice(CONTACT_TYPES)} - {name}",
+                "date": self.date(),
+                "contact_type": self.rng.choice(CONTACT_TYPES),
+                "local_mf": self.rng.choice(INTEREST_LEVELS),
+                "local_alts": self.rng.choice(INTEREST_LEVELS),
+                "intl_mf": self.rng.choice(INTEREST_LEVELS),
+                "intl_alts": self.rng.choice(INTEREST_LEVELS),
+                "pin": self.rng.choice(["Useful", None, None]),
+                "useful": self.rng.random() < 0.3,
+                "ai_summary": summary,
+                "content_json": content_json,
+                "image_paths": None,
+                "raw_notes": content_json,
+                "summary": summary,
+                "interest": self.rng.choice(FUNNEL_STAGES),
+            })
+
+            position = 0
+            for block in iter_blocks(blocks):
+                if block["type"] == "image":
+                    self.rows["noteimage"].append({
+                        "note_id": i,
+                        "block_id": block["id"],
+                        "path": block["local_image_path"],
+                        "position": position,
+                    })
+                    position += 1
+            if position:
+                self.rows["note"][-1]["image_paths"] = ",".join(
+                    row["path"] for row in self.rows["noteimage"][-position:]
+                )
+
+            for lp_id in lp_ids:
+                self.rows["notelplink"].append({"note_id": i, "lp_id": lp_id})
+            for gp_id in self.sample(self.count("gp"), 0, 2):
+                self.rows["notegplink"].append({"note_id": i, "gp_id": gp_id})
+            if self.rng.random() < 0.15:
+                self.rows["notedistributorlink"].append({
+                    "note_id": i,
+                    "distributor_id": self.rng.randint(1, self.count("distributor")),
+                })
+            for fund_id in self.sample(self.count("fund"), 0, 2):
+                self.rows["notefundlink"].append({"note_id": i, "fund_id": fund_id})
+            if self.rng.random() < 0.1:
+                self.rows["noteroadshowlink"].append({
+                    "note_id": i,
+                    "roadshow_id": self.rng.randint(1, self.count("roadshow")),
+                })
+            for _ in range(self.rng.choice([0, 0, 1, 2])):
+                self.rows["todo"].append({
+                    "note_id": i,
+                    "description": self.rng.choice(SENTENCES),
+                    "status": self.rng.choice(["pending", "completed"]),
+                    "due_date": self.date(),
+                })
+
+
+    def build_facet_values(self):
+        """Derived rows, as facet_index writes them on import"""
+        for entity in MULTI_VALUE_FIELDS:
+            for row in self.rows[entity]:
+                self.rows["facetvalue"].extend(facet_rows(entity, row["id"], row))
+
+    def build_interest_history(self):
+        """Stage changes leading to each LP's current interest (last, so earlier tables don't change)"""
+        for row in self.rows["fundlpinterest"]:
+            final = row["interest"]
+            if final in PIPELINE:
+                earlier = PIPELINE[:PIPELINE.index(final)]
+                path = sorted(self.rng.sample(earlier, self.rng.randint(0, len(earlier))), key=PIPELINE.index) + [final]
+            else:
+                path = self.rng.choice([[], ["meeting_offered"]]) + ([] if final == "inactive" else [final])
+                if final == "inactive" and path:
+                    path.append("inactive")
+            changed_at, previous = self.date(), "inactive"
+            for stage in path:
+                self.rows["fundlpinterestchange"].append({
+                    "fund_id": row["fund_id"],
+                    "lp_id": row["lp_id"],
+                    "from_interest": previous,
+                    "to_interest": stage,
+                    "changed_at": changed_at,
+                })
+                changed_at += timedelta(days=self.rng.randint(3, 90))
+                previous = stage
+
+
+def generate_dataset(scale: int = 1, seed: int = DEFAULT_SEED) -> Dict[str, List[dict]]:
+    """
+    Build a synthetic dataset
+
+    Args:
+        scale: Multiplier on BASE_COUNTS (1, 10, 100, ...)
+        seed: Random seed; the same (scale, seed) always gives the same rows
+
+    Returns:
+        Rows (column dicts) keyed by table name
+    """
+    return _Generator(scale, seed).build()
+
+
+def populate_database(engine: Engine, dataset: Dict[str, List[dict]]):
+    """Create the schema on engine and bulk-insert the dataset (tables should be empty)"""
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for model in TABLES:
+            rows = dataset.get(model.__tablename__)
+            if rows:
+                conn.execute(model.__table__.insert(), rows)
+
+
+# Notion export format (what import_from_notion_complete / import_funds read)
+def _title(value):
+    return {"type": "title", "title": [{"plain_text": value or ""}]}
+
+
+def _text(value):
+    return {"type": "rich_text", "rich_text": [{"plain_text": value}] if value else []}
+
+
+def _select(value):
+    return {"type": "select", "select": {"name": value} if value else None}
+
+
+def _multi_select(value):
+    names = [v.strip() for v in (value or "").split(",") if v.strip()]
+    return {"type": "multi_select", "multi_select": [{"name": name} for name in names]}
+
+
+def _number(value):
+    return {"type": "number", "number": value}
+
+
+def _date(value):
+    return {"type": "date", "date": {"start": value.isoformat()} if value else None}
+
+
+def _relation(notion_ids):
+    return {"type": "relation", "relation": [{"id": notion_id} for notion_id in notion_ids]}
+
+
+def _page(notion_id: str, properties: dict, **extra) -> dict:
+    return {"object": "page", "id": notion_id, "properties": properties, **extra}
+
+
+def notion_exports(dataset: Dict[str, List[dict]]) -> Dict[str, dict]:
+    """Notion export documents ({"pages": [...]}) keyed by entity: distributors, lps, gps, people, funds, notes"""
+    ids = {
+        table: {row["id"]: row["notion_id"] for row in dataset[table]}
+        for table in ("distributor", "lp", "gp", "fund")
+    }
+
+    def related(link_table, key, value_key, table):
+        grouped: Dict[int, List[str]] = {}
+        for link in dataset[link_table]:
+            grouped.setdefault(link[key], []).append(ids[table][link[value_key]])
+        return grouped
+
+    pages = {
+        "distributors": [
+            _page(d["notion_id"], {
+                "Name": _title(d["name"]),
+                "Headquarter": _text(d["headquarter"]),
+                "Mex": _select(d["mexico"]),
+                "Text": _text(d["text"]),
+            })
+            for d in dataset["distributor"]
+        ],
+        "lps": [
+            _page(lp["notion_id"], {
+                "Name": _title(lp["name"]),
+                "AUM (B)": _number(lp["aum_billions"]),
+                "Intl. Atls.": _select(lp["intl_alts"]),
+                "Intl. MF": _select(lp["intl_mf"]),
+                "Local Alts.": _select(lp["local_alts"]),
+                "Local MF": _select(lp["local_mf"]),
+                "Investment LOW": _number(lp["investment_low"]),
+                "Investment HIGH": _number(lp["investment_high"]),
+                "Location": _select(lp["location"]),
+                "Priority": _select(lp["priority"]),
+                "Type of Group": _select(lp["type_of_group"]),
+                "Text": _text(lp["text"]),
+            })
+            for lp in dataset["lp"]
+        ],
+        "gps": [
+            _page(gp["notion_id"], {
+                "Name": _title(gp["name"]),
+                "Location": _select(gp["location"]),
+                "Contact Level": _select(gp["contact_level"]),
+                "Flagship": _select(gp["flagship_strategy"]),
+                "Others": _multi_select(gp["other_strategies"]),
+                "Note": _text(gp["note"]),
+                "👞 CRM Distributor": _relation(
+                    [ids["distributor"][gp["distributor_id"]]] if gp["distributor_id"] else []
+                ),
+            })
+            for gp in dataset["gp"]
+        ],
+        "funds": [
+            _page(fund["notion_id"], {
+                "Fund Name": _title(fund["fund_name"]),
+                "Geography": _select(fund["geography"]),
+                "Target Multiple": _number(fund["target_multiple"]),
+                "Status": _select(fund["status"]),
+                "Days to RS": _number(fund["days_to_rs"]),
+                "Target IRR": _text(fund["target_irr"]),
+                "Hard Cap mn": _number(fund["hard_cap_mn"]),
+                "Target mn": _number(fund["target_mn"]),
+                "Roadshow Date": _date(fund["roadshow_date"]),
+                "Sectors": _multi_select(fund["sectors"]),
+                "Note": _text(fund["note"]),
+                "Potential": _select(fund["potential"]),
+                "Asset Class": _select(fund["asset_class"]),
+                "Launch": _date(fund["launch"]),
+                "Closed": {"type": "checkbox", "checkbox": fund["closed"]},
+                "GP": _relation([fund["gp_notion_id"]]),
+            })
+            for fund in dataset["fund"]
+        ],
+    }
+
+    person_lps = related("lppersonlink", "person_id", "lp_id", "lp")
+    person_gps = related("gppersonlink", "person_id", "gp_id", "gp")
+    person_distributors = related("distributorpersonlink", "person_id", "distributor_id", "distributor")
+    pages["people"] = [
+        _page(p["notion_id"], {
+            "Name": _title(p["name"]),
+            "Cell": {"type": "phone_number", "phone_number": p["cell_phone"]},
+            "Office": {"type": "phone_number", "phone_number": p["office_phone"]},
+            "Email": {"type": "email", "email": p["email"]},
+            "Location": _select(p["location"]),
+            "People Type": _multi_select(p["people_type"]),
+            "Position": _text(p["position"]),
+            "Personal": _text(p["personal_note"]),
+            "💰 CRM LPs": _relation(person_lps.get(p["id"], [])),
+            "🌆 CRM GPs": _relation(person_gps.get(p["id"], [])),
+            "👞 CRM Distributor": _relation(person_distributors.get(p["id"], [])),
+        })
+        for p in dataset["person"]
+    ]
+
+    note_lps = related("notelplink", "note_id", "lp_id", "lp")
+    note_gps = related("notegplink", "note_id", "gp_id", "gp")
+    note_distributors = related("notedistributorlink", "note_id", "distributor_id", "distributor")
+    note_funds = related("notefundlink", "note_id", "fund_id", "fund")
+    pages["notes"] = [
+        _page(n["notion_id"], {
+            "Name": _title(n["name"]),
+            "Date": _date(n["date"]),
+            "Contact Type": _select(n["contact_type"]),
+            "Local MF": _select(n["local_mf"]),
+            "Local Alts.": _select(n["local_alts"]),
+            "Intl. MF": _select(n["intl_mf"]),
+            "Intl. Alts": _select(n["intl_alts"]),
+            "PIN": _select(n["pin"]),
+            "Useful": {"type": "checkbox", "checkbox": n["useful"]},
+            "AI summary": _text(n["ai_summary"]),
+            "CRM LPs": _relation(note_lps.get(n["id"], [])),
+            "CRM GPs": _relation(note_gps.get(n["id"], [])),
+            "CRM Distributors": _relation(note_distributors.get(n["id"], [])),
+            "Fundraise": _relation(note_funds.get(n["id"], [])),
+        }, created_time=n["date"].isoformat(), blocks=json.loads(n["content_json"]))
+        for n in dataset["note"]
+    ]
+
+    return {entity: {"database_id": f"synthetic-{entity}", "pages": entity_pages} for entity, entity_pages in pages.items()}
+
+
+def write_notion_exports(dataset: Dict[str, List[dict]], directory: str) -> Dict[str, str]:
+    """Write notion_exports() to <directory>/<entity>.json; returns file paths keyed by entity"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for entity, export in notion_exports(dataset).items():
+        paths[entity] = os.path.join(directory, f"{entity}.json")
+        with open(paths[entity], "w", encoding="utf-8") as f:
+            json.dump(export, f, ensure_ascii=False)
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python synthetic_data.py <1x|10x|100x|N> <output.db> [notion_export_dir] [seed]")
+        sys.exit(1)
+
+    scale_arg = sys.argv[1]
+    scale = SCALES.get(scale_arg) or int(scale_arg.rstrip("x"))
+    db_path = sys.argv[2]
+    export_dir = sys.argv[3] if len(sys.argv) > 3 else None
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_SEED
+
+    if os.path.exists(db_path):
+        print(f"ERROR: {db_path} already exists")
+        sys.exit(1)
+
+    from sqlmodel import create_engine
+
+    dataset = generate_dataset(scale, seed)
+    populate_database(create_engine(f"sqlite:///{db_path}"), dataset)
+    print(f"Wrote {scale}x dataset to {db_path}")
+    for table, rows in dataset.items():
+        print(f"  {table}: {len(rows)}")
+
+    if export_dir:
+        for entity, path in write_notion_exports(dataset, export_dir).items():
+            print(f"  Notion export ({entity}): {path}")
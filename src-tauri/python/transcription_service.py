@@ -8,19 +8,36 @@ import json
 from typing import Optional, Dict
 from pathlib import Path
 
+from ai_cache import AICache, get_default_cache, hash_file
+from http_client import get_client
+
+# Bump when the transcription request changes so stale cache entries are ignored
+TRANSCRIPTION_PROMPT_VERSION = "1"
+
 
 class TranscriptionService:
     """Handle audio transcription via local AI server"""
 
-    def __init__(self, server_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        server_url: str = "http://localhost:11434",
+        model: str = "whisper",
+        cache: Optional[AICache] = None,
+        use_cache: bool = True
+    ):
         """
         Initialize transcription service
 
         Args:
             server_url: URL of local AI server (Ollama or similar)
+            model: Transcription model name (part of the cache key)
+            cache: Result cache (defaults to the shared on-disk cache)
+            use_cache: Set False to always hit the AI server
         """
         self.server_url = server_url
+        self.model = model
         self.whisper_endpoint = f"{server_url}/api/transcribe"
+        self.cache = (cache or get_default_cache()) if use_cache else None
 
     def transcribe_audio(self, audio_path: str, language: str = "en") -> Dict[str, str]:
         """
@@ -48,7 +65,7 @@ class TranscriptionService:
             "segments": []
         }
 
-    def transcribe_with_whisper_api(self, audio_path: str) -> str:
+    def transcribe_with_whisper_api(self, audio_path: str, raise_on_error: bool = False) -> str:
         """
         Transcribe using Whisper API endpoint
 
@@ -57,31 +74,47 @@ class TranscriptionService:
 
         Args:
             audio_path: Path to audio file
+            raise_on_error: Raise instead of returning a placeholder text
 
         Returns:
             Transcribed text
         """
+        cache_key = None
+        if self.cache is not None and Path(audio_path).exists():
+            cache_key = AICache.make_key(hash_file(audio_path), self.model, TRANSCRIPTION_PROMPT_VERSION)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached.get('text', '')
+
         try:
             with open(audio_path, 'rb') as audio_file:
                 files = {'file': audio_file}
-                response = requests.post(
+                response = get_client().post(
                     self.whisper_endpoint,
                     files=files,
-                    timeout=300  # 5 minute timeout for long recordings
+                    timeout=300,  # 5 minute timeout for long recordings
+                    retries=0  # The open file can't be replayed
                 )
 
                 if response.status_code == 200:
                     result = response.json()
-                    return result.get('text', '')
+                    text = result.get('text', '')
+                    if cache_key:
+                        self.cache.set(cache_key, {"text": text})
+                    return text
                 else:
                     raise Exception(f"Transcription failed: {response.status_code}")
 
         except requests.exceptions.ConnectionError:
+            if raise_on_error:
+                raise
             # Server not available yet
             print("AI server not connected. Using placeholder.")
             return "[Connect to office AI server for transcription]"
 
         except Exception as e:
+            if raise_on_error:
+                raise
             print(f"Transcription error: {e}")
             return f"[Transcription error: {str(e)}]"
 
@@ -7,6 +7,21 @@ import { invoke } from "@tauri-apps/api/core";
 
 const API_BASE_URL = "http://localhost:8000";
 
+// Thrown by update* when the record's version moved on since it was loaded
+// (someone else saved); `current` is the record as stored
+export class VersionConflictError extends Error {
+  constructor(public current: any) {
+    super("This record was changed elsewhere");
+  }
+}
+
+async function throwOnVersionConflict(response: Response): Promise<void> {
+  if (response.status === 409) {
+    const body = await response.json();
+    throw new VersionConflictError(body.detail?.current);
+  }
+}
+
 // Types
 export interface LP {
   id?: number;
@@ -24,6 +39,7 @@ export interface LP {
   type_of_group?: string;
   text?: string;
   notion_id?: string;
+  version?: number; // Bumped on every save; send it back to detect concurrent edits
 }
 
 export interface GP {
@@ -36,6 +52,7 @@ export interface GP {
   note?: string;
   distributor_id?: number;
   notion_id?: string;
+  version?: number; // Bumped on every save; send it back to detect concurrent edits
 }
 
 export interface Person {
@@ -52,6 +69,7 @@ export interface Person {
   location?: string;
   people_type?: string;
   personal_note?: string;
+  version?: number; // Bumped on every save; send it back to detect concurrent edits
 }
 
 export interface Note {
@@ -69,6 +87,7 @@ export interface Note {
   useful?: boolean;
   audio_path?: string;
   transcription_path?: string;
+  version?: number; // Bumped on every save; send it back to detect concurrent edits
 }
 
 export interface Todo {
@@ -77,6 +96,7 @@ export interface Todo {
   description: string;
   status?: string;
   due_date?: string;
+  version?: number; // Bumped on every save; send it back to detect concurrent edits
 }
 
 export interface Fund {
@@ -101,6 +121,7 @@ export interface Fund {
   final_close?: string;
   closed?: boolean;
   gp_notion_id?: string;
+  version?: number; // Bumped on every save; send it back to detect concurrent edits
 }
 
 export interface SalesFunnelItem {
@@ -133,8 +154,20 @@ export interface Roadshow {
   lv_hotel: string; // Needed, Done, None
   mty_driver: string; // Needed, Done, None
   cdmx_driver: string; // Needed, Done, None
-  flight_images?: string; // JSON array of image data URLs
+  attachments?: Attachment[]; // Flight detail images (references only; bodies via attachmentUrl)
   notes?: string;
+  version?: number; // Bumped on every save; send it back to detect concurrent edits
+}
+
+export interface Attachment {
+  id: number;
+  roadshow_id: number;
+  content_hash: string;
+  mime_type: string;
+  size_bytes: number;
+  filename?: string;
+  created_at: string;
+  url: string; // Path relative to API_BASE_URL
 }
 
 export interface RoadshowLPStatus {
@@ -185,6 +218,7 @@ export async function updateLP(id: number, lp: Partial<LP>): Promise<LP> {
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(lp),
   });
+  await throwOnVersionConflict(response);
   return response.json();
 }
 
@@ -223,6 +257,7 @@ export async function updateGP(id: number, gp: Partial<GP>): Promise<GP> {
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(gp),
   });
+  await throwOnVersionConflict(response);
   return response.json();
 }
 
@@ -270,6 +305,29 @@ export async function searchPeople(query: string): Promise<Person[]> {
   return response.json();
 }
 
+// Type-ahead across entity types (ranked, served from the backend's in-memory index)
+export type AutocompleteEntity = "lp" | "gp" | "person" | "fund" | "distributor";
+
+export interface AutocompleteMatch {
+  entity: AutocompleteEntity;
+  id: number;
+  label: string;
+  detail: string | null;
+  match: "exact" | "prefix" | "word_prefix" | "alias" | "infix";
+}
+
+export async function autocomplete(
+  query: string,
+  types: AutocompleteEntity[] = [],
+  limit: number = 10
+): Promise<AutocompleteMatch[]> {
+  const params = new URLSearchParams({ q: query, limit: String(limit) });
+  types.forEach(type => params.append("types", type));
+  const response = await fetch(`${API_BASE_URL}/autocomplete?${params}`);
+  if (!response.ok) throw new Error(`Autocomplete failed: ${await response.text()}`);
+  return response.json();
+}
+
 export async function createPerson(person: Person): Promise<Person> {
   const response = await fetch(`${API_BASE_URL}/people`, {
     method: "POST",
@@ -285,6 +343,7 @@ export async function updatePerson(id: number, person: Partial<Person>): Promise
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(person),
   });
+  await throwOnVersionConflict(response);
   return response.json();
 }
 
@@ -375,9 +434,55 @@ export async function updateNote(id: number, note: Partial<Note>): Promise<Note>
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(note),
   });
+  await throwOnVersionConflict(response);
+  return response.json();
+}
+
+// Partial note edits: JSON Patch operations plus "splice" for text fields
+// (offsets are UTF-16 code units, i.e. JavaScript string indices)
+export type NotePatchOp =
+  | { op: "add" | "replace" | "test"; path: string; value: any }
+  | { op: "remove"; path: string }
+  | { op: "splice"; path: string; offset: number; remove: number; insert: string };
+
+export interface NotePatchResult {
+  id: number;
+  version: number;
+  changed: string[];
+}
+
+export async function patchNote(id: number, ops: NotePatchOp[], version?: number): Promise<NotePatchResult> {
+  const response = await fetch(`${API_BASE_URL}/notes/${id}`, {
+    method: "PATCH",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ ops, version }),
+  });
+  await throwOnVersionConflict(response);
+  if (!response.ok) throw new Error(`Failed to patch note: ${await response.text()}`);
   return response.json();
 }
 
+// Smallest single splice turning `before` into `after` (null if equal)
+export function textSplice(path: string, before: string, after: string): NotePatchOp | null {
+  if (before === after) return null;
+  let start = 0;
+  const maxStart = Math.min(before.length, after.length);
+  while (start < maxStart && before[start] === after[start]) start++;
+  let end = 0;
+  const maxEnd = Math.min(before.length, after.length) - start;
+  while (end < maxEnd && before[before.length - 1 - end] === after[after.length - 1 - end]) end++;
+  // Don't cut through a surrogate pair (emoji): the server rejects that
+  if (start > 0 && /[\uD800-\uDBFF]/.test(before[start - 1])) start--;
+  if (end > 0 && /[\uDC00-\uDFFF]/.test(before[before.length - end])) end--;
+  return {
+    op: "splice",
+    path,
+    offset: start,
+    remove: before.length - start - end,
+    insert: after.slice(start, after.length - end),
+  };
+}
+
 export async function createNoteRelationships(
   noteId: number,
   lpIds: number[],
@@ -400,6 +505,68 @@ export async function createNoteRelationships(
   return response.json();
 }
 
+// Batches: operations run in order in one transaction (all or nothing).
+// A later operation can use "$<ref>" for the id of a record created earlier.
+export type BatchEntity = "lp" | "gp" | "person" | "fund" | "note" | "todo" | "distributor";
+export type BatchRelation =
+  | "note_lp" | "note_gp" | "note_fund" | "note_distributor" | "note_roadshow"
+  | "gp_lp" | "gp_person" | "lp_person" | "distributor_person";
+export type BatchId = number | `$${string}`;
+
+export type BatchOperation =
+  | { op: "create"; entity: BatchEntity; ref?: string; data: Record<string, any> }
+  | { op: "update"; entity: BatchEntity; id: BatchId; data: Record<string, any>; version?: number }
+  | { op: "link" | "unlink" | "set_links"; relation: BatchRelation; id: BatchId; ids: BatchId[] };
+
+export interface BatchResult {
+  results: any[]; // Per operation; creates include the new `record`
+  refs: Record<string, number>;
+}
+
+// index is null when the batch as a whole was rejected (too many operations)
+export class BatchError extends Error {
+  constructor(public index: number | null, message: string) {
+    super(index === null ? `Batch rejected: ${message}` : `Batch operation ${index} failed: ${message}`);
+  }
+}
+
+export async function runBatch(operations: BatchOperation[]): Promise<BatchResult> {
+  const response = await fetch(`${API_BASE_URL}/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ operations }),
+  });
+  await throwOnVersionConflict(response);
+  if (response.status === 400) {
+    const { detail } = await response.json();
+    throw new BatchError(detail.index, detail.message);
+  }
+  if (!response.ok) throw new Error(`Batch failed: ${await response.text()}`);
+  return response.json();
+}
+
+// Change feed: committed writes streamed as Server-Sent Events.
+// `values` holds the new value of every field in `fields` (the whole record for inserts);
+// "invalidate" means a bulk write touched the table, so refetch it if you show it.
+export interface ChangeEvent {
+  seq: number;
+  at: number;
+  entity: string; // Table name: lp, gp, person, fund, note, todo, roadshow, fundlpinterest, notelplink, ...
+  id: number | Record<string, number> | null; // Composite key for link/funnel tables
+  op: "insert" | "update" | "upsert" | "delete" | "invalidate";
+  fields?: string[];
+  values?: Record<string, any>;
+}
+
+// EventSource reconnects by itself and resumes from the last event it saw;
+// onReset runs when the missed changes are gone (e.g. the backend restarted)
+export function subscribeChanges(onChange: (change: ChangeEvent) => void, onReset: () => void): () => void {
+  const source = new EventSource(`${API_BASE_URL}/changes`);
+  source.onmessage = (event) => onChange(JSON.parse(event.data));
+  source.addEventListener("reset", () => onReset());
+  return () => source.close();
+}
+
 // API functions - Todos
 export async function fetchTodos(): Promise<Todo[]> {
   const response = await fetch(`${API_BASE_URL}/todos`);
@@ -421,6 +588,7 @@ export async function updateTodo(id: number, todo: Partial<Todo>): Promise<Todo>
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(todo),
   });
+  await throwOnVersionConflict(response);
   return response.json();
 }
 
@@ -495,6 +663,7 @@ export async function updateFund(fundId: number, fund: Partial<Fund>): Promise<F
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(fund),
   });
+  await throwOnVersionConflict(response);
 
   console.log("Response status:", response.status);
   console.log("Response ok:", response.ok);
@@ -522,6 +691,58 @@ export async function updateLPInterest(fundId: number, lpId: number, interest: s
   });
 }
 
+// Portfolio funnel analytics (all funds, or fundIds) in one call
+export interface FunnelStageTotals {
+  count: number;
+  investment_low: number;
+  investment_high: number;
+  weighted_value: number;
+}
+
+export interface FundFunnelSummary {
+  fund_id: number;
+  fund_name: string;
+  target_mn?: number;
+  stages: Record<string, FunnelStageTotals>;
+  weighted_pipeline: number;
+}
+
+export interface FunnelConversionWindow {
+  start: string;
+  end: string;
+  transitions: { from: string; to: string; count: number; rate: number }[];
+  advance_rate: Record<string, number>; // Share of moves out of a stage that went further along the pipeline
+}
+
+export interface FunnelAnalytics {
+  stages: string[];
+  funds: FundFunnelSummary[];
+  totals: { stages: Record<string, FunnelStageTotals>; weighted_pipeline: number };
+  conversion: { window_days: number; windows: FunnelConversionWindow[] };
+}
+
+export async function fetchFunnelAnalytics(
+  options: { fundIds?: number[]; windowDays?: number; windows?: number } = {}
+): Promise<FunnelAnalytics> {
+  const params = new URLSearchParams();
+  (options.fundIds || []).forEach(id => params.append("fund_ids", String(id)));
+  if (options.windowDays) params.set("window_days", String(options.windowDays));
+  if (options.windows) params.set("windows", String(options.windows));
+  const response = await fetch(`${API_BASE_URL}/funnel/analytics?${params}`);
+  if (!response.ok) throw new Error(`Failed to load funnel analytics: ${await response.text()}`);
+  return response.json();
+}
+
+// Move many LPs at once: one request, one statement
+export async function updateLPInterests(fundId: number, updates: { lp_id: number; interest: string }[]): Promise<void> {
+  const response = await fetch(`${API_BASE_URL}/funds/${fundId}/lps/interest`, {
+    method: "PUT",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(updates),
+  });
+  if (!response.ok) throw new Error(`Failed to update LP interests: ${await response.text()}`);
+}
+
 // Roadshow functions
 export async function fetchRoadshows(): Promise<Roadshow[]> {
   const response = await fetch(`${API_BASE_URL}/roadshows`);
@@ -547,6 +768,7 @@ export async function updateRoadshow(roadshowId: number, roadshow: Partial<Roads
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(roadshow),
   });
+  await throwOnVersionConflict(response);
   if (!response.ok) {
     const error = await response.text();
     throw new Error(`Failed to update roadshow: ${error}`);
@@ -563,6 +785,39 @@ export async function deleteRoadshow(roadshowId: number): Promise<void> {
   }
 }
 
+// Roadshow attachment functions
+export function attachmentUrl(attachment: Attachment): string {
+  return `${API_BASE_URL}${attachment.url}`;
+}
+
+export async function fetchRoadshowAttachments(roadshowId: number): Promise<Attachment[]> {
+  const response = await fetch(`${API_BASE_URL}/roadshows/${roadshowId}/attachments`);
+  return response.json();
+}
+
+export async function uploadRoadshowAttachment(roadshowId: number, file: Blob, filename?: string): Promise<Attachment> {
+  const form = new FormData();
+  form.append("file", file, filename ?? (file instanceof File ? file.name : "attachment"));
+  const response = await fetch(`${API_BASE_URL}/roadshows/${roadshowId}/attachments`, {
+    method: "POST",
+    body: form,
+  });
+  if (!response.ok) {
+    const error = await response.text();
+    throw new Error(`Failed to upload attachment: ${error}`);
+  }
+  return response.json();
+}
+
+export async function deleteAttachment(attachmentId: number): Promise<void> {
+  const response = await fetch(`${API_BASE_URL}/attachments/${attachmentId}`, {
+    method: "DELETE",
+  });
+  if (!response.ok) {
+    throw new Error("Failed to delete attachment");
+  }
+}
+
 // Roadshow LP Status functions (similar to sales funnel)
 export async function fetchRoadshowLPStatus(roadshowId: number): Promise<RoadshowLPStatus[]> {
   const response = await fetch(`${API_BASE_URL}/roadshows/${roadshowId}/lp-status`);
@@ -575,6 +830,15 @@ export async function updateLPRoadshowStatus(roadshowId: number, lpId: number, s
   });
 }
 
+export async function updateLPRoadshowStatuses(roadshowId: number, updates: { lp_id: number; status: string }[]): Promise<void> {
+  const response = await fetch(`${API_BASE_URL}/roadshows/${roadshowId}/lps/status`, {
+    method: "PUT",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(updates),
+  });
+  if (!response.ok) throw new Error(`Failed to update LP statuses: ${await response.text()}`);
+}
+
 // Link notes to roadshows
 export async function fetchNoteRoadshows(noteId: number): Promise<Roadshow[]> {
   const response = await fetch(`${API_BASE_URL}/notes/${noteId}/roadshows`);
@@ -592,3 +856,189 @@ export async function unlinkNoteFromRoadshow(noteId: number, roadshowId: number)
     method: "DELETE",
   });
 }
+
+// Background processing jobs (transcription / summarization)
+export interface ProcessingJob {
+  id: number;
+  note_id: number;
+  job_type: string; // transcribe, summarize, process
+  status: string; // queued, running, completed, failed, cancelled
+  progress: number; // 0.0 - 1.0
+  message?: string;
+  error?: string;
+  result_json?: string;
+  partial_output?: string;
+  created_at: string;
+  started_at?: string;
+  finished_at?: string;
+}
+
+export async function enqueueNoteJob(noteId: number, jobType: string = "process"): Promise<ProcessingJob> {
+  const response = await fetch(`${API_BASE_URL}/notes/${noteId}/jobs`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ job_type: jobType }),
+  });
+  if (!response.ok) {
+    const error = await response.text();
+    throw new Error(`Failed to queue job: ${error}`);
+  }
+  return response.json();
+}
+
+export async function fetchJob(jobId: number): Promise<ProcessingJob> {
+  const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+  return response.json();
+}
+
+export function watchJob(jobId: number, onUpdate: (job: ProcessingJob) => void): EventSource {
+  const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`);
+  source.onmessage = (event) => {
+    const job: ProcessingJob = JSON.parse(event.data);
+    onUpdate(job);
+    if (["completed", "failed", "cancelled"].includes(job.status)) {
+      source.close();
+    }
+  };
+  return source;
+}
+
+export async function cancelJob(jobId: number): Promise<ProcessingJob> {
+  const response = await fetch(`${API_BASE_URL}/jobs/${jobId}/cancel`, { method: "POST" });
+  return response.json();
+}
+
+export function watchNoteSummary(
+  noteId: number,
+  onText: (fragment: string) => void,
+  onDone: (job: ProcessingJob) => void
+): EventSource {
+  const source = new EventSource(`${API_BASE_URL}/notes/${noteId}/summary/stream`);
+  source.addEventListener("token", (event) => {
+    onText(JSON.parse((event as MessageEvent).data).text);
+  });
+  source.addEventListener("done", (event) => {
+    onDone(JSON.parse((event as MessageEvent).data));
+    source.close();
+  });
+  return source;
+}
+
+// Semantic note search
+export interface SemanticSearchResult {
+  note_id: number;
+  score: number;
+  name: string;
+  date?: string;
+  summary?: string;
+}
+
+export async function semanticSearchNotes(query: string, k: number = 10): Promise<SemanticSearchResult[]> {
+  const response = await fetch(`${API_BASE_URL}/notes/semantic-search?q=${encodeURIComponent(query)}&k=${k}`);
+  return response.json();
+}
+
+// Duplicate detection
+export type DuplicateEntity = "person" | "lp" | "gp" | "distributor";
+
+export interface DuplicatePair {
+  entity: DuplicateEntity;
+  score: number;
+  reasons: string[];
+  a: { id: number; name: string };
+  b: { id: number; name: string };
+}
+
+export async function fetchDuplicates(entity: DuplicateEntity, threshold?: number, limit: number = 100): Promise<DuplicatePair[]> {
+  const params = new URLSearchParams({ entity, limit: String(limit) });
+  if (threshold !== undefined) params.set("threshold", String(threshold));
+  const response = await fetch(`${API_BASE_URL}/duplicates?${params}`);
+  return response.json();
+}
+
+export async function mergeDuplicates(entity: DuplicateEntity, keepId: number, mergeId: number): Promise<any> {
+  const response = await fetch(`${API_BASE_URL}/duplicates/merge`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ entity, keep_id: keepId, merge_id: mergeId }),
+  });
+  if (!response.ok) throw new Error("Failed to merge records");
+  return response.json();
+}
+
+// Note images (indexed from note blocks, including nested ones)
+export interface NoteImage {
+  id: number;
+  note_id: number;
+  block_id?: string;
+  path: string;
+  content_hash?: string;
+  width?: number;
+  height?: number;
+  position: number;
+}
+
+export async function fetchNoteImages(noteIds: number[]): Promise<Record<number, NoteImage[]>> {
+  if (noteIds.length === 0) return {};
+  const response = await fetch(`${API_BASE_URL}/notes/images?ids=${noteIds.join(",")}`);
+  return response.json();
+}
+
+// Instrumentation
+export interface SlowQuery {
+  at: number; // Unix time
+  ms: number;
+  statement: string;
+  plan?: string[]; // EXPLAIN QUERY PLAN rows
+}
+
+export async function fetchSlowQueries(): Promise<SlowQuery[]> {
+  const response = await fetch(`${API_BASE_URL}/metrics/slow-queries`);
+  return response.json();
+}
+
+// Database view queries (server-side filter/sort/page with facet counts)
+export type ViewQueryEntity = "lps" | "gps" | "people" | "funds" | "notes" | "distributors";
+
+export type FilterOperator =
+  | "eq" | "ne" | "in" | "not_in" | "contains" | "not_contains" | "starts_with"
+  | "is_empty" | "is_not_empty" | "lt" | "lte" | "gt" | "gte" | "between";
+
+export type FilterNode =
+  | { and: FilterNode[] }
+  | { or: FilterNode[] }
+  | { not: FilterNode }
+  | { field: string; op: FilterOperator; value?: any };
+
+export interface ViewQuery {
+  filter?: FilterNode | null;
+  search?: string;
+  sort?: { field: string; dir: "asc" | "desc" }[];
+  offset?: number;
+  limit?: number;
+  facets?: string[]; // Omit for the entity's default facets
+  fields?: string[]; // Omit for all columns except large text
+}
+
+export interface FacetCount {
+  value: string;
+  count: number;
+}
+
+export interface ViewQueryResult<T> {
+  total: number;
+  offset: number;
+  limit: number;
+  items: T[];
+  facets: Record<string, FacetCount[]>;
+}
+
+export async function queryView<T = any>(entity: ViewQueryEntity, query: ViewQuery): Promise<ViewQueryResult<T>> {
+  const response = await fetch(`${API_BASE_URL}/${entity}/query`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(query),
+  });
+  if (!response.ok) throw new Error(`Failed to query ${entity}`);
+  return response.json();
+}
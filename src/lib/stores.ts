@@ -2,8 +2,8 @@
  * Svelte stores for state management
  */
 
-import { writable } from "svelte/store";
-import type { LP, GP, Person, Note, Todo, Fund, Roadshow } from "./api";
+import { writable, type Writable } from "svelte/store";
+import type { LP, GP, Person, Note, Todo, Fund, Roadshow, ChangeEvent } from "./api";
 
 // Entity stores
 export const lps = writable<LP[]>([]);
@@ -14,6 +14,121 @@ export const todos = writable<Todo[]>([]);
 export const funds = writable<Fund[]>([]);
 export const roadshows = writable<Roadshow[]>([]);
 
+// Change feed entity -> store holding that table
+const entityStores: Record<string, Writable<any[]>> = {
+  lp: lps,
+  gp: gps,
+  person: people,
+  note: notes,
+  todo: todos,
+  fund: funds,
+  roadshow: roadshows,
+};
+
+/**
+ * Apply one change feed event to the entity stores.
+ * Returns false for "invalidate" events the caller should answer with a refetch.
+ */
+export function applyChange(change: ChangeEvent): boolean {
+  const store = entityStores[change.entity];
+  if (!store) return true;  // Not kept in a store
+  if (change.op === "invalidate") return false;
+
+  store.update((rows) => {
+    const index = rows.findIndex((row) => row.id === change.id);
+    if (change.op === "delete") {
+      return index === -1 ? rows : rows.filter((_, i) => i !== index);
+    }
+    if (index === -1) {
+      // An update for a row this store never loaded carries only the changed fields
+      return change.op === "insert" ? [...rows, change.values] : rows;
+    }
+    const row = rows[index];
+    // Our own save may already be applied with a newer version
+    if (row.version != null && change.values?.version != null && row.version > change.values.version) {
+      return rows;
+    }
+    const next = [...rows];
+    next[index] = { ...row, ...change.values };
+    return next;
+  });
+  return true;
+}
+
+// Views derived from several tables (the funnels) follow the feed through App's one
+// subscription; listeners get null when the feed was reset and they should reload
+type ChangeListener = (change: ChangeEvent | null) => void;
+const changeListeners = new Set<ChangeListener>();
+
+export function listenToChanges(listener: ChangeListener): () => void {
+  changeListeners.add(listener);
+  return () => changeListeners.delete(listener);
+}
+
+export function notifyChange(change: ChangeEvent | null) {
+  changeListeners.forEach((listener) => listener(change));
+}
+
+// A funnel: one row per LP with its stage in the fund/roadshow plus LP details
+export interface Funnel {
+  table: string;  // Stage table: fundlpinterest or roadshowlpstatus
+  owner: string;  // Its fund_id or roadshow_id column
+  ownerId: number | null;
+  stage: string;  // interest or status
+  links: string[];  // Note link tables the last contact is derived from
+}
+
+type FunnelRow = { lp_id: number; [field: string]: any };
+
+// LP columns copied into funnel rows (lp.name is the row's lp_name)
+const FUNNEL_LP_FIELDS = ["aum_billions", "location", "priority", "advisor", "type_of_group", "investment_low", "investment_high"];
+
+/** Funnel row fields from LP values (a whole LP or the changed fields of one) */
+export function funnelLPFields(values: Record<string, any>): Record<string, any> {
+  const fields: Record<string, any> = {};
+  if ("name" in values) fields.lp_name = values.name;
+  for (const field of FUNNEL_LP_FIELDS) {
+    if (field in values) fields[field] = values[field];
+  }
+  return fields;
+}
+
+export function patchFunnelRow<T extends FunnelRow>(rows: T[], lpId: number, values: Record<string, any>): T[] {
+  return rows.map((row) => (row.lp_id === lpId ? { ...row, ...values } : row));
+}
+
+/**
+ * Apply one change feed event to a funnel's rows.
+ * Stage upserts and LP edits are applied in place; returns the same rows if the
+ * event doesn't touch the funnel, or null if the rows have to be reloaded (a new
+ * LP, a note link or note date that may move the last contact, a reset).
+ */
+export function applyFunnelChange<T extends FunnelRow>(rows: T[], change: ChangeEvent | null, funnel: Funnel): T[] | null {
+  if (!change) return null;
+  const values = change.values ?? {};
+
+  if (change.entity === funnel.table) {
+    if (change.op === "invalidate" || change.op === "delete") return null;
+    const key = change.id as Record<string, number> | null;
+    if (key?.[funnel.owner] !== funnel.ownerId) return rows;
+    const fields: Record<string, any> = {};
+    for (const field of [funnel.stage, "last_contact_date", "latest_note_id"]) {
+      if (field in values) fields[field] = values[field];
+    }
+    return patchFunnelRow(rows, key.lp_id, fields);
+  }
+  if (change.entity === "lp") {
+    if (change.op === "delete") return rows.filter((row) => row.lp_id !== change.id);
+    if (change.op === "update") return patchFunnelRow(rows, change.id as number, funnelLPFields(values));
+    return null;  // A new LP gets a row, a bulk write may have changed any
+  }
+  if (change.entity === "note") {
+    const datesChanged = change.op === "update" && (change.fields ?? []).includes("date");
+    return datesChanged || change.op === "delete" || change.op === "invalidate" ? null : rows;
+  }
+  return funnel.links.includes(change.entity) ? null : rows;
+}
+
 // Current meeting state
 export const currentNote = writable<Note | null>(null);
 export const isRecording = writable<boolean>(false);